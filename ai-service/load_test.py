@@ -0,0 +1,118 @@
+"""
+CPU load test for the ESM-2 micro-batching queue.
+
+Runs the same stream of protein embedding requests through the batcher at
+several concurrency levels, with batching disabled (batches of one, as
+before) and enabled, and prints requests/sec for each.
+
+    python load_test.py --model esm2_t6_8M_UR50D --requests 256
+
+The default model is the small 8M-parameter ESM-2 so the test finishes in
+minutes on a laptop; pass esm2_t33_650M_UR50D to measure the served model.
+Throughput does not depend on the weights, so `--random-weights` builds the
+same architecture without downloading a checkpoint.
+"""
+from typing import Callable, List
+import argparse
+import asyncio
+import random
+import sys
+import time
+import numpy as np
+import torch
+import esm
+
+from bioforge_seqkit import MicroBatcher
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+# ESM-2 architectures: model name -> (layers, embedding dimension, attention heads)
+ESM2_ARCHITECTURES = {
+    "esm2_t6_8M_UR50D": (6, 320, 20),
+    "esm2_t12_35M_UR50D": (12, 480, 20),
+    "esm2_t30_150M_UR50D": (30, 640, 20),
+    "esm2_t33_650M_UR50D": (33, 1280, 20),
+}
+
+def random_proteins(count: int, min_length: int, max_length: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [
+        "M" + "".join(rng.choice(AMINO_ACIDS) for _ in range(rng.randint(min_length, max_length) - 1))
+        for _ in range(count)
+    ]
+
+def esm_embedder(model_name: str, random_weights: bool = False) -> Callable[[List[str]], List[np.ndarray]]:
+    if random_weights:
+        num_layers, embed_dim, attention_heads = ESM2_ARCHITECTURES[model_name]
+        alphabet = esm.Alphabet.from_architecture("ESM-1b")
+        model = esm.ESM2(num_layers, embed_dim, attention_heads, alphabet)
+    else:
+        model, alphabet = getattr(esm.pretrained, model_name)()
+    model.eval()
+    layer = model.num_layers
+    batch_converter = alphabet.get_batch_converter()
+
+    def embed_proteins(proteins: List[str]) -> List[np.ndarray]:
+        _, _, batch_tokens = batch_converter([(str(index), protein) for index, protein in enumerate(proteins)])
+        with torch.no_grad():
+            results = model(batch_tokens, repr_layers=[layer])
+        return list(results["representations"][layer][:, 0, :].numpy())
+
+    return embed_proteins
+
+async def drive(batcher: MicroBatcher, proteins: List[str], concurrency: int) -> float:
+    """
+    Send every protein through the batcher with at most `concurrency` requests
+    in flight, and return requests/sec.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(protein: str):
+        async with semaphore:
+            await batcher.run(protein)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(protein) for protein in proteins))
+    return len(proteins) / (time.perf_counter() - start)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="esm2_t6_8M_UR50D", help="esm.pretrained model name")
+    parser.add_argument("--random-weights", action="store_true", help="Skip the checkpoint download")
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--min-length", type=int, default=50)
+    parser.add_argument("--max-length", type=int, default=400)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--max-batch-tokens", type=int, default=8192)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    embed_proteins = esm_embedder(args.model, args.random_weights)
+    proteins = random_proteins(args.requests, args.min_length, args.max_length)
+    embed_proteins(proteins[:1])  # Warm up
+
+    print(f"{args.model} on CPU ({torch.get_num_threads()} threads), {args.requests} requests")
+    print(f"{'concurrency':>12}{'unbatched rps':>16}{'batched rps':>14}{'mean batch':>12}{'speedup':>10}")
+    for concurrency in args.concurrency:
+        unbatched = MicroBatcher(embed_proteins, max_wait_ms=0, max_batch_size=1, name="unbatched")
+        batched = MicroBatcher(
+            embed_proteins,
+            max_wait_ms=args.max_wait_ms,
+            max_batch_tokens=args.max_batch_tokens,
+            max_batch_size=args.max_batch_size,
+            name="batched",
+        )
+        unbatched_rps = asyncio.run(drive(unbatched, proteins, concurrency))
+        batched_rps = asyncio.run(drive(batched, proteins, concurrency))
+        mean_batch = batched.metrics()["mean_batch_size"]
+        unbatched.stop()
+        batched.stop()
+        print(
+            f"{concurrency:>12}{unbatched_rps:>16.1f}{batched_rps:>14.1f}"
+            f"{mean_batch:>12.1f}{batched_rps / unbatched_rps:>9.2f}x"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
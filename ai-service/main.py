@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
 import torch
@@ -10,6 +11,11 @@ from Bio.PDB import PDBParser, PDBIO
 import os
 import tempfile
 import logging
+import asyncio
+from bioforge_seqkit import BoundedExecutor, MicroBatcher, QueueFullError, analyze_sequence, find_orfs, orf_sequence
+from bioforge_seqkit import EmbeddingStore, ModelRegistry, ModelUnavailableError
+from bioforge_seqkit.registry import READY
+from bioforge_seqkit import gc_content as calculate_gc_content
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,8 +46,12 @@ class ProteinSequence(BaseModel):
     sequence: str
     name: Optional[str] = None
 
-# Load ESM-2 model
-try:
+# Limit PyTorch intra-op threads so concurrent inference calls do not oversubscribe the CPU
+if os.environ.get("TORCH_NUM_THREADS"):
+    torch.set_num_threads(int(os.environ["TORCH_NUM_THREADS"]))
+
+def load_esm2():
+    """Load ESM-2 for function prediction."""
     logger.info("Loading ESM-2 model...")
     model, alphabet = esm.pretrained.esm2_t33_650M_UR50D()
     model.eval()  # Set the model to evaluation mode
@@ -52,27 +62,95 @@ try:
         logger.info("ESM-2 model loaded on GPU")
     else:
         logger.info("ESM-2 model loaded on CPU")
+    return model, alphabet
+
+def load_esmfold():
+    """Load ESMFold for structure prediction."""
+    logger.info("Loading ESMFold model...")
+    esmfold = esm.pretrained.esmfold_v1()
+    esmfold.eval()
     
-    # Load ESMFold for structure prediction
-    try:
-        esmfold = esm.pretrained.esmfold_v1()
-        esmfold.eval()
-        
-        if torch.cuda.is_available():
-            esmfold = esmfold.cuda()
-            logger.info("ESMFold model loaded on GPU")
-        else:
-            logger.info("ESMFold model loaded on CPU")
-    except Exception as e:
-        logger.error(f"Error loading ESMFold model: {e}")
-        esmfold = None
-        logger.warning("Structure prediction will not be available")
-    
-    model_loaded = True
-except Exception as e:
-    logger.error(f"Error loading ESM-2 model: {e}")
-    model_loaded = False
-    logger.warning("AI service will run in simulation mode")
+    if torch.cuda.is_available():
+        esmfold = esmfold.cuda()
+        logger.info("ESMFold model loaded on GPU")
+    else:
+        logger.info("ESMFold model loaded on CPU")
+    return esmfold
+
+def warm_up_esm2(esm2):
+    """Run one small batch so the first request does not pay for lazy initialization."""
+    embed_proteins(["MKTAYIAKQRQISFVKSHFSRQ"], esm2)
+
+def warm_up_esmfold(esmfold):
+    """Fold one short peptide to initialize ESMFold."""
+    with torch.no_grad():
+        esmfold.infer_pdb("MKTAYIAKQRQISFVKSHFSRQ")
+
+# Models load on first use, or at startup in the background when listed in MODEL_PRELOAD
+# (comma-separated). /ready waits for the models listed in READY_MODELS.
+models = ModelRegistry(warmup=os.environ.get("MODEL_WARMUP", "").lower() in ("1", "true", "yes"))
+models.register("esm2", load_esm2, warm_up_esm2)
+models.register("esmfold", load_esmfold, warm_up_esmfold)
+MODEL_PRELOAD = [name.strip() for name in os.environ.get("MODEL_PRELOAD", "").split(",") if name.strip()]
+READY_MODELS = [name.strip() for name in os.environ.get("READY_MODELS", "").split(",") if name.strip()]
+
+@app.on_event("startup")
+def preload_models():
+    models.load_in_background(MODEL_PRELOAD)
+
+def embed_proteins(proteins: List[str], esm2=None) -> List[np.ndarray]:
+    """Run ESM-2 on a batch of protein sequences and return their [CLS] embeddings."""
+    model, alphabet = esm2 or models.get("esm2")
+    batch_converter = alphabet.get_batch_converter()
+    batch_labels, batch_strs, batch_tokens = batch_converter(
+        [(f"protein_{index}", protein) for index, protein in enumerate(proteins)]
+    )
+    
+    # Move to GPU if available
+    if torch.cuda.is_available():
+        batch_tokens = batch_tokens.cuda()
+    
+    # Padding is masked out, so each embedding matches a batch-of-one run
+    with torch.no_grad():
+        results = model(batch_tokens, repr_layers=[33])
+    return list(results["representations"][33][:, 0, :].cpu().numpy())
+
+# Concurrent /api/predict requests share ESM-2 forward passes through a micro-batching queue
+esm_batcher = MicroBatcher(
+    embed_proteins,
+    max_wait_ms=float(os.environ.get("ESM_BATCH_MAX_WAIT_MS", "10")),
+    max_batch_tokens=int(os.environ.get("ESM_BATCH_MAX_TOKENS", "8192")),
+    max_batch_size=int(os.environ.get("ESM_BATCH_MAX_SIZE", "32")),
+    max_queue=int(os.environ.get("ESM_BATCH_MAX_QUEUE", "256")),
+    name="esm2",
+)
+PREDICT_TIMEOUT = float(os.environ.get("PREDICT_TIMEOUT_S", "30"))
+
+# Embeddings persist on disk, keyed by protein hash and model version, shared by all workers
+ESM2_EMBEDDING_VERSION = "esm2_t33_650M_UR50D-layer33-cls"
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR")
+embedding_store = EmbeddingStore(EMBEDDING_CACHE_DIR, ESM2_EMBEDDING_VERSION) if EMBEDDING_CACHE_DIR else None
+
+# Structure predictions run on a small bounded pool; excess requests get a 429
+structure_executor = BoundedExecutor(
+    max_workers=int(os.environ.get("STRUCTURE_WORKERS", "1")),
+    max_queue=int(os.environ.get("STRUCTURE_MAX_QUEUE", "4")),
+    name="esmfold",
+)
+STRUCTURE_TIMEOUT = float(os.environ.get("STRUCTURE_TIMEOUT_S", "300"))
+
+@app.on_event("shutdown")
+def stop_inference():
+    esm_batcher.stop()
+    structure_executor.shutdown()
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(asyncio.TimeoutError)
+async def inference_timeout_handler(request: Request, exc: asyncio.TimeoutError):
+    return JSONResponse(status_code=504, content={"detail": "Inference timed out"})
 
 # Helper functions
 def dna_to_protein(dna_sequence: str) -> str:
@@ -80,78 +158,68 @@ def dna_to_protein(dna_sequence: str) -> str:
     seq = Seq(dna_sequence.upper())
     return str(seq.translate())
 
-def find_orfs(dna_sequence: str, min_length: int = 30) -> List[str]:
-    """Find all open reading frames in a DNA sequence."""
-    seq = Seq(dna_sequence.upper())
-    orfs = []
-    
-    # Check all reading frames
-    for frame in range(3):
-        # Get the sequence in this reading frame
-        frame_seq = seq[frame:]
-        
-        # Adjust length to be divisible by 3
-        frame_seq = frame_seq[:len(frame_seq) - (len(frame_seq) % 3)]
-        
-        # Find start codons
-        for i in range(0, len(frame_seq), 3):
-            if frame_seq[i:i+3] == "ATG":
-                # Found a start codon, look for a stop codon
-                for j in range(i, len(frame_seq), 3):
-                    if frame_seq[j:j+3] in ["TAA", "TAG", "TGA"]:
-                        # Found a stop codon, extract the ORF
-                        orf = frame_seq[i:j+3]
-                        if len(orf) >= min_length:  # Minimum length for a meaningful ORF
-                            orfs.append(str(orf))
-                        break
-    
-    return orfs
-
 # API endpoints
 @app.get("/")
 async def root():
     """Root endpoint to check if the service is running."""
-    return {"message": "BioForge AI Service is running", "model_loaded": model_loaded}
+    return {"message": "BioForge AI Service is running", "model_loaded": models.status("esm2") == READY}
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: ready once the models listed in READY_MODELS are loaded."""
+    status = {name: entry["status"] for name, entry in models.info().items()}
+    if not models.is_ready(READY_MODELS):
+        return JSONResponse(status_code=503, content={"ready": False, "models": status})
+    return {"ready": True, "models": status}
+
+@app.get("/api/models")
+async def model_info():
+    """Load state, timings and memory footprint of each model."""
+    info = models.info()
+    if torch.cuda.is_available():
+        info["cuda"] = {
+            "memory_allocated_bytes": torch.cuda.memory_allocated(),
+            "memory_reserved_bytes": torch.cuda.memory_reserved(),
+        }
+    return info
+
+@app.get("/api/metrics")
+async def metrics():
+    """Inference queue and embedding cache metrics."""
+    return {
+        "esm2_batching": esm_batcher.metrics(),
+        "esmfold": structure_executor.metrics(),
+        "embedding_cache": embedding_store.stats() if embedding_store else None,
+    }
 
 @app.post("/api/validate")
 async def validate_sequence(sequence: DNASequence):
     """Validate a DNA sequence."""
     logger.info(f"Validating sequence: {sequence.name or 'unnamed'}")
     
-    # Check for valid DNA characters
-    valid_chars = set("ATGC")
-    invalid_chars = [char for char in sequence.sequence.upper() if char not in valid_chars]
+    # Encode the sequence once and run every check on the encoded form
+    analysis = analyze_sequence(sequence.sequence)
     
-    if invalid_chars:
+    if analysis.invalid_chars:
         return {
             "valid": False,
-            "issues": [f"Invalid DNA characters found: {', '.join(set(invalid_chars))}"],
+            "issues": [f"Invalid DNA characters found: {', '.join(analysis.invalid_chars)}"],
             "warnings": [],
             "suggestions": ["Replace invalid characters with A, T, G, or C"]
         }
     
-    # Find ORFs
-    orfs = find_orfs(sequence.sequence)
-    
     # Check for potential issues
     issues = []
     warnings = []
     suggestions = []
     
     # Check for homopolymers (runs of the same nucleotide)
-    homopolymers = []
-    for base in "ATGC":
-        pattern = base * 6  # Look for runs of 6 or more
-        if pattern in sequence.sequence.upper():
-            homopolymers.append(f"{base}x6+")
-    
-    if homopolymers:
-        warnings.append(f"Homopolymer regions found: {', '.join(homopolymers)}")
+    if analysis.homopolymers:
+        warnings.append(f"Homopolymer regions found: {', '.join(str(run) for run in analysis.homopolymers)}")
         suggestions.append("Consider breaking up homopolymer regions to improve stability")
     
     # Check GC content
-    gc_count = sequence.sequence.upper().count("G") + sequence.sequence.upper().count("C")
-    gc_content = gc_count / len(sequence.sequence) if len(sequence.sequence) > 0 else 0
+    gc_content = analysis.gc_content
     
     if gc_content < 0.3:
         warnings.append(f"Low GC content ({gc_content:.2f})")
@@ -161,19 +229,9 @@ async def validate_sequence(sequence: DNASequence):
         suggestions.append("Consider decreasing GC content for easier handling")
     
     # Check for rare codons if ORFs are found
-    if orfs:
-        # E. coli rare codons
-        rare_codons = ["CTA", "ATA", "CGA", "CGG", "AGG", "AGA", "CCC", "TCG"]
-        rare_codons_found = []
-        
-        for orf in orfs:
-            for i in range(0, len(orf), 3):
-                codon = orf[i:i+3]
-                if codon in rare_codons and codon not in rare_codons_found:
-                    rare_codons_found.append(codon)
-        
-        if rare_codons_found:
-            warnings.append(f"Rare codons found: {', '.join(rare_codons_found)}")
+    if analysis.orfs:
+        if analysis.rare_codons:
+            warnings.append(f"Rare codons found: {', '.join(analysis.rare_codons)}")
             suggestions.append("Consider codon optimization to improve expression")
     else:
         warnings.append("No open reading frames found")
@@ -181,9 +239,9 @@ async def validate_sequence(sequence: DNASequence):
     
     return {
         "valid": True,
-        "sequence_length": len(sequence.sequence),
+        "sequence_length": analysis.length,
         "gc_content": gc_content,
-        "orfs": len(orfs),
+        "orfs": len(analysis.orfs),
         "issues": issues,
         "warnings": warnings,
         "suggestions": suggestions
@@ -207,29 +265,21 @@ async def predict_function(sequence: DNASequence):
         }
     
     # Use the longest ORF for prediction
-    longest_orf = max(orfs, key=len)
-    protein_seq = str(Seq(longest_orf).translate())
+    longest_orf = max(orfs, key=lambda orf: orf.length)
+    protein_seq = str(Seq(orf_sequence(sequence.sequence, longest_orf)).translate(to_stop=True))
     
-    # If the model is not loaded, return simulated results
-    if not model_loaded:
+    # Load ESM-2 on first use; if it cannot be loaded, return simulated results
+    try:
+        await models.acquire("esm2")
+    except ModelUnavailableError:
         return _simulate_prediction(sequence.sequence)
     
-    # Prepare the sequence for ESM-2
-    data = [(f"protein_{hash(protein_seq)}", protein_seq)]
-    batch_converter = alphabet.get_batch_converter()
-    batch_labels, batch_strs, batch_tokens = batch_converter(data)
-    
-    # Move to GPU if available
-    if torch.cuda.is_available():
-        batch_tokens = batch_tokens.cuda()
-    
-    # Get embeddings
-    with torch.no_grad():
-        results = model(batch_tokens, repr_layers=[33], return_contacts=True)
-    token_representations = results["representations"][33]
-    
-    # Use the [CLS] token representation for classification
-    cls_representation = token_representations[0, 0, :].cpu().numpy()
+    # Use the [CLS] token representation for classification; library parts recur, so look it up first
+    cls_representation = embedding_store.get(protein_seq) if embedding_store else None
+    if cls_representation is None:
+        cls_representation = await esm_batcher.run(protein_seq, timeout=PREDICT_TIMEOUT)
+        if embedding_store:
+            embedding_store.put(protein_seq, cls_representation)
     
     # In a real implementation, you would use a trained classifier
     # For now, we'll use a simulated prediction
@@ -240,16 +290,23 @@ async def predict_structure(protein: ProteinSequence):
     """Predict the 3D structure of a protein sequence."""
     logger.info(f"Predicting structure for protein: {protein.name or 'unnamed'}")
     
-    if not model_loaded or esmfold is None:
-        raise HTTPException(status_code=503, detail="Structure prediction model not available")
-    
     # Check if the sequence is too long
     if len(protein.sequence) > 1000:
         raise HTTPException(status_code=400, detail="Protein sequence too long (max 1000 amino acids)")
     
-    # Predict the structure
+    # Load ESMFold on first use
+    try:
+        esmfold = await models.acquire("esmfold")
+    except ModelUnavailableError:
+        raise HTTPException(status_code=503, detail="Structure prediction model not available")
+    
+    # Predict the structure on the inference pool so the event loop stays responsive
+    return await structure_executor.run(_predict_structure, esmfold, protein.sequence, timeout=STRUCTURE_TIMEOUT)
+
+def _predict_structure(esmfold, sequence: str) -> Dict[str, Any]:
+    """Run ESMFold and summarize the predicted structure. Blocking; runs on the inference pool."""
     with torch.no_grad():
-        output = esmfold.infer_pdb(protein.sequence)
+        output = esmfold.infer_pdb(sequence)
     
     # Create a temporary file to save the PDB
     with tempfile.NamedTemporaryFile(suffix=".pdb", delete=False) as tmp:
@@ -271,7 +328,7 @@ async def predict_structure(protein: ProteinSequence):
         "pdb_data": output,
         "residue_count": residue_count,
         "atom_count": atom_count,
-        "sequence_length": len(protein.sequence)
+        "sequence_length": len(sequence)
     }
 
 @app.post("/api/toxicity")
@@ -324,7 +381,7 @@ def _simulate_prediction(dna_sequence: str, embedding=None) -> Dict[str, Any]:
     # Calculate some features from the sequence
     seq = dna_sequence.upper()
     length = len(seq)
-    gc_content = (seq.count("G") + seq.count("C")) / length if length > 0 else 0
+    gc_content = calculate_gc_content(seq)
     
     # Simulate different predictions based on sequence characteristics
     if "ATG" in seq and any(stop in seq for stop in ["TAA", "TAG", "TGA"]):
@@ -1,22 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Union
 import firebase_admin
 from firebase_admin import credentials, auth
 import os
 import json
+import asyncio
+import itertools
 from datetime import datetime, timedelta
+from bioforge_seqkit import (
+    NDJSON_MEDIA_TYPE,
+    InvalidCursorError,
+    QueueFullError,
+    cache_stats,
+    cursor_scope,
+    decode_cursor,
+    encode_cursor,
+)
 
 # Import our modules
-from models.dna_design import DNADesign, DNASequence, DNAPart
+from models.dna_design import DNADesign, DNASequence, DNAPart, DNAPartSummary, DesignEditRequest
 from services.genbank_service import GenBankService
 from services.igem_service import IGEMService
 from services.ai_service import AIService
+from services.ai_client import AIServiceError
 from services.blockchain_service import BlockchainService
 from services.simulation_service import SimulationService
 from services.safety_service import SafetyService
+from services.design_edit_service import DesignEditService
 
 # Initialize Firebase Admin SDK
 cred = credentials.Certificate(os.environ.get("FIREBASE_SERVICE_ACCOUNT_PATH"))
@@ -45,6 +61,45 @@ ai_service = AIService()
 blockchain_service = BlockchainService()
 simulation_service = SimulationService()
 safety_service = SafetyService()
+design_edit_service = DesignEditService(ai_service, safety_service, simulation_service)
+
+# Part sources in listing order
+PART_SOURCES = {"genbank": genbank_service, "igem": igem_service}
+
+# Listing projections: full parts, or summaries with the sequence length instead of the sequence
+PART_FIELDS = ("full", "summary")
+
+# OpenAPI description of part listings beyond their JSON schema: the paging header and the NDJSON format
+PART_LIST_RESPONSES = {
+    200: {
+        "description": "A page of parts (summaries with fields=summary)",
+        "headers": {
+            "X-Next-Cursor": {"description": "Cursor of the next page, while more parts follow", "schema": {"type": "string"}},
+        },
+        "content": {
+            NDJSON_MEDIA_TYPE: {
+                "schema": {"type": "string", "description": 'With format=ndjson: one part per line, then {"next_cursor": ...} if more follow'},
+            },
+        },
+    },
+}
+
+# Inference backpressure: a full queue is a 429, a slow model a 504
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    return JSONResponse(status_code=429, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.exception_handler(asyncio.TimeoutError)
+async def inference_timeout_handler(request: Request, exc: asyncio.TimeoutError):
+    return JSONResponse(status_code=504, content={"detail": "Inference timed out"})
+
+@app.exception_handler(AIServiceError)
+async def ai_service_error_handler(request: Request, exc: AIServiceError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
+@app.on_event("shutdown")
+async def close_ai_service():
+    await ai_service.close()
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -81,27 +136,101 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
         )
 
 # DNA Parts endpoints
-@app.get("/api/parts", response_model=List[DNAPart])
-async def get_dna_parts(category: Optional[str] = None, query: Optional[str] = None):
+@app.get("/api/parts", response_model=Union[List[DNAPart], List[DNAPartSummary]], responses=PART_LIST_RESPONSES)
+async def get_dna_parts(
+    category: Optional[str] = None,
+    query: Optional[str] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    fields: str = "full",
+    format: str = "json",
+):
     """
     Get DNA parts from the registry.
     Optionally filter by category or search query.
+    Parts are the GenBank results, then the iGEM Registry results, `limit`
+    at a time; while more follow, the X-Next-Cursor header holds the cursor
+    of the next page, and a source is only queried once the pages reach it.
+    fields=summary leaves out sequences (their length is given instead), and
+    format=ndjson streams up to `limit` parts one JSON object per line,
+    ending with a {"next_cursor": ...} line if more follow.
     """
-    parts = []
-    
-    # Get parts from GenBank
-    genbank_parts = genbank_service.get_parts(category, query)
-    parts.extend(genbank_parts)
+    if fields not in PART_FIELDS:
+        raise HTTPException(status_code=400, detail=f"fields must be one of: {', '.join(PART_FIELDS)}")
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
     
-    # Get parts from iGEM Registry
-    igem_parts  query)
-    parts.extend(genbank_parts)
+    scope = cursor_scope(category, query)
+    try:
+        position = decode_cursor(cursor, scope)
+        if position is not None and not _is_listing_position(position):
+            raise InvalidCursorError("Malformed cursor")
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    parts = _merged_parts(category, query, position)
+    sequences = fields == "full"
     
-    # Get parts from iGEM Registry
-    igem_parts = igem_service.get_parts(category, query)
-    parts.extend(igem_parts)
+    if format == "ndjson":
+        return StreamingResponse(_stream_parts(parts, limit, sequences, scope), media_type=NDJSON_MEDIA_TYPE)
     
-    return parts
+    page = await run_in_threadpool(list, itertools.islice(parts, limit + 1))
+    headers = {"X-Next-Cursor": encode_cursor(page[limit - 1][1], scope)} if len(page) > limit else None
+    return JSONResponse(content=[_part_fields(part, sequences) for part, _ in page[:limit]], headers=headers)
+
+def _is_listing_position(position: Dict[str, Any]) -> bool:
+    """Check that a decoded cursor holds a position _merged_parts can resume from."""
+    offset = position.get("offset")
+    return (
+        set(position) == {"source", "offset"}
+        and isinstance(position["source"], str)
+        and position["source"] in PART_SOURCES
+        and isinstance(offset, int)
+        and not isinstance(offset, bool)
+        and offset >= 0
+    )
+
+def _merged_parts(
+    category: Optional[str], query: Optional[str], position: Optional[Dict[str, Any]]
+) -> Iterator[Tuple[DNAPart, Dict[str, Any]]]:
+    """
+    Yield the parts of every source in order, from a position on, each with
+    the position after it ({"source": name, "offset": parts of that source
+    listed}). Each source is only queried when the listing reaches it.
+    """
+    names = list(PART_SOURCES)
+    start = names.index(position["source"]) if position else 0
+    offset = position["offset"] if position else 0
+    for name in names[start:]:
+        source_parts = PART_SOURCES[name].get_parts(category, query)
+        for index in range(offset, len(source_parts)):
+            yield source_parts[index], {"source": name, "offset": index + 1}
+        offset = 0
+
+def _stream_parts(
+    parts: Iterator[Tuple[DNAPart, Dict[str, Any]]], limit: int, sequences: bool, scope: str
+) -> Iterator[str]:
+    """
+    Yield up to `limit` parts as NDJSON lines, then the next cursor if more
+    follow. As a sync generator it runs in the threadpool, so the source
+    queries do not block the event loop.
+    """
+    after = None
+    for count, (part, position) in enumerate(parts):
+        if count == limit:
+            yield json.dumps({"next_cursor": encode_cursor(after, scope)}) + "\n"
+            return
+        yield json.dumps(_part_fields(part, sequences)) + "\n"
+        after = position
+
+def _part_fields(part: DNAPart, sequences: bool) -> Dict[str, Any]:
+    """A part as JSON, with the length of its sequence instead of the sequence if `sequences` is false."""
+    data = jsonable_encoder(part)
+    if not sequences:
+        sequence = data.pop("sequence")
+        data["length"] = len(sequence)
+    return data
 
 # DNA Design endpoints
 @app.post("/api/designs", response_model=DNADesign)
@@ -175,16 +304,37 @@ async def predict_function(sequence: DNASequence):
     """
     Predict the function of a DNA sequence using the AI service.
     """
-    prediction_result = ai_service.predict_function(sequence.sequence)
+    prediction_result = await ai_service.predict_function(sequence.sequence)
     return prediction_result
 
+@app.get("/api/ai/metrics", response_model=Dict[str, Any])
+async def get_ai_metrics():
+    """
+    Get the inference queue metrics (queue depth, batch sizes) of the AI service.
+    """
+    return await ai_service.metrics()
+
+@app.get("/api/ai/models", response_model=Dict[str, Any])
+async def get_ai_models():
+    """
+    Get the load state and memory footprint of the AI service models.
+    """
+    return await ai_service.model_info()
+
+@app.get("/api/cache/stats", response_model=Dict[str, Any])
+async def get_cache_stats():
+    """
+    Get the hit, miss and eviction counts of the gateway's result caches.
+    """
+    return cache_stats()
+
 # Simulation endpoints
 @app.post("/api/simulate", response_model=Dict[str, Any])
-async def run_simulation(design: DNADesign):
+async def run_simulation(design: DNADesign, seed: Optional[int] = Query(None, ge=0)):
     """
-    Run a simulation for a DNA design.
+    Run a simulation for a DNA design. The same design and seed give the same result.
     """
-    simulation_result = simulation_service.run_simulation(design)
+    simulation_result = simulation_service.run_simulation(design, seed)
     return simulation_result
 
 # Safety endpoints
@@ -196,6 +346,31 @@ async def check_safety(design: DNADesign):
     safety_result = safety_service.check_safety(design)
     return safety_result
 
+# Incremental analysis endpoints
+@app.post("/api/designs/analyze", response_model=Dict[str, Any])
+async def analyze_design(design: DNADesign):
+    """
+    Validate, safety-check and simulate a design.
+    The returned fingerprint is the base for /api/designs/analyze/edits.
+    """
+    return design_edit_service.analyze(design)
+
+@app.post("/api/designs/analyze/edits", response_model=Dict[str, Any])
+async def analyze_design_edits(request: DesignEditRequest):
+    """
+    Apply edits (insert, delete, replace, reorder) to an analyzed design and
+    return only the analysis results that changed.
+    """
+    try:
+        return design_edit_service.apply_edits(request.base, request.edits)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Base design not found or expired; submit the full design to /api/designs/analyze",
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 # Blockchain endpoints
 @app.post("/api/blockchain/mint", response_model=Dict[str, Any])
 async def mint_token(design: DNADesign, current_user = Depends(get_current_user)):
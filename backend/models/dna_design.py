@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from enum import Enum
+from bioforge_seqkit import design_fingerprint
 
 class PartType(str, Enum):
     PROMOTER = "promoter"
@@ -20,6 +21,16 @@ class DNAPart(BaseModel):
     source: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
+class DNAPartSummary(BaseModel):
+    """A part as listed with fields=summary: the length of its sequence instead of the sequence."""
+    id: str
+    name: str
+    type: PartType
+    length: int
+    description: Optional[str] = None
+    source: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
 class DNASequence(BaseModel):
     sequence: str
     name: Optional[str] = None
@@ -51,3 +62,27 @@ class DNADesign(BaseModel):
         Get the total length of the DNA sequence.
         """
         return sum([len(part.sequence) for part in self.parts])
+    
+    @property
+    def fingerprint(self) -> str:
+        """
+        Get the content fingerprint of the design (part types, names and sequences, in order).
+        Unlike id and updated_at, it is set for unsaved designs and changes with every edit.
+        """
+        return design_fingerprint((part.type.value, part.name, part.sequence) for part in self.parts)
+
+class EditOperation(str, Enum):
+    INSERT = "insert"
+    DELETE = "delete"
+    REPLACE = "replace"
+    REORDER = "reorder"
+
+class DesignEdit(BaseModel):
+    op: EditOperation
+    index: int
+    part: Optional[DNAPart] = None  # For insert and replace
+    to_index: Optional[int] = None  # For reorder
+
+class DesignEditRequest(BaseModel):
+    base: str  # Fingerprint of a design analyzed before
+    edits: List[DesignEdit]
@@ -0,0 +1,105 @@
+from typing import Any, Dict, Optional
+import asyncio
+import os
+import httpx
+
+# Upstream statuses worth retrying: the AI service is overloaded or restarting
+RETRY_STATUSES = {429, 502, 503}
+
+class AIServiceError(Exception):
+    """
+    The AI service could not answer. `status_code` is the status to return to the caller.
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class AIServiceClient:
+    """
+    Pooled async HTTP client for the standalone AI service.
+    Connections are kept alive and shared by all requests of a gateway worker.
+    Connection failures and overload responses (429/502/503) are retried with
+    exponential backoff; read timeouts are not, since the model may still be busy
+    with the request.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.2,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+    ):
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    @classmethod
+    def from_env(cls) -> "AIServiceClient":
+        return cls(
+            os.environ.get("AI_SERVICE_URL", "http://ai-service:8001"),
+            timeout=float(os.environ.get("AI_SERVICE_TIMEOUT_S", "30")),
+            connect_timeout=float(os.environ.get("AI_SERVICE_CONNECT_TIMEOUT_S", "5")),
+            retries=int(os.environ.get("AI_SERVICE_RETRIES", "2")),
+            max_connections=int(os.environ.get("AI_SERVICE_MAX_CONNECTIONS", "100")),
+        )
+
+    async def request(self, method: str, path: str, json: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Send a request and return the decoded JSON body.
+        Raises AIServiceError once retries are exhausted.
+        """
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                response = await self.client.request(method, path, json=json)
+            except (httpx.ReadTimeout, httpx.WriteTimeout, httpx.PoolTimeout):
+                raise AIServiceError(504, f"AI service timed out on {path}")
+            except httpx.TransportError as e:
+                if not last_attempt:
+                    await self._sleep(attempt)
+                    continue
+                raise AIServiceError(502, f"AI service unreachable: {e}")
+
+            if response.status_code in RETRY_STATUSES and not last_attempt:
+                await self._sleep(attempt, response.headers.get("Retry-After"))
+                continue
+            if response.status_code >= 400:
+                try:
+                    body = response.json()
+                except ValueError:
+                    body = None
+                detail = body.get("detail", response.text) if isinstance(body, dict) else response.text
+                raise AIServiceError(response.status_code, f"AI service error: {detail}")
+            return response.json()
+
+    async def predict(self, dna_sequence: str) -> Dict[str, Any]:
+        return await self.request("POST", "/api/predict", json={"sequence": dna_sequence})
+
+    async def metrics(self) -> Dict[str, Any]:
+        return await self.request("GET", "/api/metrics")
+
+    async def models(self) -> Dict[str, Any]:
+        return await self.request("GET", "/api/models")
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def _sleep(self, attempt: int, retry_after: Optional[str] = None):
+        delay = self.backoff * 2 ** attempt
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
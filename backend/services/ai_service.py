@@ -1,36 +1,105 @@
-from typing import Dict, Any
-import torch
-import esm
+from typing import Dict, Any, List, Optional
 import numpy as np
 from Bio.Seq import Seq
 from Bio.Data import CodonTable
 import os
-import time
+from bioforge_seqkit import EmbeddingStore, MicroBatcher, ModelRegistry, ModelUnavailableError, analyze_sequence, create_cache, find_orfs, orf_sequence, sequence_fingerprint
+from bioforge_seqkit import gc_content as calculate_gc_content
+from bioforge_seqkit.registry import READY
+from services.ai_client import AIServiceClient
 
 class AIService:
-    def __init__(self):
-        # Load ESM-2 model
-        self.model_loaded = False
-        self.cache = {}  # Simple in-memory cache
-        self.cache_expiry = 3600  # Cache expiry in seconds (1 hour)
+    def __init__(self, mode: Optional[str] = None):
+        """
+        In "remote" mode (the default when AI_SERVICE_URL is set), predictions are
+        proxied to the standalone AI service and PyTorch is never imported.
+        In "local" mode, ESM-2 runs in this process.
+        """
+        self.cache = create_cache("ai", ttl=3600)
         
-        # Try to load the model
-        try:
-            # Load the ESM-2 model
-            self.model, self.alphabet = esm.pretrained.esm2_t33_650M_UR50D()
-            self.model.eval()  # Set the model to evaluation mode
-            
-            # Check if CUDA is available
-            if torch.cuda.is_available():
-                self.model = self.model.cuda()
-                print("ESM-2 model loaded on GPU")
-            else:
-                print("ESM-2 model loaded on CPU")
-            
-            self.model_loaded = True
-        except Exception as e:
-            print(f"Error loading ESM-2 model: {e}")
-            print("AI service will run in simulation mode")
+        self.mode = mode or os.environ.get("AI_MODE") or ("remote" if os.environ.get("AI_SERVICE_URL") else "local")
+        self.client = None
+        self.models = None
+        self.batcher = None
+        if self.mode == "remote":
+            self.client = AIServiceClient.from_env()
+            return
+        
+        import torch
+        
+        # Limit PyTorch intra-op threads so inference does not oversubscribe the CPU
+        if os.environ.get("TORCH_NUM_THREADS"):
+            torch.set_num_threads(int(os.environ["TORCH_NUM_THREADS"]))
+        
+        # ESM-2 loads on first prediction, or in the background when MODEL_PRELOAD lists it,
+        # so the gateway starts serving validation and design traffic immediately
+        self.models = ModelRegistry()
+        self.models.register("esm2", self._load_esm2)
+        self.models.load_in_background(
+            name.strip() for name in os.environ.get("MODEL_PRELOAD", "").split(",") if name.strip()
+        )
+        
+        # Concurrent predictions share ESM-2 forward passes through a micro-batching queue
+        self.batcher = MicroBatcher(
+            self._embed_proteins,
+            max_wait_ms=float(os.environ.get("ESM_BATCH_MAX_WAIT_MS", "10")),
+            max_batch_tokens=int(os.environ.get("ESM_BATCH_MAX_TOKENS", "8192")),
+            max_batch_size=int(os.environ.get("ESM_BATCH_MAX_SIZE", "32")),
+            max_queue=int(os.environ.get("ESM_BATCH_MAX_QUEUE", "256")),
+            name="esm2",
+        )
+        self.predict_timeout = float(os.environ.get("PREDICT_TIMEOUT_S", "30"))
+        
+        # Embeddings persist on disk, keyed by protein hash and model version, shared by all workers
+        cache_dir = os.environ.get("EMBEDDING_CACHE_DIR")
+        self.embeddings = EmbeddingStore(cache_dir, "esm2_t33_650M_UR50D-layer33-cls") if cache_dir else None
+    
+    @property
+    def model_loaded(self) -> bool:
+        return self.models is not None and self.models.status("esm2") == READY
+    
+    async def metrics(self) -> Dict[str, Any]:
+        """
+        Get the inference queue metrics, from the AI service in remote mode.
+        """
+        if self.client:
+            return await self.client.metrics()
+        return {
+            "esm2_batching": self.batcher.metrics(),
+            "embedding_cache": self.embeddings.stats() if self.embeddings else None,
+        }
+    
+    async def model_info(self) -> Dict[str, Any]:
+        """
+        Get the load state and memory footprint of the models, from the AI service in remote mode.
+        """
+        if self.client:
+            return await self.client.models()
+        return self.models.info()
+    
+    async def close(self):
+        if self.client:
+            await self.client.close()
+        else:
+            self.batcher.stop()
+    
+    def _load_esm2(self):
+        """
+        Load the ESM-2 model.
+        """
+        import torch
+        import esm
+        
+        model, alphabet = esm.pretrained.esm2_t33_650M_UR50D()
+        model.eval()  # Set the model to evaluation mode
+        
+        # Check if CUDA is available
+        if torch.cuda.is_available():
+            model = model.cuda()
+            print("ESM-2 model loaded on GPU")
+        else:
+            print("ESM-2 model loaded on CPU")
+        return model, alphabet
     
     def validate_sequence(self, dna_sequence: str) -> Dict[str, Any]:
         """
@@ -40,60 +109,49 @@ class AIService:
         - Open reading frames
         - Potential issues (e.g., rare codons, homopolymers)
         """
-        # Check cache
-        cache_key = f"validate_{dna_sequence}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
+        # Check cache (keyed on a fixed-size fingerprint rather than the sequence itself)
+        cache_key = f"validate_{sequence_fingerprint(dna_sequence)}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # Check for valid DNA characters
-        valid_chars = set("ATGC")
-        invalid_chars = [char for char in dna_sequence.upper() if char not in valid_chars]
+        # Encode the sequence once and run every check on the encoded form
+        analysis = analyze_sequence(dna_sequence)
         
-        if invalid_chars:
+        if analysis.invalid_chars:
             result = {
                 "valid": False,
-                "issues": [f"Invalid DNA characters found: {', '.join(set(invalid_chars))}"],
+                "issues": [f"Invalid DNA characters found: {', '.join(analysis.invalid_chars)}"],
                 "warnings": [],
                 "suggestions": ["Replace invalid characters with A, T, G, or C"]
             }
             
             # Cache the result
-            self.cache[cache_key] = {
-                "data": result,
-                "timestamp": time.time()
-            }
+            self.cache.set(cache_key, result)
             
             return result
         
-        # Check for open reading frames
-        seq = Seq(dna_sequence.upper())
-        orfs = self._find_orfs(seq)
-        
         # Check for potential issues
         issues = []
         warnings = []
         suggestions = []
         
         # Check for homopolymers (runs of the same nucleotide)
-        homopolymers = self._find_homopolymers(dna_sequence.upper())
-        if homopolymers:
-            warnings.append(f"Homopolymer regions found: {', '.join(homopolymers)}")
+        if analysis.homopolymers:
+            warnings.append(f"Homopolymer regions found: {', '.join(str(run) for run in analysis.homopolymers)}")
             suggestions.append("Consider breaking up homopolymer regions to improve stability")
         
         # Check for rare codons if ORFs are found
-        if orfs:
-            rare_codons = self._check_rare_codons(seq)
-            if rare_codons:
-                warnings.append(f"Rare codons found: {', '.join(rare_codons)}")
+        if analysis.orfs:
+            if analysis.rare_codons:
+                warnings.append(f"Rare codons found: {', '.join(analysis.rare_codons)}")
                 suggestions.append("Consider codon optimization to improve expression")
         else:
             warnings.append("No open reading frames found")
             suggestions.append("Check if this is intentional or if there's a frameshift")
         
         # Check GC content
-        gc_content = self._calculate_gc_content(dna_sequence.upper())
+        gc_content = analysis.gc_content
         if gc_content < 0.3:
             warnings.append(f"Low GC content ({gc_content:.2f})")
             suggestions.append("Consider increasing GC content for stability")
@@ -103,48 +161,52 @@ class AIService:
         
         result = {
             "valid": True,
-            "sequence_length": len(dna_sequence),
+            "sequence_length": analysis.length,
             "gc_content": gc_content,
-            "orfs": len(orfs),
+            "orfs": len(analysis.orfs),
             "issues": issues,
             "warnings": warnings,
             "suggestions": suggestions
         }
         
         # Cache the result
-        self.cache[cache_key] = {
-            "data": result,
-            "timestamp": time.time()
-        }
+        self.cache.set(cache_key, result)
         
         return result
     
-    def predict_function(self, dna_sequence: str) -> Dict[str, Any]:
+    async def predict_function(self, dna_sequence: str) -> Dict[str, Any]:
         """
         Predict the function of a DNA sequence using the AI service.
         """
         # Check cache
-        cache_key = f"predict_{dna_sequence}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
+        cache_key = f"predict_{sequence_fingerprint(dna_sequence)}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        # If the model is not loaded, return simulated results
-        if not self.model_loaded:
+        # In remote mode the AI service runs the model
+        if self.client:
+            result = await self.client.predict(dna_sequence)
+            
+            # Cache the result
+            self.cache.set(cache_key, result)
+            
+            return result
+        
+        # Load the model on first use; if it cannot be loaded, return simulated results
+        try:
+            await self.models.acquire("esm2")
+        except ModelUnavailableError as e:
+            print(f"{e}. AI service will run in simulation mode")
             result = self._simulate_prediction(dna_sequence)
             
             # Cache the result
-            self.cache[cache_key] = {
-                "data": result,
-                "timestamp": time.time()
-            }
+            self.cache.set(cache_key, result)
             
             return result
         
         # Convert DNA to protein sequence
-        seq = Seq(dna_sequence.upper())
-        orfs = self._find_orfs(seq)
+        orfs = find_orfs(dna_sequence)
         
         if not orfs:
             result = {
@@ -156,128 +218,52 @@ class AIService:
             }
             
             # Cache the result
-            self.cache[cache_key] = {
-                "data": result,
-                "timestamp": time.time()
-            }
+            self.cache.set(cache_key, result)
             
             return result
         
         # Use the longest ORF for prediction
-        longest_orf = max(orfs, key=lambda x: len(x))
-        protein_seq = longest_orf.translate()
-        
-        # Prepare the sequence for ESM-2
-        data = [(f"protein_{hash(str(protein_seq))}", str(protein_seq))]
-        batch_converter = self.alphabet.get_batch_converter()
-        batch_labels, batch_strs, batch_tokens = batch_converter(data)
-        
-        # Move to GPU if available
-        if torch.cuda.is_available():
-            batch_tokens = batch_tokens.cuda()
+        longest_orf = max(orfs, key=lambda orf: orf.length)
+        protein_seq = Seq(orf_sequence(dna_sequence, longest_orf)).translate(to_stop=True)
         
-        # Get embeddings
-        with torch.no_grad():
-            results = self.model(batch_tokens, repr_layers=[33], return_contacts=True)
-        token_representations = results["representations"][33]
-        
-        # Use the [CLS] token representation for classification
-        cls_representation = token_representations[0, 0, :].cpu().numpy()
+        # Use the [CLS] token representation for classification; library parts recur, so look it up first
+        protein_seq = str(protein_seq)
+        cls_representation = self.embeddings.get(protein_seq) if self.embeddings else None
+        if cls_representation is None:
+            cls_representation = await self.batcher.run(protein_seq, timeout=self.predict_timeout)
+            if self.embeddings:
+                self.embeddings.put(protein_seq, cls_representation)
         
         # Simulate classification based on the embedding
         # In a real implementation, you would use a trained classifier
         result = self._simulate_prediction(dna_sequence, cls_representation)
         
         # Cache the result
-        self.cache[cache_key] = {
-            "data": result,
-            "timestamp": time.time()
-        }
+        self.cache.set(cache_key, result)
         
         return result
     
-    def _find_orfs(self, seq):
+    def _embed_proteins(self, proteins: List[str]) -> List[np.ndarray]:
         """
-        Find all open reading frames in a DNA sequence.
+        Run ESM-2 on a batch of protein sequences and return their [CLS] embeddings.
+        Called from the batcher's inference thread.
         """
-        orfs = []
+        import torch
         
-        # Check all reading frames
-        for frame in range(3):
-            # Get the sequence in this reading frame
-            frame_seq = seq[frame:]
-            
-            # Adjust length to be divisible by 3
-            frame_seq = frame_seq[:len(frame_seq) - (len(frame_seq) % 3)]
-            
-            # Find start codons
-            for i in range(0, len(frame_seq), 3):
-                if frame_seq[i:i+3] == "ATG":
-                    # Found a start codon, look for a stop codon
-                    for j in range(i, len(frame_seq), 3):
-                        if frame_seq[j:j+3] in ["TAA", "TAG", "TGA"]:
-                            # Found a stop codon, extract the ORF
-                            orf = frame_seq[i:j+3]
-                            if len(orf) >= 30:  # Minimum length for a meaningful ORF
-                                orfs.append(orf)
-                            break
-        
-        return orfs
-    
-    def _find_homopolymers(self, seq, min_length=6):
-        """
-        Find homopolymer regions in a DNA sequence.
-        """
-        homopolymers = []
-        current_base = None
-        current_length = 0
+        model, alphabet = self.models.get("esm2")
+        batch_converter = alphabet.get_batch_converter()
+        batch_labels, batch_strs, batch_tokens = batch_converter(
+            [(f"protein_{index}", protein) for index, protein in enumerate(proteins)]
+        )
         
-        for base in seq:
-            if base == current_base:
-                current_length += 1
-            else:
-                if current_length >= min_length:
-                    homopolymers.append(f"{current_base}x{current_length}")
-                current_base = base
-                current_length = 1
-        
-        # Check the last homopolymer
-        if current_length >= min_length:
-            homopolymers.append(f"{current_base}x{current_length}")
-        
-        return homopolymers
-    
-    def _check_rare_codons(self, seq):
-        """
-        Check for rare codons in a DNA sequence.
-        """
-        # E. coli rare codons
-        rare_codons_list = ["CTA", "ATA", "CGA", "CGG", "AGG", "AGA", "CCC", "TCG"]
-        
-        rare_codons_found = []
-        
-        # Check all reading frames
-        for frame in range(3):
-            # Get the sequence in this reading frame
-            frame_seq = seq[frame:]
-            
-            # Adjust length to be divisible by 3
-            frame_seq = frame_seq[:len(frame_seq) - (len(frame_seq) % 3)]
-            
-            # Check each codon
-            for i in range(0, len(frame_seq), 3):
-                codon = str(frame_seq[i:i+3])
-                if codon in rare_codons_list and codon not in rare_codons_found:
-                    rare_codons_found.append(codon)
+        # Move to GPU if available
+        if torch.cuda.is_available():
+            batch_tokens = batch_tokens.cuda()
         
-        return rare_codons_found
-    
-    def _calculate_gc_content(self, seq):
-        """
-        Calculate the GC content of a DNA sequence.
-        """
-        gc_count = seq.count("G") + seq.count("C")
-        return gc_count / len(seq) if len(seq) > 0 else 0
+        # Padding is masked out, so each embedding matches a batch-of-one run
+        with torch.no_grad():
+            results = model(batch_tokens, repr_layers=[33])
+        return list(results["representations"][33][:, 0, :].cpu().numpy())
     
     def _simulate_prediction(self, dna_sequence, embedding=None):
         """
@@ -286,7 +272,7 @@ class AIService:
         # Calculate some features from the sequence
         seq = dna_sequence.upper()
         length = len(seq)
-        gc_content = self._calculate_gc_content(seq)
+        gc_content = calculate_gc_content(seq)
         
         # Simulate different predictions based on sequence characteristics
         if "ATG" in seq and any(stop in seq for stop in ["TAA", "TAG", "TGA"]):
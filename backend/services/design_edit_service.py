@@ -0,0 +1,114 @@
+from typing import Any, Dict, List
+from bioforge_seqkit import create_cache, sequence_fingerprint
+from models.dna_design import DNADesign, DNAPart, DesignEdit, EditOperation
+
+def apply_edits(parts: List[DNAPart], edits: List[DesignEdit]) -> List[DNAPart]:
+    """
+    Apply edits in order to a copy of a part list.
+    Raises ValueError for an out-of-range index or a missing part.
+    """
+    parts = list(parts)
+    for position, edit in enumerate(edits):
+        upper = len(parts) if edit.op == EditOperation.INSERT else len(parts) - 1
+        if not 0 <= edit.index <= upper:
+            raise ValueError(f"Edit {position}: index {edit.index} is out of range")
+        if edit.op in (EditOperation.INSERT, EditOperation.REPLACE) and edit.part is None:
+            raise ValueError(f"Edit {position}: {edit.op.value} needs a part")
+
+        if edit.op == EditOperation.INSERT:
+            parts.insert(edit.index, edit.part)
+        elif edit.op == EditOperation.DELETE:
+            del parts[edit.index]
+        elif edit.op == EditOperation.REPLACE:
+            parts[edit.index] = edit.part
+        else:
+            if edit.to_index is None or not 0 <= edit.to_index < len(parts):
+                raise ValueError(f"Edit {position}: to_index {edit.to_index} is out of range")
+            parts.insert(edit.to_index, parts.pop(edit.index))
+    return parts
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the top-level keys of `new` that differ from `old`; keys that are gone map to None.
+    """
+    delta = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    delta.update({key: None for key in old if key not in new})
+    return delta
+
+class DesignEditService:
+    """
+    Incremental re-analysis for interactive editing.
+    Every analyzed design is kept as a snapshot (parts and results) under its
+    fingerprint. An edit request names a base snapshot and a list of edits;
+    only the analyses the edits can affect are recomputed, and only the
+    result fields that changed are returned:
+
+    - validation: when the concatenated sequence changed
+    - safety: when any part sequence or name changed (scanned per part and
+      junction, so only the edited parts and their junctions are rescanned)
+    - simulation: when the order of part types changed
+    """
+
+    def __init__(self, ai_service, safety_service, simulation_service):
+        self.ai_service = ai_service
+        self.safety_service = safety_service
+        self.simulation_service = simulation_service
+        self.snapshots = create_cache("design_snapshots", ttl=3600)
+
+    def analyze(self, design: DNADesign) -> Dict[str, Any]:
+        """
+        Run every analysis on a full design and keep it as a base for edits.
+        """
+        fingerprint = design.fingerprint
+        snapshot = self.snapshots.get(fingerprint)
+        if snapshot is None:
+            snapshot = self._snapshot(design, {
+                "validation": self.ai_service.validate_sequence(design.full_sequence),
+                "safety": self.safety_service.check_safety(design),
+                "simulation": self.simulation_service.run_simulation(design),
+            })
+            self.snapshots.set(fingerprint, snapshot)
+        return {"fingerprint": fingerprint, "analysis": snapshot["analysis"]}
+
+    def apply_edits(self, base: str, edits: List[DesignEdit]) -> Dict[str, Any]:
+        """
+        Apply edits to a base snapshot and return the analysis delta.
+        Raises KeyError if the base is unknown or expired (the client then
+        resubmits the full design) and ValueError for invalid edits.
+        """
+        snapshot = self.snapshots.get(base)
+        if snapshot is None:
+            raise KeyError(base)
+
+        design = snapshot["design"].copy(update={"parts": apply_edits(snapshot["design"].parts, edits)})
+        fingerprint = design.fingerprint
+        cached = self.snapshots.get(fingerprint)
+        analysis = dict(cached["analysis"] if cached is not None else snapshot["analysis"])
+        recomputed = []
+
+        if cached is None:
+            if sequence_fingerprint(design.full_sequence) != snapshot["sequence"]:
+                analysis["validation"] = self.ai_service.validate_sequence(design.full_sequence)
+                recomputed.append("validation")
+            if fingerprint != base:
+                analysis["safety"] = self.safety_service.check_safety(design)
+                recomputed.append("safety")
+            if [part.type for part in design.parts] != snapshot["types"]:
+                analysis["simulation"] = self.simulation_service.run_simulation(design)
+                recomputed.append("simulation")
+            self.snapshots.set(fingerprint, self._snapshot(design, analysis))
+
+        delta = {}
+        for name, result in analysis.items():
+            changed = _diff(snapshot["analysis"][name], result)
+            if changed:
+                delta[name] = changed
+        return {"base": base, "fingerprint": fingerprint, "recomputed": recomputed, "delta": delta}
+
+    def _snapshot(self, design: DNADesign, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "design": design,
+            "sequence": sequence_fingerprint(design.full_sequence),
+            "types": [part.type for part in design.parts],
+            "analysis": analysis,
+        }
@@ -2,9 +2,9 @@ from typing import List, Optional
 from models.dna_design import DNAPart, PartType
 import requests
 import xml.etree.ElementTree as ET
-import time
 import os
 from Bio import Entrez, SeqIO
+from bioforge_seqkit import create_cache
 
 # Set email for Entrez
 Entrez.email = os.environ.get("ENTREZ_EMAIL", "bioforge@example.com")
@@ -12,8 +12,7 @@ Entrez.email = os.environ.get("ENTREZ_EMAIL", "bioforge@example.com")
 class GenBankService:
     def __init__(self):
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
-        self.cache = {}  # Simple in-memory cache
-        self.cache_expiry = 3600  # Cache expiry in seconds (1 hour)
+        self.cache = create_cache("genbank", ttl=3600)
     
     def get_parts(self, category: Optional[str] = None, query: Optional[str] = None) -> List[DNAPart]:
         """
@@ -46,10 +45,9 @@ class GenBankService:
         
         # Check cache
         cache_key = f"genbank_{search_query}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Search GenBank
         try:
@@ -65,12 +63,10 @@ class GenBankService:
             
             # Fetch the sequences
             handle = Entrez.efetch(db="nucleotide", id=id_list, rettype="gb", retmode="text")
-            records = list(SeqIO.parse(handle, "genbank"))
-            handle.close()
             
-            # Convert to DNAPart objects
+            # Convert to DNAPart objects as the records are parsed, without keeping the SeqRecords
             parts = []
-            for record in records:
+            for record in SeqIO.parse(handle, "genbank"):
                 part_type = self._determine_part_type(record)
                 
                 part = DNAPart(
@@ -88,12 +84,10 @@ class GenBankService:
                     }
                 )
                 parts.append(part)
+            handle.close()
             
             # Cache the results
-            self.cache[cache_key] = {
-                "data": parts,
-                "timestamp": time.time()
-            }
+            self.cache.set(cache_key, parts)
             
             return parts
         
@@ -2,14 +2,13 @@ from typing import List, Optional
 from models.dna_design import DNAPart, PartType
 import requests
 import xml.etree.ElementTree as ET
-import time
 import os
+from bioforge_seqkit import create_cache
 
 class IGEMService:
     def __init__(self):
         self.base_url = "http://parts.igem.org/partsdb/api/"
-        self.cache = {}  # Simple in-memory cache
-        self.cache_expiry = 3600  # Cache expiry in seconds (1 hour)
+        self.cache = create_cache("igem", ttl=3600)
     
     def get_parts(self, category: Optional[str] = None, query: Optional[str] = None) -> List[DNAPart]:
         """
@@ -36,10 +35,9 @@ class IGEMService:
         
         # Check cache
         cache_key = f"igem_{str(search_params)}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Search iGEM Registry
         try:
@@ -79,10 +77,7 @@ class IGEMService:
                 parts.append(part)
             
             # Cache the results
-            self.cache[cache_key] = {
-                "data": parts,
-                "timestamp": time.time()
-            }
+            self.cache.set(cache_key, parts)
             
             return parts
         
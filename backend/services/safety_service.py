@@ -1,40 +1,33 @@
 from typing import Dict, Any
-import time
-import re
+import os
+from bioforge_seqkit import DesignScanner, SignatureDatabase, create_cache
 from models.dna_design import DNADesign, PartType
 
 class SafetyService:
     def __init__(self):
-        self.cache = {}  # Simple in-memory cache
-        self.cache_expiry = 3600  # Cache expiry in seconds (1 hour)
-        
-        # Load dangerous sequence patterns
-        # In a real implementation, these would be loaded from a database or file
-        self.dangerous_patterns = [
-            # Toxin genes
-            "ATGCCGGTGATGCGGTGCG",  # Example pattern for a toxin gene
-            "ATGGCGCAACTGCAACGCG",  # Example pattern for another toxin gene
-            
-            # Antibiotic resistance genes
-            "ATGGCGACCGAACGCGCGG",  # Example pattern for an antibiotic resistance gene
-            
-            # Virulence factors
-            "ATGCGCGTGCAACTGCGCG",  # Example pattern for a virulence factor
-        ]
+        self.cache = create_cache("safety", ttl=3600)
+        
+        # Load the hazard signature database from the compiled index
+        # (memory-mapped and hot-reloaded; falls back to the bundled example signatures)
+        self.signatures = SignatureDatabase(os.environ.get("SIGNATURE_INDEX_PATH"))
+        
+        # Parts recur across designs: screen each part once and rescan only the junctions between parts
+        self.scanner = DesignScanner(create_cache("safety_parts", ttl=3600))
     
     def check_safety(self, design: DNADesign) -> Dict[str, Any]:
         """
         Check the safety of a DNA design.
         """
-        # Check cache
-        cache_key = f"safety_{design.id}_{design.updated_at.isoformat() if design.updated_at else ''}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
+        signatures = self.signatures.current()
         
-        # Get the full sequence
-        full_sequence = design.full_sequence
+        # Check cache (keyed on the design content and the index version, so edits and reloads invalidate old verdicts)
+        cache_key = f"safety_{signatures.version}_{design.fingerprint}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Screen both stages per part (cached) and at the junctions between parts
+        scan = self.scanner.scan(signatures, [part.sequence for part in design.parts])
         
         # Initialize safety scores
         overall_score = 0.9  # Start with a high score and deduct based on issues
@@ -43,16 +36,23 @@ class SafetyService:
         biocontainment_score = 0.9  # Start with a high biocontainment score
         
         # Check for dangerous sequences
-        dangerous_matches = []
-        for pattern in self.dangerous_patterns:
-            if re.search(pattern, full_sequence, re.IGNORECASE):
-                dangerous_matches.append(pattern)
+        dangerous_hits = scan.hits
+        dangerous_matches = list(dict.fromkeys(hit.pattern_id for hit in dangerous_hits))
         
         if dangerous_matches:
             overall_score -= 0.3
             toxicity_score += 0.3
             environmental_risk_score += 0.2
         
+        # Check for near matches (mutated or recoded variants) of signatures not matched exactly
+        similar_hits = [hit for hit in scan.similar_hits if hit.pattern_id not in dangerous_matches]
+        similar_matches = list(dict.fromkeys(hit.pattern_id for hit in similar_hits))
+        
+        if similar_matches:
+            overall_score -= 0.2
+            toxicity_score += 0.2
+            environmental_risk_score += 0.1
+        
         # Check for antibiotic resistance genes
         has_antibiotic_resistance = any(
             part.name.lower().find("antibiotic") != -1 or 
@@ -93,6 +93,9 @@ class SafetyService:
         if not has_kill_switch:
             recommendations.append("Consider adding a kill switch for improved biocontainment")
         
+        if similar_matches:
+            recommendations.append("Design contains sequences similar to known hazardous signatures. Manual review is recommended")
+        
         if has_antibiotic_resistance:
             recommendations.append("Antibiotic resistance genes pose environmental risks. Consider alternative selection markers")
         
@@ -115,13 +118,13 @@ class SafetyService:
             "environmental_risk": environmental_risk_score,
             "biocontainment": biocontainment_score,
             "dangerous_sequences": len(dangerous_matches),
+            "dangerous_hits": [hit._asdict() for hit in dangerous_hits],
+            "similar_sequences": len(similar_matches),
+            "similar_hits": [hit._asdict() for hit in similar_hits],
             "recommendations": recommendations
         }
         
         # Cache the result
-        self.cache[cache_key] = {
-            "data": result,
-            "timestamp": time.time()
-        }
+        self.cache.set(cache_key, result)
         
         return result
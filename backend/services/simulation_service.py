@@ -1,24 +1,25 @@
-from typing import Dict, Any
-import time
-import random
+from typing import Dict, Any, Optional
 import numpy as np
+from bioforge_seqkit import create_cache
 from models.dna_design import DNADesign, PartType
 
 class SimulationService:
     def __init__(self):
-        self.cache = {}  # Simple in-memory cache
-        self.cache_expiry = 3600  # Cache expiry in seconds (1 hour)
+        self.cache = create_cache("simulation", ttl=3600)
     
-    def run_simulation(self, design: DNADesign) -> Dict[str, Any]:
+    def run_simulation(self, design: DNADesign, seed: Optional[int] = None) -> Dict[str, Any]:
         """
         Run a simulation for a DNA design.
+        With a seed the result is reproducible, so it is cached per design and
+        seed; without one, every call draws fresh noise.
         """
         # Check cache
-        cache_key = f"simulation_{design.id}_{design.updated_at.isoformat() if design.updated_at else ''}"
-        if cache_key in self.cache:
-            cache_entry = self.cache[cache_key]
-            if time.time() - cache_entry["timestamp"] < self.cache_expiry:
-                return cache_entry["data"]
+        cache_key = f"simulation_{design.fingerprint}_{seed}"
+        if seed is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        rng = np.random.default_rng(seed)
         
         # Analyze the design
         has_promoter = any(part.type == PartType.PROMOTER for part in design.parts)
@@ -75,16 +76,16 @@ class SimulationService:
         time_points = 20
         time_series = {
             "time": list(range(time_points)),
-            "growth": self._generate_growth_curve(time_points, growth_rate),
-            "protein": self._generate_protein_curve(time_points, protein_expression, has_promoter and has_rbs and has_gene),
-            "metabolite": self._generate_metabolite_curve(time_points, metabolic_burden, has_gene)
+            "growth": self._generate_growth_curve(time_points, growth_rate, rng),
+            "protein": self._generate_protein_curve(time_points, protein_expression, has_promoter and has_rbs and has_gene, rng),
+            "metabolite": self._generate_metabolite_curve(time_points, metabolic_burden, has_gene, rng)
         }
         
         # Add some noise to make it look more realistic
-        growth_rate = min(1.0, max(0.0, growth_rate + random.uniform(-0.05, 0.05)))
-        protein_expression = min(1.0, max(0.0, protein_expression + random.uniform(-0.05, 0.05)))
-        metabolic_burden = min(1.0, max(0.0, metabolic_burden + random.uniform(-0.05, 0.05)))
-        stability = min(1.0, max(0.0, stability + random.uniform(-0.05, 0.05)))
+        growth_rate = min(1.0, max(0.0, growth_rate + rng.uniform(-0.05, 0.05)))
+        protein_expression = min(1.0, max(0.0, protein_expression + rng.uniform(-0.05, 0.05)))
+        metabolic_burden = min(1.0, max(0.0, metabolic_burden + rng.uniform(-0.05, 0.05)))
+        stability = min(1.0, max(0.0, stability + rng.uniform(-0.05, 0.05)))
         
         # Prepare the result
         result = {
@@ -113,14 +114,12 @@ class SimulationService:
             result["notes"].append("Components are not in the optimal order. Consider rearranging for better performance.")
         
         # Cache the result
-        self.cache[cache_key] = {
-            "data": result,
-            "timestamp": time.time()
-        }
+        if seed is not None:
+            self.cache.set(cache_key, result)
         
         return result
     
-    def _generate_growth_curve(self, time_points, growth_rate):
+    def _generate_growth_curve(self, time_points, growth_rate, rng):
         """
         Generate a simulated growth curve.
         """
@@ -133,12 +132,12 @@ class SimulationService:
         N = K / (1 + ((K - N0) / N0) * np.exp(-r * t))
         
         # Add some noise
-        noise = np.random.normal(0, 0.02, time_points)
+        noise = rng.normal(0, 0.02, time_points)
         N = np.clip(N + noise, 0, 1)
         
         return N.tolist()
     
-    def _generate_protein_curve(self, time_points, expression_level, has_expression_system):
+    def _generate_protein_curve(self, time_points, expression_level, has_expression_system, rng):
         """
         Generate a simulated protein expression curve.
         """
@@ -153,12 +152,12 @@ class SimulationService:
         protein = expression_level / (1 + np.exp(-k * (t - midpoint)))
         
         # Add some noise
-        noise = np.random.normal(0, 0.02, time_points)
+        noise = rng.normal(0, 0.02, time_points)
         protein = np.clip(protein + noise, 0, 1)
         
         return protein.tolist()
     
-    def _generate_metabolite_curve(self, time_points, metabolic_burden, has_gene):
+    def _generate_metabolite_curve(self, time_points, metabolic_burden, has_gene, rng):
         """
         Generate a simulated metabolite production curve.
         """
@@ -172,7 +171,7 @@ class SimulationService:
         metabolite = metabolic_burden * (1 - np.exp(-k * t / time_points))
         
         # Add some noise
-        noise = np.random.normal(0, 0.02, time_points)
+        noise = rng.normal(0, 0.02, time_points)
         metabolite = np.clip(metabolite + noise, 0, 1)
         
         return metabolite.tolist()
@@ -0,0 +1,546 @@
+"""
+Local parts catalog.
+
+Parts from GenBank flat files, iGEM Registry dumps and upstream searches are
+kept in one SQLite database, so part searches run locally in milliseconds.
+The parts table has B-tree indexes on name, type, organism and accession and
+an FTS5 index over name and description, kept in sync by triggers. Writes
+are upserts keyed by part ID, so loading a newer dump or refreshing a search
+updates parts in place.
+
+Every part has a revision, taken from a catalog-wide counter when it is
+inserted or its sequence changes, so indexes over the sequences (see the
+similarity index in main.py) can pick up exactly the parts changed since
+they last looked.
+
+Each upstream search is recorded with the time it was made and the parts it
+found, so a search the catalog cannot fill is sent upstream only if it has
+not been made within the refresh interval.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, TextIO, Tuple
+import gzip
+import itertools
+import json
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    type TEXT NOT NULL,
+    sequence TEXT NOT NULL,
+    description TEXT,
+    source TEXT,
+    origin TEXT NOT NULL,
+    organism TEXT,
+    accession TEXT,
+    metadata TEXT,
+    updated_at REAL NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS parts_name ON parts (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS parts_type ON parts (type, name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS parts_organism ON parts (organism COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS parts_accession ON parts (accession);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5 (
+    name, description, content='parts', content_rowid='rowid', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS parts_fts_insert AFTER INSERT ON parts BEGIN
+    INSERT INTO parts_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS parts_fts_delete AFTER DELETE ON parts BEGIN
+    INSERT INTO parts_fts (parts_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS parts_fts_update AFTER UPDATE ON parts BEGIN
+    INSERT INTO parts_fts (parts_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+    INSERT INTO parts_fts (rowid, name, description) VALUES (new.rowid, new.name, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    records INTEGER NOT NULL,
+    done INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS upstream_searches (
+    key TEXT PRIMARY KEY,
+    searched_at REAL NOT NULL,
+    part_ids TEXT NOT NULL
+);
+"""
+
+PART_COLUMNS = ("id", "name", "type", "sequence", "description", "source", "metadata")
+
+# File extensions of the dumps of each source (before any .gz)
+DUMP_EXTENSIONS = {
+    "genbank": (".gb", ".gbk", ".genbank", ".seq"),
+    "igem": (".json", ".jsonl"),
+}
+
+# Part type per iGEM Registry part type
+IGEM_TYPES = {
+    "promoter": "promoter",
+    "rbs": "rbs",
+    "coding": "gene",
+    "terminator": "terminator",
+    "regulatory": "operator",
+}
+
+class IngestCheckpoint(NamedTuple):
+    """
+    Progress of a bulk load: the first `records` records of the dump at
+    `path` (identified by its size and modification time) are in the catalog.
+    """
+    path: str
+    size: int
+    mtime: float
+    records: int
+    done: bool = False
+
+def part_origin(part_id: str) -> str:
+    """Get the source ID (genbank, igem, ...) of a part from the prefix of its ID."""
+    return part_id.split("_", 1)[0]
+
+def _fts_query(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"*' for word in words) or None
+
+class PartsCatalog:
+    """
+    SQLite store of DNA parts (dicts with the fields of the DNAPart model).
+    One connection is shared by all threads, behind a lock; every call is a
+    single short transaction. Several processes may write to the same file,
+    each waiting up to `timeout` seconds for the others' transactions.
+    """
+
+    def __init__(self, path: str = ":memory:", timeout: float = 5.0):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+            columns = {row["name"] for row in self._connection.execute("PRAGMA table_info(parts)")}
+            if "revision" not in columns:
+                # Catalogs created before parts had revisions
+                self._connection.execute("ALTER TABLE parts ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+                self._connection.execute("UPDATE parts SET revision = rowid")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS parts_revision ON parts (revision)")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def upsert(self, parts: Iterable[Dict[str, Any]], checkpoint: Optional[IngestCheckpoint] = None) -> int:
+        """
+        Insert or update parts, in one transaction. Returns the number of
+        parts written. New parts and parts whose sequence changed get the
+        next revisions. A checkpoint is saved in the same transaction, so it
+        never runs ahead of (or behind) the parts actually written.
+        """
+        now = time.time()
+        rows = [
+            (
+                part["id"],
+                part["name"],
+                part["type"],
+                part["sequence"],
+                part.get("description"),
+                part.get("source"),
+                part_origin(part["id"]),
+                (part.get("metadata") or {}).get("organism"),
+                (part.get("metadata") or {}).get("accession"),
+                json.dumps(part.get("metadata") or {}),
+                now,
+            )
+            for part in parts
+        ]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                """
+                INSERT INTO parts (id, name, type, sequence, description, source, origin, organism, accession, metadata, updated_at, revision)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT coalesce(max(revision), 0) + 1 FROM parts))
+                ON CONFLICT (id) DO UPDATE SET
+                    name = excluded.name, type = excluded.type, sequence = excluded.sequence,
+                    description = excluded.description, source = excluded.source, origin = excluded.origin,
+                    organism = excluded.organism, accession = excluded.accession,
+                    metadata = excluded.metadata, updated_at = excluded.updated_at,
+                    revision = CASE WHEN parts.sequence = excluded.sequence THEN parts.revision ELSE excluded.revision END
+                """,
+                rows,
+            )
+            if checkpoint is not None:
+                self._connection.execute(
+                    "INSERT INTO ingest_checkpoints (path, size, mtime, records, done, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                    "records = excluded.records, done = excluded.done, updated_at = excluded.updated_at",
+                    (*checkpoint, now),
+                )
+        return len(rows)
+
+    def ingest_checkpoint(self, path: str, size: int, mtime: float) -> IngestCheckpoint:
+        """
+        Get the progress of loading a dump. A dump whose size or
+        modification time changed since its checkpoint is loaded from the start.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT records, done FROM ingest_checkpoints WHERE path = ? AND size = ? AND mtime = ?",
+                (path, size, mtime),
+            ).fetchone()
+        if row is None:
+            return IngestCheckpoint(path, size, mtime, 0)
+        return IngestCheckpoint(path, size, mtime, row["records"], bool(row["done"]))
+
+    def reset_checkpoints(self):
+        """Forget the progress of every bulk load, so dumps are loaded again from the start."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM ingest_checkpoints")
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        part_type: Optional[str] = None,
+        origins: Optional[Iterable[str]] = None,
+        organism: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Find parts whose name or description contains every word of `query`
+        (as word prefixes, best matches first), optionally of one type, from
+        some sources and of one organism. Without a query, parts are listed by name.
+        """
+        return self.search_page(query, part_type, origins, organism, limit)[0]
+
+    def search_page(
+        self,
+        query: Optional[str] = None,
+        part_type: Optional[str] = None,
+        origins: Optional[Iterable[str]] = None,
+        organism: Optional[str] = None,
+        limit: int = 20,
+        after: Optional[List[Any]] = None,
+        sequences: bool = True,
+    ) -> Tuple[List[Dict[str, Any]], Optional[List[Any]]]:
+        """
+        Get a page of a search: up to `limit` parts after the position
+        `after`, and the position of the last one if more parts follow (None
+        on the last page). Positions are keys of the search order (relevance
+        or name, then ID), so each page is an index range scan, however deep,
+        and parts added between pages never shift the ones not yet listed.
+        Without sequences, parts have the length of their sequence instead.
+        """
+        select = self._select(_columns(sequences), query, part_type, origins, organism)
+        if select is None or limit <= 0:
+            return [], None
+        sql, arguments, key = select
+        if after is not None:
+            # The leading range on the sort key lets the name indexes seek to the page
+            sql += f" AND {key} >= ? AND ({key} > ? OR parts.id > ?)"
+            arguments.extend((after[0], after[0], after[1]))
+        sql += f" ORDER BY {key}, parts.id LIMIT ?"
+        arguments.append(limit + 1)
+
+        with self._lock:
+            rows = self._connection.execute(sql, arguments).fetchall()
+        parts = [_part(row) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return parts, None
+        return parts, [rows[limit - 1]["sort_key"], rows[limit - 1]["id"]]
+
+    def matching_ids(
+        self,
+        part_ids: List[str],
+        query: Optional[str] = None,
+        part_type: Optional[str] = None,
+        origins: Optional[Iterable[str]] = None,
+        organism: Optional[str] = None,
+    ) -> Set[str]:
+        """Get the IDs of the given parts that are in the catalog and match a search."""
+        select = self._select("parts.id", query, part_type, origins, organism)
+        if select is None:
+            return set()
+        sql, arguments, _ = select
+        matching = set()
+        with self._lock:
+            for start in range(0, len(part_ids), 500):
+                chunk = part_ids[start:start + 500]
+                rows = self._connection.execute(
+                    f"{sql} AND parts.id IN ({', '.join('?' * len(chunk))})", [*arguments, *chunk]
+                ).fetchall()
+                matching.update(row["id"] for row in rows)
+        return matching
+
+    @staticmethod
+    def _select(
+        columns: str,
+        query: Optional[str],
+        part_type: Optional[str],
+        origins: Optional[Iterable[str]],
+        organism: Optional[str],
+    ) -> Optional[Tuple[str, List[Any], str]]:
+        """
+        Build the query of a search as (SQL up to its conditions, arguments,
+        sort key), or None if nothing can match. The sort key is selected as
+        sort_key; results are ordered by it, then by ID.
+        """
+        conditions, arguments = [], []
+        if part_type:
+            conditions.append("parts.type = ?")
+            arguments.append(part_type.lower())
+        if origins is not None:
+            origins = list(origins)
+            if not origins:
+                return None
+            conditions.append(f"parts.origin IN ({', '.join('?' * len(origins))})")
+            arguments.extend(origins)
+        if organism:
+            conditions.append("parts.organism = ? COLLATE NOCASE")
+            arguments.append(organism)
+
+        match = _fts_query(query or "")
+        if match:
+            key = "bm25(parts_fts)"
+            sql = f"SELECT {columns}, {key} AS sort_key FROM parts_fts JOIN parts ON parts.rowid = parts_fts.rowid WHERE parts_fts MATCH ?"
+            arguments.insert(0, match)
+        else:
+            key = "parts.name COLLATE NOCASE"
+            sql = f"SELECT {columns}, parts.name AS sort_key FROM parts WHERE 1"
+        sql += "".join(f" AND {condition}" for condition in conditions)
+        return sql, arguments, key
+
+    def get(self, part_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a part by ID, or by source and accession without the version
+        (the latest version: genbank_J01636 finds genbank_J01636.2).
+        """
+        columns = ", ".join(PART_COLUMNS)
+        with self._lock:
+            row = self._connection.execute(f"SELECT {columns} FROM parts WHERE id = ?", (part_id,)).fetchone()
+            if row is None and "_" in part_id:
+                accession = part_id.split("_", 1)[1]
+                # Versions sort between "ACCESSION." and "ACCESSION/", a range the accession index can serve
+                row = self._connection.execute(
+                    f"SELECT {columns} FROM parts WHERE origin = ? AND (accession = ? OR (accession > ? AND accession < ?)) "
+                    "ORDER BY accession DESC LIMIT 1",
+                    (part_origin(part_id), accession, f"{accession}.", f"{accession}/"),
+                ).fetchone()
+        return _part(row) if row is not None else None
+
+    def get_many(self, part_ids: List[str], sequences: bool = True) -> List[Dict[str, Any]]:
+        """
+        Get the parts with the given IDs, in that order, skipping unknown IDs.
+        Without sequences, parts have the length of their sequence instead.
+        """
+        columns = _columns(sequences)
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            # Stay under SQLite's limit on query parameters
+            for start in range(0, len(part_ids), 500):
+                chunk = part_ids[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT {columns} FROM parts WHERE parts.id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                found.update((row["id"], _part(row)) for row in rows)
+        return [found[part_id] for part_id in part_ids if part_id in found]
+
+    def sequence_changes(self, revision: int = 0, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """
+        Get the parts inserted, or whose sequence changed, after `revision`, as
+        batches of (ID, sequence, revision) in revision order. Revisions are
+        given out inside write transactions, so a later batch never holds a
+        revision below one already returned.
+        """
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, sequence, revision FROM parts WHERE revision > ? ORDER BY revision LIMIT ?",
+                    (revision, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+            revision = rows[-1]["revision"]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM parts").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Count the parts per source and type."""
+        with self._lock:
+            rows = self._connection.execute("SELECT origin, type, count(*) FROM parts GROUP BY origin, type").fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for origin, part_type, count in rows:
+            counts.setdefault(origin, {})[part_type] = count
+        return {"parts": sum(sum(types.values()) for types in counts.values()), "sources": counts}
+
+    def recent_search(self, key: str, since: float) -> Optional[List[str]]:
+        """Get the IDs of the parts an upstream search found, if it was made after the time `since`."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT searched_at, part_ids FROM upstream_searches WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row["searched_at"] < since:
+            return None
+        return json.loads(row["part_ids"])
+
+    def record_search(self, key: str, part_ids: List[str]):
+        """Record that an upstream search was just made and which parts it found."""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO upstream_searches (key, searched_at, part_ids) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET searched_at = excluded.searched_at, part_ids = excluded.part_ids",
+                (key, time.time(), json.dumps(part_ids)),
+            )
+
+def _columns(sequences: bool = True) -> str:
+    """Columns of a part, with the length of the sequence instead of the sequence if `sequences` is false."""
+    return ", ".join(
+        f"parts.{column}" if sequences or column != "sequence" else "length(parts.sequence) AS length"
+        for column in PART_COLUMNS
+    )
+
+def _part(row: sqlite3.Row) -> Dict[str, Any]:
+    part = dict(row)
+    part.pop("sort_key", None)
+    part["metadata"] = json.loads(part["metadata"]) if part["metadata"] else None
+    return part
+
+def genbank_part_type(record) -> str:
+    """
+    Determine the part type based on the GenBank record.
+    """
+    description = record.description.lower()
+    features = [feature.type.lower() for feature in record.features]
+
+    if "promoter" in description or "promoter" in features:
+        return "promoter"
+    elif "terminator" in description or "terminator" in features:
+        return "terminator"
+    elif "rbs" in description or "ribosome binding site" in features:
+        return "rbs"
+    elif "operator" in description or "operator" in features:
+        return "operator"
+    elif "gene" in description or "cds" in features or "coding" in features:
+        return "gene"
+    else:
+        return "other"
+
+def genbank_part(record) -> Dict[str, Any]:
+    """
+    Convert a GenBank SeqRecord to a part.
+    """
+    return {
+        "id": f"genbank_{record.id}",
+        "name": record.description[:50],  # Truncate long descriptions
+        "type": genbank_part_type(record),
+        "sequence": str(record.seq),
+        "description": record.description,
+        "source": "GenBank",
+        "metadata": {
+            "accession": record.id,
+            "organism": record.annotations.get("organism", "Unknown"),
+            "taxonomy": record.annotations.get("taxonomy", []),
+            "references": [ref.title for ref in record.annotations.get("references", [])]
+        },
+    }
+
+def igem_part(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert an iGEM Registry dump entry to a part. Both the Registry's own
+    field names (part_name, part_type, part_short_desc, seq_data) and the
+    shorter ones of the JSON exports (name, type, description, sequence) are read.
+    """
+    igem_id = entry.get("part_name") or entry["name"]
+    igem_type = entry.get("part_type") or entry.get("type") or "Other"
+    description = entry.get("part_short_desc") or entry.get("short_desc") or entry.get("description")
+    return {
+        "id": f"igem_{igem_id}",
+        "name": entry.get("nickname") or description or igem_id,
+        "type": IGEM_TYPES.get(igem_type.lower(), "other"),
+        "sequence": (entry.get("seq_data") or entry.get("sequence") or "").upper(),
+        "description": description,
+        "source": "iGEM Registry",
+        "metadata": {
+            "igem_id": igem_id,
+            "igem_type": igem_type,
+            "url": f"http://parts.igem.org/Part:{igem_id}"
+        },
+    }
+
+def open_text(path: str) -> TextIO:
+    """Open a text file, decompressing .gz files on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    return open(path)
+
+def _skip_genbank_records(handle: TextIO, count: int):
+    """Move past the first `count` records of a GenBank flat file without parsing them."""
+    skipped = 0
+    while skipped < count:
+        line = handle.readline()
+        if not line:
+            break
+        if line.startswith("//"):
+            skipped += 1
+
+def read_genbank(path: str, skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Read the parts of a GenBank flat file (.gb, .gbk, optionally gzipped),
+    one record at a time, starting after the first `skip` records. Only the
+    current record is in memory.
+    """
+    from Bio import SeqIO
+
+    with open_text(path) as handle:
+        _skip_genbank_records(handle, skip)
+        for record in SeqIO.parse(handle, "genbank"):
+            yield genbank_part(record)
+
+def read_igem_dump(path: str, skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Read the parts of an iGEM Registry dump: a JSON array, or JSON lines
+    (optionally gzipped), which are read one line at a time.
+    """
+    with open_text(path) as handle:
+        first = handle.read(1)
+        while first.isspace():
+            first = handle.read(1)
+        if first == "[":
+            entries: Iterable[Dict[str, Any]] = json.loads(first + handle.read())
+        else:
+            lines = itertools.chain([first + handle.readline()], handle)
+            entries = (json.loads(line) for line in lines if line.strip())
+        for entry in itertools.islice(entries, skip, None):
+            yield igem_part(entry)
+
+def read_dump(path: str, skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """Read the parts of a GenBank flat file or an iGEM dump, by file extension. See read_genbank."""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(DUMP_EXTENSIONS["genbank"]):
+        return read_genbank(path, skip)
+    if name.endswith(DUMP_EXTENSIONS["igem"]):
+        return read_igem_dump(path, skip)
+    expected = ", ".join(extension for extensions in DUMP_EXTENSIONS.values() for extension in extensions)
+    raise ValueError(f"Unknown dump format: {path}; expected one of {expected} (optionally .gz)")
+
+def load_dump(catalog: PartsCatalog, path: str, batch_size: int = 1000) -> int:
+    """Load a dump into the catalog in batches of upserts. Returns the number of parts loaded."""
+    loaded = 0
+    batch: List[Dict[str, Any]] = []
+    for part in read_dump(path):
+        batch.append(part)
+        if len(batch) >= batch_size:
+            loaded += catalog.upsert(batch)
+            batch = []
+    return loaded + catalog.upsert(batch)
@@ -0,0 +1,16 @@
+import os
+import pytest
+from catalog import PartsCatalog, load_dump
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+GENBANK_DUMP = os.path.join(FIXTURES, "genbank_parts.gb")
+IGEM_DUMP = os.path.join(FIXTURES, "igem_parts.json")
+
+@pytest.fixture
+def catalog(tmp_path):
+    """A catalog holding the GenBank and iGEM fixture parts."""
+    catalog = PartsCatalog(str(tmp_path / "catalog.db"))
+    load_dump(catalog, IGEM_DUMP)
+    load_dump(catalog, GENBANK_DUMP)
+    yield catalog
+    catalog.close()
@@ -0,0 +1,137 @@
+"""
+Bulk ingestion of GenBank flat files and iGEM dumps into the parts catalog.
+
+Dumps are streamed record by record (see catalog.read_dump): each record is
+converted to a compact part row as soon as it is parsed, so memory stays
+bounded by one batch however large the file. Rows are written in batched
+transactions, each saving the file's checkpoint (records done so far) in the
+same transaction, so an interrupted load resumes after the last committed
+batch without losing or repeating records. Files are spread over a process
+pool, each worker writing to the catalog through its own connection; SQLite
+serializes the short write transactions while the workers keep parsing.
+
+    python ingest.py [--workers N] [--batch-size 1000] [--restart] DUMP_OR_DIRECTORY ...
+"""
+from typing import Iterator, List, NamedTuple, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import sys
+import time
+
+from catalog import DUMP_EXTENSIONS, PartsCatalog, read_dump
+
+# Seconds a worker waits for another worker's write transaction
+WRITE_TIMEOUT = 60.0
+
+class IngestResult(NamedTuple):
+    """Outcome of loading one dump: records written in this run, and the time it took."""
+    path: str
+    records: int
+    seconds: float
+    resumed_from: int
+    skipped: bool = False
+
+def dump_files(paths: List[str]) -> Iterator[str]:
+    """Expand directories to the dump files in them (recursively, sorted)."""
+    extensions = tuple(
+        extension + suffix
+        for extensions in DUMP_EXTENSIONS.values() for extension in extensions for suffix in ("", ".gz")
+    )
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    if name.endswith(extensions):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+def ingest_file(catalog_path: str, path: str, batch_size: int = 1000) -> IngestResult:
+    """
+    Load one dump into the catalog at `catalog_path`, resuming from its
+    checkpoint. Runs in a worker process.
+    """
+    start = time.perf_counter()
+    catalog = PartsCatalog(catalog_path, timeout=WRITE_TIMEOUT)
+    try:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        checkpoint = catalog.ingest_checkpoint(path, stat.st_size, stat.st_mtime)
+        if checkpoint.done:
+            return IngestResult(path, 0, time.perf_counter() - start, checkpoint.records, skipped=True)
+
+        records = checkpoint.records
+        batch = []
+        for part in read_dump(path, skip=checkpoint.records):
+            batch.append(part)
+            if len(batch) >= batch_size:
+                records += len(batch)
+                catalog.upsert(batch, checkpoint._replace(records=records))
+                batch = []
+        records += len(batch)
+        catalog.upsert(batch, checkpoint._replace(records=records, done=True))
+        return IngestResult(path, records - checkpoint.records, time.perf_counter() - start, checkpoint.records)
+    finally:
+        catalog.close()
+
+def ingest(
+    catalog_path: str,
+    paths: List[str],
+    workers: Optional[int] = None,
+    batch_size: int = 1000,
+    restart: bool = False,
+) -> Iterator[IngestResult]:
+    """
+    Load dumps into the catalog on a pool of `workers` processes (default:
+    one per CPU, at most one per file) and yield their results as they finish.
+    With `restart`, dumps already loaded (or partly loaded) are loaded again
+    from the start.
+    """
+    catalog = PartsCatalog(catalog_path, timeout=WRITE_TIMEOUT)
+    try:
+        if restart:
+            catalog.reset_checkpoints()
+    finally:
+        catalog.close()
+
+    files = list(dump_files(paths))
+    workers = min(workers or os.cpu_count() or 1, max(len(files), 1))
+    if workers == 1:
+        for path in files:
+            yield ingest_file(catalog_path, path, batch_size)
+        return
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(ingest_file, catalog_path, path, batch_size) for path in files]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python ingest.py", description="Load GenBank flat files and iGEM dumps into the parts catalog.")
+    parser.add_argument("paths", nargs="+", help="Dumps (.gb, .gbk, .seq, .json, .jsonl, optionally .gz) or directories of dumps")
+    parser.add_argument("--catalog", default=os.environ.get("CATALOG_PATH", "catalog.db"), help="Catalog database (default: $CATALOG_PATH or catalog.db)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Records per transaction")
+    parser.add_argument("--restart", action="store_true", help="Ignore checkpoints and load every dump from the start")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    total = 0
+    for result in ingest(args.catalog, args.paths, args.workers, args.batch_size, args.restart):
+        if result.skipped:
+            print(f"{result.path}: already loaded ({result.resumed_from} records)")
+            continue
+        total += result.records
+        resumed = f", resumed after {result.resumed_from}" if result.resumed_from else ""
+        rate = result.records / result.seconds if result.seconds > 0 else 0.0
+        print(f"{result.path}: {result.records} records in {result.seconds:.1f} s ({rate:.0f} records/s{resumed})")
+    elapsed = time.perf_counter() - start
+    print(f"total: {total} records in {elapsed:.1f} s ({total / elapsed if elapsed > 0 else 0.0:.0f} records/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,35 @@
 from fastapi import FastAPI, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
-import requests
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 import xml.etree.ElementTree as ET
-import time
+import asyncio
 import logging
-from Bio import Entrez, SeqIO
+from Bio import SeqIO
+import httpx
 import io
 import json
 import os
+import sqlite3
+import time
+from bioforge_seqkit import (
+    NDJSON_MEDIA_TYPE,
+    InvalidCursorError,
+    SimilarityIndex,
+    cache_stats,
+    create_cache,
+    cursor_scope,
+    decode_cursor,
+    encode_cursor,
+)
+from catalog import PartsCatalog, genbank_part, load_dump, read_igem_dump
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Set email for Entrez
-Entrez.email = os.environ.get("ENTREZ_EMAIL", "bioforge@example.com")
-
 # Initialize FastAPI app
 app = FastAPI(
     title="BioForge Data Pipeline Service",
@@ -44,9 +56,177 @@ class DNAPart(BaseModel):
     source: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-# Simple in-memory cache
-cache = {}
-cache_expiry = 3600  # Cache expiry in seconds (1 hour)
+class DNAPartSummary(BaseModel):
+    """A part as listed with fields=summary: the length of its sequence instead of the sequence."""
+    id: str
+    name: str
+    type: str
+    length: int
+    description: Optional[str] = None
+    source: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+class SimilarityQuery(BaseModel):
+    sequence: str
+    limit: int = 10
+    min_containment: float = 0.1
+    order_by: str = "query"  # "query" or "part"
+
+class SimilarPart(BaseModel):
+    part: DNAPart
+    shared_hashes: int
+    query_containment: float
+    part_containment: float
+
+# Bounded result cache shared by all endpoints (see bioforge_seqkit.cache)
+cache = create_cache("data-pipelines", ttl=3600)
+
+# Local parts catalog (see catalog.py); searches are answered from it and go upstream only on a miss
+catalog = PartsCatalog(os.environ.get("CATALOG_PATH", "catalog.db"))
+
+# K-mer containment index over the catalog's part sequences (see bioforge_seqkit.similarity),
+# memory-mapped from its directory and brought up to date with the catalog every SIMILARITY_SYNC_S
+similarity_index = SimilarityIndex(
+    os.environ.get("SIMILARITY_INDEX_PATH", "similarity-index"),
+    k=int(os.environ.get("SIMILARITY_K", "21")),
+    scale=int(os.environ.get("SIMILARITY_SCALE", "20")),
+)
+SIMILARITY_SYNC_S = float(os.environ.get("SIMILARITY_SYNC_S", "10"))
+SIMILARITY_BATCH_SIZE = int(os.environ.get("SIMILARITY_BATCH_SIZE", "20000"))
+MAX_SIMILAR_PARTS = 100
+
+# Bundled iGEM Registry dump with the sample parts
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+IGEM_SAMPLE_DUMP = os.path.join(FIXTURES_DIR, "igem_parts.json")
+
+# Dumps loaded when the catalog is empty at startup (comma-separated GenBank flat files and iGEM dumps)
+CATALOG_SEED = [path for path in os.environ.get("CATALOG_SEED", IGEM_SAMPLE_DUMP).split(",") if path]
+
+# Seconds before a search the catalog cannot fill is sent upstream again
+CATALOG_REFRESH_S = float(os.environ.get("CATALOG_REFRESH_S", "86400"))
+
+# Answer from the catalog only, never calling upstream sources (e.g. offline, with fixture dumps as the seed)
+CATALOG_OFFLINE = os.environ.get("CATALOG_OFFLINE", "").lower() in ("1", "true", "yes")
+
+# Seconds each upstream source gets to answer; a search returns without the sources that take longer
+SOURCE_TIMEOUTS = {
+    "genbank": float(os.environ.get("GENBANK_TIMEOUT_S", "10")),
+    "igem": float(os.environ.get("IGEM_TIMEOUT_S", "5")),
+}
+
+# Most parts asked from each source when the catalog cannot fill the first page of a search
+UPSTREAM_MAX_RESULTS = int(os.environ.get("UPSTREAM_MAX_RESULTS", "100"))
+
+# Listing projections: full parts, or summaries with the sequence length instead of the sequence
+PART_FIELDS = ("full", "summary")
+
+# OpenAPI description of search results beyond their JSON schema: the paging headers and the NDJSON format
+PART_LIST_RESPONSES = {
+    200: {
+        "description": "A page of parts (summaries with fields=summary)",
+        "headers": {
+            "X-Next-Cursor": {"description": "Cursor of the next page, while more parts follow", "schema": {"type": "string"}},
+            "X-Failed-Sources": {"description": "Sources that failed or timed out, comma-separated", "schema": {"type": "string"}},
+        },
+        "content": {
+            NDJSON_MEDIA_TYPE: {
+                "schema": {"type": "string", "description": 'With format=ndjson: one part per line, then {"next_cursor": ...} if more follow'},
+            },
+        },
+    },
+}
+
+# Parts read from the catalog at a time when streaming search results as NDJSON
+NDJSON_BATCH_SIZE = int(os.environ.get("NDJSON_BATCH_SIZE", "500"))
+
+# One pooled HTTP client for all upstream calls, so connections are kept alive across requests
+http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(max(SOURCE_TIMEOUTS.values()), connect=5.0),
+    limits=httpx.Limits(
+        max_connections=int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.environ.get("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "10")),
+    ),
+)
+
+class GenBankConnector:
+    """
+    Async client for NCBI GenBank through the E-utilities: esearch for the
+    matching IDs, then efetch of their flat files. Requests go through the
+    pooled HTTP client and the records are parsed in the threadpool, so a
+    slow NCBI round trip never blocks the event loop.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, base_url: str, email: str, api_key: Optional[str] = None):
+        self.client = client
+        self.base_url = base_url.rstrip("/")
+        self.params = {"tool": "bioforge", "email": email}
+        if api_key:
+            self.params["api_key"] = api_key
+
+    async def search(self, term: str, limit: int) -> List[DNAPart]:
+        """Get the parts of the records matching an Entrez query."""
+        response = await self.client.get(
+            f"{self.base_url}/esearch.fcgi",
+            params={**self.params, "db": "nucleotide", "term": term, "retmax": limit, "retmode": "json"},
+        )
+        response.raise_for_status()
+        id_list = response.json()["esearchresult"]["idlist"]
+        if not id_list:
+            return []
+        return await self.fetch(id_list)
+
+    async def fetch(self, id_list: List[str]) -> List[DNAPart]:
+        """Get the parts of records by ID or accession."""
+        response = await self.client.get(
+            f"{self.base_url}/efetch.fcgi",
+            params={**self.params, "db": "nucleotide", "id": ",".join(id_list), "rettype": "gb", "retmode": "text"},
+        )
+        response.raise_for_status()
+        return await run_in_threadpool(_parse_genbank_parts, response.text)
+
+genbank = GenBankConnector(
+    http_client,
+    os.environ.get("EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"),
+    os.environ.get("ENTREZ_EMAIL", "bioforge@example.com"),
+    os.environ.get("NCBI_API_KEY"),
+)
+
+@app.on_event("startup")
+def seed_catalog():
+    if catalog.count() == 0:
+        for path in CATALOG_SEED:
+            logger.info(f"Loaded {load_dump(catalog, path)} parts into the catalog from {path}")
+
+def sync_similarity_index() -> int:
+    """
+    Index the parts inserted into the catalog, or whose sequence changed,
+    since the last sync; the index watermark is the last catalog revision
+    it holds. Returns the number of parts indexed.
+    """
+    indexed = 0
+    for batch in catalog.sequence_changes(similarity_index.watermark or 0, SIMILARITY_BATCH_SIZE):
+        indexed += similarity_index.add(((part_id, sequence) for part_id, sequence, _ in batch), watermark=batch[-1][2])
+    return indexed
+
+async def keep_similarity_index_synced():
+    while True:
+        try:
+            indexed = await run_in_threadpool(sync_similarity_index)
+            if indexed:
+                logger.info(f"Indexed {indexed} parts for similarity search")
+        except Exception as e:
+            logger.error(f"Error updating the similarity index: {e}")
+        await asyncio.sleep(SIMILARITY_SYNC_S)
+
+@app.on_event("startup")
+async def start_similarity_sync():
+    app.state.similarity_sync = asyncio.create_task(keep_similarity_index_synced())
+
+@app.on_event("shutdown")
+async def close_http_client():
+    app.state.similarity_sync.cancel()
+    await http_client.aclose()
+    catalog.close()
 
 # API endpoints
 @app.get("/")
@@ -54,51 +234,131 @@ async def root():
     """Root endpoint to check if the service is running."""
     return {"message": "BioForge Data Pipeline Service is running"}
 
-@app.get("/api/parts/search", response_model=List[DNAPart])
+@app.get("/api/parts/search", response_model=Union[List[DNAPart], List[DNAPartSummary]], responses=PART_LIST_RESPONSES)
 async def search_parts(
     query: str = Query(None, description="Search query"),
     category: str = Query(None, description="Part category (promoter, gene, terminator, rbs, operator)"),
     source: str = Query(None, description="Data source (genbank, igem, all)"),
-    limit: int = Query(20, description="Maximum number of results to return")
+    organism: str = Query(None, description="Source organism"),
+    limit: int = Query(20, description="Maximum number of results to return (per page; in all for ndjson)"),
+    cursor: str = Query(None, description="Cursor of the next page, from the X-Next-Cursor header of the previous one"),
+    fields: str = Query("full", description="full, or summary to leave out sequences (their length is given instead)"),
+    format: str = Query("json", description="json, or ndjson to stream one part per line"),
 ):
     """
     Search for DNA parts across multiple data sources.
+    Parts are searched in the local catalog first. If it has fewer than
+    `limit` matches for the first page, the sources not searched for the
+    same query within CATALOG_REFRESH_S are searched concurrently, each
+    within its timeout, and the parts they find are added to the catalog.
+    If a source fails or times out, the results of the others are returned
+    with the missing sources listed in the X-Failed-Sources header, and not cached.
+    Catalog calls run in the threadpool; a catalog locked past its busy
+    timeout answers 503, or lists the source whose parts it could not take.
+    
+    Results are the catalog matches, then the other parts the sources
+    found, a page of `limit` at a time; while more follow, the
+    X-Next-Cursor header holds the cursor of the next page. With
+    format=ndjson, up to `limit` parts are streamed one JSON object per
+    line, read from the catalog NDJSON_BATCH_SIZE at a time; if more follow,
+    the last line is {"next_cursor": ...}.
     """
     logger.info(f"Searching for parts with query: {query}, category: {category}, source: {source}")
     
-    # Build cache key
-    cache_key = f"search_{query}_{category}_{source}_{limit}"
-    
-    # Check cache
-    if cache_key in cache:
-        cache_entry = cache[cache_key]
-        if time.time() - cache_entry["timestamp"] < cache_expiry:
-            logger.info(f"Returning cached results for {cache_key}")
-            return cache_entry["data"]
-    
-    results = []
+    if fields not in PART_FIELDS:
+        raise HTTPException(status_code=400, detail=f"fields must be one of: {', '.join(PART_FIELDS)}")
+    if format not in ("json", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be json or ndjson")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
     
-    # Search GenBank
-    if source is None or source.lower() == "all" or source.lower() == "genbank":
-        genbank_results = await search_genbank(query, category, limit)
-        results.extend(genbank_results)
+    names = [name for name in SOURCE_SEARCHES if source is None or source.lower() in ("all", name)]
+    scope = cursor_scope(query, category, names, organism)
+    try:
+        position = decode_cursor(cursor, scope)
+        if position is not None and not _is_search_position(position):
+            raise InvalidCursorError("Malformed cursor")
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    sequences = fields == "full"
     
-    # Search iGEM Registry
-    if source is None or source.lower() == "all" or source.lower() == "igem":
-        igem_results = await search_igem(query, category, limit)
-        results.extend(igem_results)
+    # Build cache key
+    cache_key = f"search_{query}_{category}_{source}_{organism}_{limit}_{fields}_{cursor}"
     
-    # Limit results
-    if len(results) > limit:
-        results = results[:limit]
+    # Check cache
+    cached = cache.get(cache_key) if format == "json" else None
+    if cached is not None:
+        logger.info(f"Returning cached results for {cache_key}")
+        return _page_response(cached["parts"], cached["next_cursor"], [])
+    
+    # Parts found by earlier upstream searches for this query, and the sources to search again
+    found, stale = [], []
+    since = time.time() - CATALOG_REFRESH_S
+    for name in names:
+        part_ids = await _in_catalog(catalog.recent_search, _search_key(name, query, category), since)
+        if part_ids is None:
+            stale.append(name)
+        else:
+            found.extend(part_ids)
+    
+    failed = []
+    if position is None and stale and not CATALOG_OFFLINE:
+        wanted = min(limit, UPSTREAM_MAX_RESULTS)
+        matches, _ = await _in_catalog(catalog.search_page, query, category, names, organism, wanted, sequences=False)
+        if len(matches) < wanted:
+            # Search the sources at once, so the latency is that of the slowest one
+            outcomes = await asyncio.gather(*(_search_source(name, query, category, wanted) for name in stale))
+            for name, parts in zip(stale, outcomes):
+                # Parts the catalog could not take are missing from the results, as if the source had failed
+                if parts is None or not await run_in_threadpool(_add_to_catalog, parts, _search_key(name, query, category)):
+                    failed.append(name)
+                    continue
+                found.extend(part.id for part in parts)
+    
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_parts(query, category, names, organism, found, position, limit, sequences, scope),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"X-Failed-Sources": ",".join(failed)} if failed else None,
+        )
     
-    # Cache results
-    cache[cache_key] = {
-        "data": results,
-        "timestamp": time.time()
-    }
+    parts, position = await _in_catalog(_merged_page, query, category, names, organism, found, position, limit, sequences)
+    next_cursor = encode_cursor(position, scope) if position is not None else None
+    if not failed:
+        cache.set(cache_key, {"parts": parts, "next_cursor": next_cursor})
     
-    return results
+    return _page_response(parts, next_cursor, failed)
+
+@app.post("/api/parts/similar", response_model=List[SimilarPart])
+async def find_similar_parts(query: SimilarityQuery):
+    """
+    Find the cataloged parts most similar to a sequence, by k-mer containment.
+    With order_by=query, parts are ranked by how much of the sequence they
+    contain; with order_by=part, by how much of them the sequence contains
+    (e.g. the parts used in a construct). Parts added to the catalog become
+    searchable within SIMILARITY_SYNC_S.
+    """
+    if query.order_by not in ("query", "part"):
+        raise HTTPException(status_code=400, detail="order_by must be 'query' or 'part'")
+    if not 1 <= query.limit <= MAX_SIMILAR_PARTS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_SIMILAR_PARTS}")
+    if len(query.sequence) < similarity_index.k:
+        raise HTTPException(status_code=400, detail=f"Sequence must be at least {similarity_index.k} bases long")
+    
+    hits = await run_in_threadpool(
+        similarity_index.search, query.sequence, query.limit, query.min_containment, query.order_by
+    )
+    parts = {part["id"]: part for part in await _in_catalog(catalog.get_many, [hit.part_id for hit in hits])}
+    return [
+        {
+            "part": parts[hit.part_id],
+            "shared_hashes": hit.shared_hashes,
+            "query_containment": hit.query_containment,
+            "part_containment": hit.part_containment,
+        }
+        for hit in hits
+        if hit.part_id in parts
+    ]
 
 @app.get("/api/parts/{part_id}", response_model=DNAPart)
 async def get_part(part_id: str):
@@ -111,17 +371,24 @@ async def get_part(part_id: str):
     cache_key = f"part_{part_id}"
     
     # Check cache
-    if cache_key in cache:
-        cache_entry = cache[cache_key]
-        if time.time() - cache_entry["timestamp"] < cache_expiry:
-            logger.info(f"Returning cached result for {cache_key}")
-            return cache_entry["data"]
+    cached = cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Returning cached result for {cache_key}")
+        return cached
+    
+    part = await _in_catalog(catalog.get, part_id)
+    if part is not None:
+        cache.set(cache_key, part)
+        return part
     
-    # Determine the source from the ID prefix
+    # Not in the catalog: determine the source from the ID prefix
     if part_id.startswith("genbank_"):
         # Get from GenBank
         genbank_id = part_id[8:]  # Remove "genbank_" prefix
-        part = await get_genbank_part(genbank_id)
+        try:
+            part = await asyncio.wait_for(get_genbank_part(genbank_id), SOURCE_TIMEOUTS["genbank"])
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail=f"GenBank did not answer within {SOURCE_TIMEOUTS['genbank']} s")
     elif part_id.startswith("igem_"):
         # Get from iGEM Registry
         igem_id = part_id[5:]  # Remove "igem_" prefix
@@ -133,10 +400,8 @@ async def get_part(part_id: str):
         raise HTTPException(status_code=404, detail=f"Part not found with ID: {part_id}")
     
     # Cache result
-    cache[cache_key] = {
-        "data": part,
-        "timestamp": time.time()
-    }
+    await run_in_threadpool(_add_to_catalog, [part])
+    cache.set(cache_key, part)
     
     return part
 
@@ -202,9 +467,25 @@ async def get_categories():
         ]
     }
 
+@app.get("/api/catalog/stats")
+async def get_catalog_stats():
+    """
+    Get the number of parts in the local catalog, per source and type, and
+    the size of the similarity index.
+    """
+    return {**await _in_catalog(catalog.stats), "similarity_index": similarity_index.info()}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """
+    Get the hit, miss and eviction counts of the result cache.
+    """
+    return cache_stats()
+
 async def search_genbank(query: Optional[str], category: Optional[str], limit: int) -> List[DNAPart]:
     """
     Search GenBank for DNA parts.
+    Raises httpx.HTTPError if NCBI cannot be reached or answers with an error.
     """
     # Build the search query
     search_query = ""
@@ -232,93 +513,25 @@ async def search_genbank(query: Optional[str], category: Optional[str], limit: i
     
     # Check cache
     cache_key = f"genbank_{search_query}_{limit}"
-    if cache_key in cache:
-        cache_entry = cache[cache_key]
-        if time.time() - cache_entry["timestamp"] < cache_expiry:
-            return cache_entry["data"]
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
     
-    # Search GenBank
-    try:
-        # Use Entrez to search GenBank
-        handle = Entrez.esearch(db="nucleotide", term=search_query, retmax=limit)
-        record = Entrez.read(handle)
-        handle.close()
-        
-        id_list = record["IdList"]
-        
-        if not id_list:
-            return []
-        
-        # Fetch the sequences
-        handle = Entrez.efetch(db="nucleotide", id=id_list, rettype="gb", retmode="text")
-        records = list(SeqIO.parse(handle, "genbank"))
-        handle.close()
-        
-        # Convert to DNAPart objects
-        parts = []
-        for record in records:
-            part_type = _determine_genbank_part_type(record)
-            
-            part = DNAPart(
-                id=f"genbank_{record.id}",
-                name=record.description[:50],  # Truncate long descriptions
-                type=part_type,
-                sequence=str(record.seq),
-                description=record.description,
-                source="GenBank",
-                metadata={
-                    "accession": record.id,
-                    "organism": record.annotations.get("organism", "Unknown"),
-                    "taxonomy": record.annotations.get("taxonomy", []),
-                    "references": [ref.title for ref in record.annotations.get("references", [])]
-                }
-            )
-            parts.append(part)
-        
-        # Cache the results
-        cache[cache_key] = {
-            "data": parts,
-            "timestamp": time.time()
-        }
-        
-        return parts
+    # Search GenBank; errors are handled by the caller
+    parts = await genbank.search(search_query, limit)
     
-    except Exception as e:
-        logger.error(f"Error fetching from GenBank: {e}")
-        return []
+    # Cache the results
+    cache.set(cache_key, parts)
+    
+    return parts
 
 async def get_genbank_part(genbank_id: str) -> Optional[DNAPart]:
     """
     Get a specific part from GenBank.
     """
     try:
-        # Fetch the sequence
-        handle = Entrez.efetch(db="nucleotide", id=genbank_id, rettype="gb", retmode="text")
-        records = list(SeqIO.parse(handle, "genbank"))
-        handle.close()
-        
-        if not records:
-            return None
-        
-        record = records[0]
-        part_type = _determine_genbank_part_type(record)
-        
-        part = DNAPart(
-            id=f"genbank_{record.id}",
-            name=record.description[:50],  # Truncate long descriptions
-            type=part_type,
-            sequence=str(record.seq),
-            description=record.description,
-            source="GenBank",
-            metadata={
-                "accession": record.id,
-                "organism": record.annotations.get("organism", "Unknown"),
-                "taxonomy": record.annotations.get("taxonomy", []),
-                "references": [ref.title for ref in record.annotations.get("references", [])]
-            }
-        )
-        
-        return part
+        parts = await genbank.fetch([genbank_id])
+        return parts[0] if parts else None
     
     except Exception as e:
         logger.error(f"Error fetching from GenBank: {e}")
@@ -351,10 +564,9 @@ async def search_igem(query: Optional[str], category: Optional[str], limit: int)
     
     # Check cache
     cache_key = f"igem_{json.dumps(search_params)}_{limit}"
-    if cache_key in cache:
-        cache_entry = cache[cache_key]
-        if time.time() - cache_entry["timestamp"] < cache_expiry:
-            return cache_entry["data"]
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     # Get sample parts
     sample_parts = _get_igem_sample_parts(category)
@@ -371,10 +583,7 @@ async def search_igem(query: Optional[str], category: Optional[str], limit: int)
         sample_parts = sample_parts[:limit]
     
     # Cache the results
-    cache[cache_key] = {
-        "data": sample_parts,
-        "timestamp": time.time()
-    }
+    cache.set(cache_key, sample_parts)
     
     return sample_parts
 
@@ -393,110 +602,155 @@ async def get_igem_part(igem_id: str) -> Optional[DNAPart]:
     
     return None
 
-def _determine_genbank_part_type(record) -> str:
+# Part search per source, in the order their results are listed
+SOURCE_SEARCHES = {
+    "genbank": search_genbank,
+    "igem": search_igem,
+}
+
+async def _in_catalog(function, *args, **kwargs):
     """
-    Determine the part type based on the GenBank record.
+    Run a catalog call in the threadpool. If the catalog stays locked by a
+    writer (e.g. a bulk load) past its busy timeout, answer 503 rather than
+    failing with an internal error.
     """
-    description = record.description.lower()
-    features = [feature.type.lower() for feature in record.features]
-    
-    if "promoter" in description or "promoter" in features:
-        return "promoter"
-    elif "terminator" in description or "terminator" in features:
-        return "terminator"
-    elif "rbs" in description or "ribosome binding site" in features:
-        return "rbs"
-    elif "operator" in description or "operator" in features:
-        return "operator"
-    elif "gene" in description or "cds" in features or "coding" in features:
-        return "gene"
+    try:
+        return await run_in_threadpool(function, *args, **kwargs)
+    except sqlite3.OperationalError as e:
+        if "locked" not in str(e):
+            raise
+        logger.warning(f"Parts catalog is locked: {e}")
+        raise HTTPException(status_code=503, detail="Parts catalog is busy, retry shortly", headers={"Retry-After": "5"})
+
+def _add_to_catalog(parts: List[DNAPart], search_key: Optional[str] = None) -> bool:
+    """
+    Add parts found upstream to the catalog, and record the search that
+    found them. Returns False if the catalog stayed locked past its busy
+    timeout; the parts are then left out until a later request finds them.
+    """
+    try:
+        catalog.upsert(part.dict() for part in parts)
+        if search_key is not None:
+            catalog.record_search(search_key, [part.id for part in parts])
+    except sqlite3.OperationalError as e:
+        if "locked" not in str(e):
+            raise
+        logger.warning(f"Parts catalog is locked, {len(parts)} parts not added: {e}")
+        return False
+    return True
+
+def _search_key(name: str, query: Optional[str], category: Optional[str]) -> str:
+    """Key under which the catalog records an upstream search."""
+    return json.dumps([name, (query or "").strip().lower(), (category or "").lower()])
+
+async def _search_source(name: str, query: Optional[str], category: Optional[str], limit: int) -> Optional[List[DNAPart]]:
+    """
+    Search one source within its timeout. Returns None if it failed or took too long.
+    """
+    try:
+        return await asyncio.wait_for(SOURCE_SEARCHES[name](query, category, limit), SOURCE_TIMEOUTS[name])
+    except asyncio.TimeoutError:
+        logger.warning(f"Search of {name} timed out after {SOURCE_TIMEOUTS[name]} s")
+    except Exception as e:
+        logger.error(f"Error searching {name}: {e}")
+    return None
+
+def _is_search_position(position: Dict[str, Any]) -> bool:
+    """Check that a decoded cursor holds a position _merged_page can resume from."""
+    if set(position) == {"after"}:
+        after = position["after"]
+        return isinstance(after, list) and len(after) == 2 and all(
+            isinstance(key, (str, int, float)) and not isinstance(key, bool) for key in after
+        )
+    if set(position) == {"found"}:
+        found = position["found"]
+        return isinstance(found, int) and not isinstance(found, bool) and found >= 0
+    return False
+
+def _merged_page(
+    query: Optional[str],
+    category: Optional[str],
+    names: List[str],
+    organism: Optional[str],
+    found: List[str],
+    position: Optional[Dict[str, Any]],
+    limit: int,
+    sequences: bool,
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Get a page of search results and the position of the next page (None
+    after the last). Results are the catalog matches in catalog order, then
+    the other parts found upstream for the query (of the organism), in
+    source order. Positions are {"after": catalog position} or {"found": offset}.
+    """
+    parts = []
+    offset = 0
+    if position is None or "after" in position:
+        parts, after = catalog.search_page(
+            query, category, names, organism, limit, position and position["after"], sequences
+        )
+        if after is not None:
+            return parts, {"after": after}
     else:
-        return "other"
+        offset = position["found"]
+    
+    found = list(dict.fromkeys(found))
+    listed = catalog.matching_ids(found, query, category, names, organism)
+    available = catalog.matching_ids(found, organism=organism)
+    others = [part_id for part_id in found if part_id in available and part_id not in listed]
+    page_ids = others[offset:offset + limit - len(parts)]
+    parts.extend(catalog.get_many(page_ids, sequences))
+    end = offset + len(page_ids)
+    return parts, ({"found": end} if end < len(others) else None)
 
-def _get_igem_sample_parts(category: Optional[str]) -> List[DNAPart]:
+def _stream_parts(
+    query: Optional[str],
+    category: Optional[str],
+    names: List[str],
+    organism: Optional[str],
+    found: List[str],
+    position: Optional[Dict[str, Any]],
+    limit: int,
+    sequences: bool,
+    scope: str,
+) -> Iterator[str]:
     """
-    Get sample parts from iGEM Registry.
-    """
-    sample_parts = [
-        DNAPart(
-            id="igem_BBa_R0010",
-            name="LacI promoter",
-            type="promoter",
-            sequence="CAATACGCAAACCGCCTCTCCCCGCGCGTTGGCCGATTCATTAATGCAGCTGGCACGACAGGTTTCCCGACTGGAAAGCGGGCAGTGAGCGCAACGCAATTAATGTGAGTTAGCTCACTCATTAGGCACCCCAGGCTTTACACTTTATGCTTCCGGCTCGTATGTTGTGTGGAATTGTGAGCGGATAACAATTTCACACA",
-            description="LacI repressible promoter",
-            source="iGEM Registry",
-            metadata={
-                "igem_id": "BBa_R0010",
-                "igem_type": "Promoter",
-                "url": "http://parts.igem.org/Part:BBa_R0010"
-            }
-        ),
-        DNAPart(
-            id="igem_BBa_B0034",
-            name="RBS",
-            type="rbs",
-            sequence="AAAGAGGAGAAA",
-            description="RBS based on Elowitz repressilator",
-            source="iGEM Registry",
-            metadata={
-                "igem_id": "BBa_B0034",
-                "igem_type": "RBS",
-                "url": "http://parts.igem.org/Part:BBa_B0034"
-            }
-        ),
-        DNAPart(
-            id="igem_BBa_E0040",
-            name="GFP",
-            type="gene",
-            sequence="ATGCGTAAAGGAGAAGAACTTTTCACTGGAGTTGTCCCAATTCTTGTTGAATTAGATGGTGATGTTAATGGGCACAAATTTTCTGTCAGTGGAGAGGGTGAAGGTGATGCAACATACGGAAAACTTACCCTTAAATTTATTTGCACTACTGGAAAACTACCTGTTCCATGGCCAACACTTGTCACTACTTTCGGTTATGGTGTTCAATGCTTTGCGAGATACCCAGATCATATGAAACAGCATGACTTTTTCAAGAGTGCCATGCCCGAAGGTTATGTACAGGAAAGAACTATATTTTTCAAAGATGACGGGAACTACAAGACACGTGCTGAAGTCAAGTTTGAAGGTGATACCCTTGTTAATAGAATCGAGTTAAAAGGTATTGATTTTAAAGAAGATGGAAACATTCTTGGACACAAATTGGAATACAACTATAACTCACACAATGTATACATCATGGCAGACAAACAAAAGAATGGAATCAAAGTTAACTTCAAAATTAGACACAACATTGAAGATGGAAGCGTTCAACTAGCAGACCATTATCAACAAAATACTCCAATTGGCGATGGCCCTGTCCTTTTACCAGACAACCATTACCTGTCCACACAATCTGCCCTTTCGAAAGATCCCAACGAAAAGAGAGACCACATGGTCCTTCTTGAGTTTGTAACAGCTGCTGGGATTACACATGGCATGGATGAACTATACAAATAATAA",
-            description="GFP generator",
-            source="iGEM Registry",
-            metadata={
-                "igem_id": "BBa_E0040",
-                "igem_type": "Coding",
-                "url": "http://parts.igem.org/Part:BBa_E0040"
-            }
-        ),
-        DNAPart(
-            id="igem_BBa_B0015",
-            name="Terminator",
-            type="terminator",
-            sequence="CCAGGCATCAAATAAAACGAAAGGCTCAGTCGAAAGACTGGGCCTTTCGTTTTATCTGTTGTTTGTCGGTGAACGCTCTCTACTAGAGTCACACTGGCTCACCTTCGGGTGGGCCTTTCTGCGTTTATA",
-            description="Double terminator",
-            source="iGEM Registry",
-            metadata={
-                "igem_id": "BBa_B0015",
-                "igem_type": "Terminator",
-                "url": "http://parts.igem.org/Part:BBa_B0015"
-            }
-        ),
-        DNAPart(
-            id="igem_BBa_C0062",
-            name="LuxR",
-            type="gene",
-            sequence="ATGAAAAACATAAATGCCGACGACACATACAGAATAATTAATAAAATTAAAGCTTGTAGAAGCAATAATGATATTAATCAATGCTTATCTGATATGACTAAAATGGTACATTGTGAATATTATTTACTCGCGATCATTTATCCTCATTCTATGGTTAAATCTGATATTTCAATCCTAGATAATTACCCTAAAAAATGGAGGCAATATTATGATGACGCTAATTTAATAAAATATGATCCTATAGTAGATTATTCTAACTCCAATCATTCACCAATTAATTGGAATATATTTGAAAACAATGCTGTAAATAAAAAATCTCCAAATGTAATTAAAGAAGCGAAAACATCAGGTCTTATCACTGGGTTTAGTTTCCCTATTCATACGGCTAACAATGGCTTCGGAATGCTTAGTTTTGCACATTCAGAAAAAGACAACTATATAGATAGTTTATTTTTACATGCGTGTATGAACATACCATTAATTGTTCCTTCTCTAGTTGATAATTATCGAAAAATAAATATAGCAAATAATAAATCAAACAACGATTTAACCAAAAGAGAAAAAGAATGTTTAGCGTGGGCATGCGAAGGAAAAAGCTCTTGGGATATTTCAAAAATATTAGGTTGCAGTGAGCGTACTGTCACTTTCCATTTAACCAATGCGCAAATGAAACTCAATACAACAAACCGCTGCCAAAGTATTTCTAAAGCAATTTTAACAGGAGCAATTGATTGCCCATACTTTAAAAATTAATAACACTGATAGTGCTAGTGTAGATCAC",
-            description="LuxR repressor/activator",
-            source="iGEM Registry",
-            metadata={
-                "igem_id": "BBa_C0062",
-                "igem_type": "Coding",
-                "url": "http://parts.igem.org/Part:BBa_C0062"
-            }
-        ),
-        DNAPart(
-            id="igem_BBa_R0062",
-            name="LuxR responsive promoter",
-            type="promoter",
-            sequence="ACCTGTAGGATCGTACAGGTTTACGCAAGAAAATGGTTTGTTATAGTCGAATAAA",
-            description="LuxR responsive promoter",
-            source="iGEM Registry",
-            metadata={
-                "igem_id": "BBa_R0062",
-                "igem_type": "Promoter",
-                "url": "http://parts.igem.org/Part:BBa_R0062"
-            }
+    Yield up to `limit` search results as NDJSON lines, reading a batch at a
+    time (in the threadpool, as a sync generator), then the next cursor if
+    more follow.
+    """
+    sent = 0
+    while sent < limit:
+        parts, position = _merged_page(
+            query, category, names, organism, found, position, min(NDJSON_BATCH_SIZE, limit - sent), sequences
         )
-    ]
+        for part in parts:
+            yield json.dumps(part) + "\n"
+        sent += len(parts)
+        if position is None:
+            return
+    yield json.dumps({"next_cursor": encode_cursor(position, scope)}) + "\n"
+
+def _page_response(parts: List[Dict[str, Any]], next_cursor: Optional[str], failed: List[str]) -> JSONResponse:
+    """A page of parts, with the cursor of the next page and the failed sources in headers."""
+    headers = {}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if failed:
+        headers["X-Failed-Sources"] = ",".join(failed)
+    return JSONResponse(content=parts, headers=headers)
+
+def _parse_genbank_parts(text: str) -> List[DNAPart]:
+    """
+    Convert GenBank flat files to DNA parts.
+    """
+    return [DNAPart(**genbank_part(record)) for record in SeqIO.parse(io.StringIO(text), "genbank")]
+
+def _get_igem_sample_parts(category: Optional[str]) -> List[DNAPart]:
+    """
+    Get sample parts from iGEM Registry (the bundled dump).
+    """
+    sample_parts = [DNAPart(**part) for part in read_igem_dump(IGEM_SAMPLE_DUMP)]
     
     if category:
         return [part for part in sample_parts if part.type == category.lower()]
@@ -0,0 +1,84 @@
+from catalog import PartsCatalog, load_dump
+from conftest import IGEM_DUMP, GENBANK_DUMP
+
+def revisions(catalog: PartsCatalog):
+    return {part_id: revision for batch in catalog.sequence_changes() for part_id, _, revision in batch}
+
+def test_upsert_counts_parts(catalog):
+    assert catalog.count() == 10
+    assert catalog.stats()["sources"]["igem"] == {"gene": 2, "promoter": 2, "rbs": 1, "terminator": 1}
+
+def test_revisions_only_change_with_the_sequence(catalog):
+    before = revisions(catalog)
+    assert sorted(before.values()) == list(range(1, 11))
+
+    part = catalog.get("igem_BBa_B0034")
+    catalog.upsert([{**part, "description": "Elowitz RBS"}])
+    assert revisions(catalog) == before
+    assert catalog.get("igem_BBa_B0034")["description"] == "Elowitz RBS"
+
+    catalog.upsert([{**part, "sequence": "AAAGAGGAGAAATACTAG"}])
+    assert revisions(catalog)["igem_BBa_B0034"] == 11
+    assert [part_id for batch in catalog.sequence_changes(10) for part_id, _, _ in batch] == ["igem_BBa_B0034"]
+
+def test_full_text_search(catalog):
+    assert [part["id"] for part in catalog.search("lux")] == ["igem_BBa_C0062", "igem_BBa_R0062"]
+    assert [part["id"] for part in catalog.search("luxr responsive")] == ["igem_BBa_R0062"]
+    assert {part["id"] for part in catalog.search("promoter", part_type="promoter")} == {
+        "igem_BBa_R0010", "igem_BBa_R0062", "genbank_BF000001.1"
+    }
+    assert [part["id"] for part in catalog.search("promoter", origins=["genbank"])] == ["genbank_BF000001.1"]
+    assert [part["id"] for part in catalog.search(organism="Escherichia coli")] == ["genbank_BF000003.1"]
+    assert catalog.search("nonexistent") == []
+
+def test_accession_lookup_finds_latest_version(catalog):
+    assert catalog.get("genbank_BF000002.1")["metadata"]["accession"] == "BF000002.1"
+    assert catalog.get("genbank_BF000002")["id"] == "genbank_BF000002.1"
+
+    part = catalog.get("genbank_BF000002.1")
+    catalog.upsert([{**part, "id": "genbank_BF000002.2", "metadata": {**part["metadata"], "accession": "BF000002.2"}}])
+    assert catalog.get("genbank_BF000002")["id"] == "genbank_BF000002.2"
+    assert catalog.get("genbank_BF00000") is None
+    assert catalog.get("igem_BBa_R0010")["name"] == "LacI promoter"
+
+def test_search_pages_follow_the_full_listing(catalog):
+    for query in (None, "promoter"):
+        listing = [part["id"] for part in catalog.search(query, limit=100)]
+        paged, after = [], None
+        while True:
+            parts, after = catalog.search_page(query, limit=3, after=after)
+            paged.extend(part["id"] for part in parts)
+            if after is None:
+                break
+        assert paged == listing
+
+def test_search_page_cursor_is_stable_under_inserts(catalog):
+    first, after = catalog.search_page(limit=4)
+    rest = [part["id"] for part in catalog.search(limit=100)][4:]
+    catalog.upsert([{"id": "igem_BBa_A0001", "name": "AAA", "type": "other", "sequence": "ACGT"}])
+
+    paged = []
+    while after is not None:
+        parts, after = catalog.search_page(limit=4, after=after)
+        paged.extend(part["id"] for part in parts)
+    assert paged == rest
+
+def test_search_page_without_sequences(catalog):
+    parts, _ = catalog.search_page("lux", sequences=False)
+    assert [part["length"] for part in parts] == [len(catalog.get(part["id"])["sequence"]) for part in parts]
+    assert all("sequence" not in part for part in parts)
+
+def test_recorded_searches(catalog):
+    catalog.record_search("key", ["igem_BBa_R0010"])
+    assert catalog.recent_search("key", 0) == ["igem_BBa_R0010"]
+    assert catalog.recent_search("key", float("inf")) is None
+    assert catalog.recent_search("other", 0) is None
+
+def test_dumps_are_read_by_extension(tmp_path):
+    catalog = PartsCatalog(str(tmp_path / "catalog.db"))
+    try:
+        assert load_dump(catalog, GENBANK_DUMP, batch_size=3) == 4
+        assert load_dump(catalog, IGEM_DUMP, batch_size=4) == 6
+        assert catalog.count() == 10
+    finally:
+        catalog.close()
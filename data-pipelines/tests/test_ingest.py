@@ -0,0 +1,48 @@
+import pytest
+import ingest
+from catalog import PartsCatalog
+from conftest import FIXTURES, GENBANK_DUMP, IGEM_DUMP
+
+@pytest.mark.parametrize("dump, records", [(GENBANK_DUMP, 4), (IGEM_DUMP, 6)])
+def test_interrupted_ingest_resumes_after_last_batch(tmp_path, monkeypatch, dump, records):
+    catalog_path = str(tmp_path / "catalog.db")
+    read_dump = ingest.read_dump
+
+    def failing_read_dump(path, skip=0):
+        for index, part in enumerate(read_dump(path, skip)):
+            if index == 3:
+                raise RuntimeError("interrupted")
+            yield part
+
+    monkeypatch.setattr(ingest, "read_dump", failing_read_dump)
+    with pytest.raises(RuntimeError):
+        ingest.ingest_file(catalog_path, dump, batch_size=2)
+    monkeypatch.setattr(ingest, "read_dump", read_dump)
+
+    # Only the first batch was committed, with its checkpoint
+    catalog = PartsCatalog(catalog_path)
+    try:
+        assert catalog.count() == 2
+    finally:
+        catalog.close()
+
+    result = ingest.ingest_file(catalog_path, dump, batch_size=2)
+    assert (result.resumed_from, result.records, result.skipped) == (2, records - 2, False)
+    assert ingest.ingest_file(catalog_path, dump).skipped
+
+    catalog = PartsCatalog(catalog_path)
+    try:
+        assert catalog.count() == records
+        assert sorted(revision for batch in catalog.sequence_changes() for _, _, revision in batch) == list(range(1, records + 1))
+    finally:
+        catalog.close()
+
+def test_restart_loads_dumps_again(tmp_path):
+    catalog_path = str(tmp_path / "catalog.db")
+    assert sum(result.records for result in ingest.ingest(catalog_path, [GENBANK_DUMP, IGEM_DUMP], workers=1)) == 10
+    assert all(result.skipped for result in ingest.ingest(catalog_path, [GENBANK_DUMP, IGEM_DUMP], workers=1))
+    results = list(ingest.ingest(catalog_path, [GENBANK_DUMP, IGEM_DUMP], workers=1, restart=True))
+    assert [result.records for result in results] == [4, 6]
+
+def test_dump_directories_are_expanded():
+    assert list(ingest.dump_files([FIXTURES])) == [GENBANK_DUMP, IGEM_DUMP]
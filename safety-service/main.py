@@ -2,9 +2,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Dict, Any, List, Optional
-import re
+import os
 import time
 import logging
+from bioforge_seqkit import DesignScanner, SignatureDatabase, cache_stats, create_cache, encode, find_homopolymers
+from bioforge_seqkit import gc_content as calculate_gc_content
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -44,29 +46,16 @@ class DNADesign(BaseModel):
     user_id: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
 
-# Load dangerous sequence patterns
-# In a real implementation, these would be loaded from a database or file
-DANGEROUS_PATTERNS = [
-    # Toxin genes
-    "ATGCCGGTGATGCGGTGCG",  # Example pattern for a toxin gene
-    "ATGGCGCAACTGCAACGCG",  # Example pattern for another toxin gene
-    
-    # Antibiotic resistance genes
-    "ATGGCGACCGAACGCGCGG",  # Example pattern for an antibiotic resistance gene
-    
-    # Virulence factors
-    "ATGCGCGTGCAACTGCGCG",  # Example pattern for a virulence factor
-]
+# Load the hazard signature database
+# SIGNATURE_INDEX_PATH points at an index compiled with `python -m bioforge_seqkit.signatures compile`;
+# it is memory-mapped (shared by all workers) and reloaded when the file is replaced.
+# Without it, the example signatures bundled with bioforge_seqkit are used.
+SIGNATURE_INDEX_PATH = os.environ.get("SIGNATURE_INDEX_PATH")
+signature_database = SignatureDatabase(SIGNATURE_INDEX_PATH)
+logger.info(f"Loaded signature index version {signature_database.info()['version']}")
 
-# Load restricted organisms
-RESTRICTED_ORGANISMS = [
-    "Bacillus anthracis",
-    "Yersinia pestis",
-    "Francisella tularensis",
-    "Variola virus",
-    "Ebola virus",
-    "Marburg virus",
-]
+# Parts recur across designs: screen each part once and rescan only the junctions between parts
+design_scanner = DesignScanner(create_cache("safety_parts", ttl=3600))
 
 # API endpoints
 @app.get("/")
@@ -74,13 +63,37 @@ async def root():
     """Root endpoint to check if the service is running."""
     return {"message": "BioForge Safety Service is running"}
 
+@app.get("/api/safety/signatures")
+async def get_signature_index():
+    """Describe the loaded hazard signature index."""
+    return signature_database.info()
+
+@app.post("/api/safety/signatures/reload")
+async def reload_signature_index():
+    """Reload the hazard signature index from disk."""
+    if not signature_database.path:
+        raise HTTPException(status_code=400, detail="No signature index file configured")
+    try:
+        signature_database.reload()
+    except (OSError, ValueError) as e:
+        logger.error(f"Error reloading signature index: {e}")
+        raise HTTPException(status_code=500, detail="Signature index could not be loaded")
+    logger.info(f"Reloaded signature index version {signature_database.info()['version']}")
+    return signature_database.info()
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get the hit, miss and eviction counts of the part scan cache."""
+    return cache_stats()
+
 @app.post("/api/safety/check")
 async def check_safety(design: DNADesign):
     """Check the safety of a DNA design."""
     logger.info(f"Checking safety for design: {design.name}")
     
-    # Get the full sequence
-    full_sequence = "".join([part.sequence for part in design.parts])
+    # Screen both stages per part (cached) and at the junctions between parts
+    signatures = signature_database.current()
+    scan = design_scanner.scan(signatures, [part.sequence for part in design.parts])
     
     # Initialize safety scores
     overall_score = 0.9  # Start with a high score and deduct based on issues
@@ -89,16 +102,23 @@ async def check_safety(design: DNADesign):
     biocontainment_score = 0.9  # Start with a high biocontainment score
     
     # Check for dangerous sequences
-    dangerous_matches = []
-    for pattern in DANGEROUS_PATTERNS:
-        if re.search(pattern, full_sequence, re.IGNORECASE):
-            dangerous_matches.append(pattern)
+    dangerous_hits = scan.hits
+    dangerous_matches = list(dict.fromkeys(hit.pattern_id for hit in dangerous_hits))
     
     if dangerous_matches:
         overall_score -= 0.3
         toxicity_score += 0.3
         environmental_risk_score += 0.2
     
+    # Check for near matches (mutated or recoded variants) of signatures not matched exactly
+    similar_hits = [hit for hit in scan.similar_hits if hit.pattern_id not in dangerous_matches]
+    similar_matches = list(dict.fromkeys(hit.pattern_id for hit in similar_hits))
+    
+    if similar_matches:
+        overall_score -= 0.2
+        toxicity_score += 0.2
+        environmental_risk_score += 0.1
+    
     # Check for antibiotic resistance genes
     has_antibiotic_resistance = any(
         part.name.lower().find("antibiotic") != -1 or 
@@ -135,7 +155,7 @@ async def check_safety(design: DNADesign):
     
     # Check for restricted organisms
     restricted_organism_matches = []
-    for organism in RESTRICTED_ORGANISMS:
+    for organism in signatures.restricted_organisms:
         if (design.description and organism.lower() in design.description.lower()) or any(
             organism.lower() in part.description.lower() if part.description else False
             for part in design.parts
@@ -154,6 +174,9 @@ async def check_safety(design: DNADesign):
     if not has_kill_switch:
         recommendations.append("Consider adding a kill switch for improved biocontainment")
     
+    if similar_matches:
+        recommendations.append("Design contains sequences similar to known hazardous signatures. Manual review is recommended")
+    
     if has_antibiotic_resistance:
         recommendations.append("Antibiotic resistance genes pose environmental risks. Consider alternative selection markers")
     
@@ -179,7 +202,11 @@ async def check_safety(design: DNADesign):
         "environmental_risk": environmental_risk_score,
         "biocontainment": biocontainment_score,
         "dangerous_sequences": len(dangerous_matches),
+        "dangerous_hits": [hit._asdict() for hit in dangerous_hits],
+        "similar_sequences": len(similar_matches),
+        "similar_hits": [hit._asdict() for hit in similar_hits],
         "restricted_organisms": restricted_organism_matches,
+        "signature_index_version": signatures.version,
         "recommendations": recommendations,
         "regulatory_flags": {
             "dual_use_research_of_concern": overall_score < 0.5,
@@ -195,36 +222,37 @@ async def analyze_sequence(sequence: str):
     """Analyze a DNA sequence for safety concerns."""
     logger.info(f"Analyzing sequence of length: {len(sequence)}")
     
-    # Check for dangerous sequences
-    dangerous_matches = []
-    for pattern in DANGEROUS_PATTERNS:
-        if re.search(pattern, sequence, re.IGNORECASE):
-            dangerous_matches.append(pattern)
+    # Encode the sequence once for screening, GC content and homopolymer detection
+    codes = encode(sequence)
     
-    # Calculate GC content
-    gc_count = sequence.upper().count("G") + sequence.upper().count("C")
-    gc_content = gc_count / len(sequence) if len(sequence) > 0 else 0
+    # Check for dangerous sequences
+    signatures = signature_database.current()
+    dangerous_hits = signatures.matcher.scan(codes)
+    dangerous_matches = list(dict.fromkeys(hit.pattern_id for hit in dangerous_hits))
+    similar_hits = [hit for hit in signatures.homology.screen(codes) if hit.pattern_id not in dangerous_matches]
+    gc_content = calculate_gc_content(codes)
     
     # Check for homopolymers (runs of the same nucleotide)
-    homopolymers = []
-    for base in "ATGC":
-        pattern = base * 6  # Look for runs of 6 or more
-        if pattern in sequence.upper():
-            homopolymers.append(f"{base}x6+")
+    homopolymers = [str(run) for run in find_homopolymers(codes)]
     
     # Prepare the result
     result = {
         "sequence_length": len(sequence),
         "gc_content": gc_content,
         "dangerous_patterns": len(dangerous_matches) > 0,
+        "dangerous_hits": [hit._asdict() for hit in dangerous_hits],
+        "similar_hits": [hit._asdict() for hit in similar_hits],
         "homopolymers": homopolymers,
-        "safety_concerns": len(dangerous_matches) > 0,
+        "safety_concerns": len(dangerous_matches) > 0 or len(similar_hits) > 0,
         "recommendations": []
     }
     
     if len(dangerous_matches) > 0:
         result["recommendations"].append("Sequence contains patterns associated with dangerous genes")
     
+    if similar_hits:
+        result["recommendations"].append("Sequence is similar to known hazardous signatures")
+    
     if homopolymers:
         result["recommendations"].append("Sequence contains homopolymer regions which may affect stability")
     
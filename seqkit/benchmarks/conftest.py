@@ -0,0 +1,19 @@
+"""
+Benchmarks for the sequence toolkit, run with pytest-benchmark:
+
+    cd seqkit && pytest benchmarks --benchmark-autosave
+    pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:25%
+
+Every case is parametrized by its size (sequence length, signature count,
+part count, designs, trajectories or pathway steps), so how a case scales is
+visible in one run, and --benchmark-compare catches regressions against a
+saved one.
+"""
+import random
+
+def random_sequence(length: int, seed: int = 0) -> str:
+    """
+    Generate a reproducible random DNA sequence.
+    """
+    rng = random.Random(seed)
+    return "".join(rng.choice("ACGT") for _ in range(length))
@@ -0,0 +1,49 @@
+import random
+import pytest
+from conftest import random_sequence
+from bioforge_seqkit.homology import HomologyIndex
+from bioforge_seqkit.screening import PatternMatcher
+
+# Signature-set sizes for the screening benchmark; scan time should stay flat
+SIGNATURE_COUNTS = [4, 100, 1_000, 10_000, 100_000]
+SIGNATURE_LENGTH = 20
+SCREENED_LENGTH = 50_000
+
+# Homology screening: gene-sized signatures against one screened sequence
+HOMOLOGY_SIGNATURE_COUNTS = [100, 1_000, 10_000]
+HOMOLOGY_SIGNATURE_LENGTH = 1_000
+
+@pytest.fixture(scope="module")
+def screened():
+    return random_sequence(SCREENED_LENGTH)
+
+def short_signatures(count):
+    rng = random.Random(1)
+    return [(f"sig_{i}", "".join(rng.choice("ACGT") for _ in range(SIGNATURE_LENGTH))) for i in range(count)]
+
+def gene_signatures(count):
+    return [(f"sig_{i}", random_sequence(HOMOLOGY_SIGNATURE_LENGTH, seed=1_000 + i)) for i in range(count)]
+
+@pytest.mark.benchmark(group="matcher_build")
+@pytest.mark.parametrize("count", SIGNATURE_COUNTS)
+def test_matcher_build(benchmark, count):
+    signatures = short_signatures(count)
+    benchmark.pedantic(PatternMatcher, (signatures,), rounds=1)
+
+@pytest.mark.benchmark(group="matcher_scan_50kb")
+@pytest.mark.parametrize("count", SIGNATURE_COUNTS)
+def test_matcher_scan(benchmark, screened, count):
+    matcher = PatternMatcher(short_signatures(count))
+    benchmark.pedantic(matcher.scan, (screened,), rounds=3)
+
+@pytest.mark.benchmark(group="homology_build")
+@pytest.mark.parametrize("count", HOMOLOGY_SIGNATURE_COUNTS)
+def test_homology_build(benchmark, count):
+    signatures = gene_signatures(count)
+    benchmark.pedantic(HomologyIndex.build, (signatures,), rounds=1)
+
+@pytest.mark.benchmark(group="homology_screen_50kb")
+@pytest.mark.parametrize("count", HOMOLOGY_SIGNATURE_COUNTS)
+def test_homology_screen(benchmark, screened, count):
+    index = HomologyIndex.build(gene_signatures(count))
+    benchmark.pedantic(index.screen, (screened,), rounds=3)
@@ -0,0 +1,36 @@
+import pytest
+from conftest import random_sequence
+from bioforge_seqkit.analysis import analyze_sequence, find_homopolymers, find_rare_codons, gc_content
+from bioforge_seqkit.encoding import encode
+from bioforge_seqkit.orf import find_orfs
+
+SEQUENCE_LENGTHS = [1_000, 10_000, 100_000]
+
+@pytest.fixture(scope="module", params=SEQUENCE_LENGTHS)
+def sequence(request):
+    return random_sequence(request.param)
+
+@pytest.mark.benchmark(group="encode")
+def test_encode(benchmark, sequence):
+    benchmark(encode, sequence)
+
+@pytest.mark.benchmark(group="gc_content")
+def test_gc_content(benchmark, sequence):
+    benchmark(gc_content, encode(sequence))
+
+@pytest.mark.benchmark(group="find_homopolymers")
+def test_find_homopolymers(benchmark, sequence):
+    benchmark(find_homopolymers, encode(sequence))
+
+@pytest.mark.benchmark(group="find_orfs")
+def test_find_orfs(benchmark, sequence):
+    benchmark(find_orfs, encode(sequence))
+
+@pytest.mark.benchmark(group="find_rare_codons")
+def test_find_rare_codons(benchmark, sequence):
+    codes = encode(sequence)
+    benchmark(find_rare_codons, codes, find_orfs(codes))
+
+@pytest.mark.benchmark(group="analyze_sequence")
+def test_analyze_sequence(benchmark, sequence):
+    benchmark(analyze_sequence, sequence)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+from bioforge_seqkit.similarity import SimilarityIndex
+
+# Similarity search over catalogs of part-sized sequences; search time should stay flat
+SIMILARITY_PART_COUNTS = [1_000, 10_000, 100_000]
+SIMILARITY_PART_LENGTH = 500
+SIMILARITY_QUERY_LENGTH = 1_000
+
+def random_parts(count):
+    rng = np.random.default_rng(3)
+    return [(f"part_{i}", rng.integers(0, 4, SIMILARITY_PART_LENGTH, dtype=np.uint8)) for i in range(count)]
+
+def build(parts):
+    index = SimilarityIndex()
+    index.add(parts)
+    return index
+
+@pytest.mark.benchmark(group="similarity_build")
+@pytest.mark.parametrize("count", SIMILARITY_PART_COUNTS)
+def test_similarity_build(benchmark, count):
+    parts = random_parts(count)
+    benchmark.pedantic(build, (parts,), rounds=1)
+
+@pytest.mark.benchmark(group="similarity_search_1kb")
+@pytest.mark.parametrize("count", SIMILARITY_PART_COUNTS)
+def test_similarity_search(benchmark, count):
+    # A query holding two of the parts
+    parts = random_parts(count)
+    query = np.concatenate([parts[0][1], parts[-1][1]])[:SIMILARITY_QUERY_LENGTH]
+    index = build(parts)
+    benchmark.pedantic(index.search, (query,), rounds=3)
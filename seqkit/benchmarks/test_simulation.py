@@ -0,0 +1,75 @@
+import random
+import pytest
+from bioforge_seqkit.kinetics import cassette, integrate, integrate_chunks, rate_arrays
+from bioforge_seqkit.pathway import simulate_pathway
+from bioforge_seqkit.stochastic import EnsembleRunner
+
+# Gene expression ODEs: designs integrated in one batch over 24 h
+KINETICS_DESIGN_COUNTS = [100, 1_000, 10_000]
+KINETICS_TIME_POINTS = 1_000
+
+# Streamed integration of one design: time to the first chunk should stay flat with the horizon
+STREAM_TIME_POINTS = [10_000, 1_000_000]
+
+# Stochastic ensembles of one design over 24 h, in one process
+ENSEMBLE_TRAJECTORIES = [250, 1_000]
+ENSEMBLE_TIME_POINTS = 100
+
+# Coupled pathways with one step per design
+PATHWAY_STEPS = [5, 50]
+PATHWAY_TIME_POINTS = 1_000
+
+def hours(points):
+    return [24.0 * i / (points - 1) for i in range(points)]
+
+def design_rates(count):
+    """Rates of designs with random part strengths."""
+    rng = random.Random(2)
+    cassettes = [
+        cassette([
+            ("promoter", {"strength": rng.random()}),
+            ("rbs", {"strength": rng.random()}),
+            ("gene", None),
+            ("terminator", {"efficiency": rng.random()}),
+        ])
+        for _ in range(count)
+    ]
+    return rate_arrays(cassettes, [rng.uniform(0.5, 1.0) for _ in range(count)], [1.0] * count)
+
+@pytest.mark.benchmark(group="kinetics_rk4_1k_points")
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("count", KINETICS_DESIGN_COUNTS)
+def test_kinetics(benchmark, count, dtype):
+    rates = design_rates(count)
+    benchmark.pedantic(integrate, (rates, hours(KINETICS_TIME_POINTS)), {"dtype": dtype}, rounds=3)
+
+@pytest.mark.benchmark(group="kinetics_first_chunk")
+@pytest.mark.parametrize("points", STREAM_TIME_POINTS)
+def test_kinetics_first_chunk(benchmark, points):
+    rates = rate_arrays([cassette([("promoter", None), ("rbs", None), ("gene", None), ("terminator", None)])], [1.0], [1.0])
+    times = hours(points)
+    benchmark.pedantic(lambda: next(integrate_chunks(rates, times)), rounds=3)
+
+@pytest.mark.benchmark(group="tau_leap_100_points")
+@pytest.mark.parametrize("trajectories", ENSEMBLE_TRAJECTORIES)
+def test_tau_leap(benchmark, trajectories):
+    # A low-copy design
+    unit = cassette([("promoter", {"strength": 0.05}), ("rbs", {"strength": 0.3}), ("gene", None), ("terminator", None)])
+    rates = rate_arrays([unit], [1.0], [1.0])
+    times = hours(ENSEMBLE_TIME_POINTS)
+    density = integrate(rates, times)["density"][0]
+    row = {name: values[0] for name, values in rates.items()}
+    runner = EnsembleRunner(max_workers=1)
+    try:
+        benchmark.pedantic(runner.run, (row, times, density, trajectories), {"seed": 0}, rounds=3)
+    finally:
+        runner.shutdown()
+
+@pytest.mark.benchmark(group="pathway_1k_points")
+@pytest.mark.parametrize("steps", PATHWAY_STEPS)
+def test_pathway(benchmark, steps):
+    # Linear pathways with ramping enzyme levels
+    rng = random.Random(steps)
+    enzymes = [[rng.random() * i / PATHWAY_TIME_POINTS for i in range(PATHWAY_TIME_POINTS)] for _ in range(steps)]
+    kcat = [rng.uniform(0.5, 2.0) for _ in range(steps)]
+    benchmark.pedantic(simulate_pathway, (enzymes, hours(PATHWAY_TIME_POINTS), kcat, [0.5] * steps), rounds=3)
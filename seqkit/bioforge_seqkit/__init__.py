@@ -0,0 +1,76 @@
+"""
+Shared sequence-analysis toolkit for the BioForge services.
+"""
+from bioforge_seqkit.encoding import encode, reverse_complement_codes
+from bioforge_seqkit.orf import ORF, find_orfs, orf_sequence
+from bioforge_seqkit.analysis import (
+    ECOLI_RARE_CODONS,
+    Homopolymer,
+    SequenceAnalysis,
+    analyze_sequence,
+    find_homopolymers,
+    find_invalid_chars,
+    find_rare_codons,
+    gc_content,
+)
+from bioforge_seqkit.screening import Hit, PatternMatcher
+from bioforge_seqkit.homology import HomologyHit, HomologyIndex
+from bioforge_seqkit.signatures import SignatureDatabase, SignatureIndex
+from bioforge_seqkit.batching import BoundedExecutor, MicroBatcher, QueueFullError
+from bioforge_seqkit.registry import ModelRegistry, ModelUnavailableError
+from bioforge_seqkit.embeddings import EmbeddingStore
+from bioforge_seqkit.cache import Cache, MemoryBackend, RedisBackend, cache_stats, create_cache
+from bioforge_seqkit.fingerprint import design_fingerprint, sequence_fingerprint
+from bioforge_seqkit.composition import DesignScan, DesignScanner
+from bioforge_seqkit.similarity import SimilarityHit, SimilarityIndex
+from bioforge_seqkit.pagination import (
+    NDJSON_MEDIA_TYPE,
+    InvalidCursorError,
+    cursor_scope,
+    decode_cursor,
+    encode_cursor,
+)
+
+__all__ = [
+    "encode",
+    "reverse_complement_codes",
+    "ORF",
+    "find_orfs",
+    "orf_sequence",
+    "ECOLI_RARE_CODONS",
+    "Homopolymer",
+    "SequenceAnalysis",
+    "analyze_sequence",
+    "find_homopolymers",
+    "find_invalid_chars",
+    "find_rare_codons",
+    "gc_content",
+    "Hit",
+    "PatternMatcher",
+    "HomologyHit",
+    "HomologyIndex",
+    "SignatureDatabase",
+    "SignatureIndex",
+    "BoundedExecutor",
+    "MicroBatcher",
+    "QueueFullError",
+    "ModelRegistry",
+    "ModelUnavailableError",
+    "EmbeddingStore",
+    "Cache",
+    "MemoryBackend",
+    "RedisBackend",
+    "cache_stats",
+    "create_cache",
+    "design_fingerprint",
+    "sequence_fingerprint",
+    "DesignScan",
+    "DesignScanner",
+    "SimilarityHit",
+    "SimilarityIndex",
+    "NDJSON_MEDIA_TYPE",
+    "InvalidCursorError",
+    "cursor_scope",
+    "decode_cursor",
+    "encode_cursor",
+]
@@ -0,0 +1,135 @@
+from typing import List, NamedTuple, Optional, Sequence
+import numpy as np
+
+from bioforge_seqkit.encoding import INVALID, SequenceLike, as_codes, encode, reverse_complement_codes, codon_codes, codon_code
+from bioforge_seqkit.orf import ORF, find_orfs
+
+BASES = "ACGT"
+
+# E. coli rare codons
+ECOLI_RARE_CODONS = ["CTA", "ATA", "CGA", "CGG", "AGG", "AGA", "CCC", "TCG"]
+
+class Homopolymer(NamedTuple):
+    """
+    A run of a single nucleotide.
+    """
+    base: str
+    start: int
+    length: int
+
+    def __str__(self) -> str:
+        return f"{self.base}x{self.length}"
+
+class SequenceAnalysis(NamedTuple):
+    """
+    Results of a full analysis pass over a DNA sequence.
+    """
+    length: int
+    invalid_chars: List[str]
+    gc_content: float
+    homopolymers: List[Homopolymer]
+    orfs: List[ORF]
+    rare_codons: List[str]
+
+def gc_content(sequence: SequenceLike) -> float:
+    """
+    Calculate the GC content of a DNA sequence.
+    """
+    codes = as_codes(sequence)
+    if len(codes) == 0:
+        return 0
+    return int(np.count_nonzero((codes == 1) | (codes == 2))) / len(codes)
+
+def find_invalid_chars(sequence: str, codes: Optional[np.ndarray] = None) -> List[str]:
+    """
+    Find the distinct non-ACGT characters in a DNA sequence.
+    """
+    if codes is None:
+        codes = encode(sequence)
+    positions = np.flatnonzero(codes == INVALID)
+    if len(positions) == 0:
+        return []
+    raw = np.frombuffer(sequence.encode("ascii", errors="replace"), dtype=np.uint8)
+    return sorted({chr(char).upper() for char in np.unique(raw[positions]).tolist()})
+
+def find_homopolymers(sequence: SequenceLike, min_length: int = 6) -> List[Homopolymer]:
+    """
+    Find homopolymer regions (runs of the same nucleotide) in a DNA sequence.
+    """
+    codes = as_codes(sequence)
+    if len(codes) == 0:
+        return []
+
+    run_starts = np.concatenate(([0], np.flatnonzero(codes[1:] != codes[:-1]) + 1))
+    run_lengths = np.diff(np.append(run_starts, len(codes)))
+    keep = (run_lengths >= min_length) & (codes[run_starts] != INVALID)
+
+    return [
+        Homopolymer(BASES[code], start, length)
+        for code, start, length in zip(
+            codes[run_starts[keep]].tolist(), run_starts[keep].tolist(), run_lengths[keep].tolist()
+        )
+    ]
+
+def find_rare_codons(
+    sequence: SequenceLike,
+    orfs: Optional[List[ORF]] = None,
+    rare_codons: Sequence[str] = ECOLI_RARE_CODONS,
+) -> List[str]:
+    """
+    Find the rare codons used in-frame within the open reading frames of a DNA sequence.
+    Returns the distinct codons found, in the order they appear in `rare_codons`.
+    """
+    codes = as_codes(sequence)
+    if orfs is None:
+        orfs = find_orfs(codes)
+    if not orfs:
+        return []
+
+    n = len(codes)
+    rare = np.array([codon_code(codon) for codon in rare_codons])
+    used = np.zeros(len(rare), dtype=bool)
+
+    for strand in (1, -1):
+        strand_orfs = [orf for orf in orfs if orf.strand == strand]
+        if not strand_orfs:
+            continue
+        codons = codon_codes(codes if strand == 1 else reverse_complement_codes(codes))
+        starts = np.array([orf.start if strand == 1 else n - orf.end for orf in strand_orfs])
+        lengths = np.array([orf.length for orf in strand_orfs])
+
+        # Mark every codon position covered by an ORF, frame by frame
+        for frame in range(3):
+            frame_codons = codons[frame::3]
+            in_frame = starts % 3 == frame
+            if not in_frame.any():
+                continue
+            first = (starts[in_frame] - frame) // 3
+            last = first + lengths[in_frame] // 3
+            coverage = np.zeros(len(frame_codons) + 1, dtype=np.int32)
+            np.add.at(coverage, first, 1)
+            np.add.at(coverage, last, -1)
+            covered = np.cumsum(coverage[:-1]) > 0
+            used |= np.isin(rare, frame_codons[covered])
+
+    return [codon for codon, found in zip(rare_codons, used.tolist()) if found]
+
+def analyze_sequence(sequence: str, min_orf_length: int = 30, homopolymer_length: int = 6) -> SequenceAnalysis:
+    """
+    Analyze a DNA sequence with a single encoding pass.
+    ORFs, homopolymers and rare codons are only computed for valid sequences.
+    """
+    codes = encode(sequence)
+    invalid_chars = find_invalid_chars(sequence, codes)
+    if invalid_chars:
+        return SequenceAnalysis(len(codes), invalid_chars, gc_content(codes), [], [], [])
+
+    orfs = find_orfs(codes, min_orf_length)
+    return SequenceAnalysis(
+        length=len(codes),
+        invalid_chars=[],
+        gc_content=gc_content(codes),
+        homopolymers=find_homopolymers(codes, homopolymer_length),
+        orfs=orfs,
+        rare_codons=find_rare_codons(codes, orfs),
+    )
@@ -0,0 +1,327 @@
+"""
+Scheduling for blocking model inference.
+
+MicroBatcher groups concurrent requests into batches for one model;
+BoundedExecutor runs blocking calls (e.g. structure prediction) on a small
+thread pool. Both keep inference off the event loop, reject work with
+QueueFullError once their queue is full, and support per-request timeouts.
+
+Dynamic micro-batching:
+
+Requests are queued and grouped into batches by a dedicated worker thread. A
+batch is dispatched once its oldest request has waited `max_wait_ms`, or as
+soon as enough requests are pending to fill `max_batch_tokens` or
+`max_batch_size`. Each batch is built around the oldest pending request from
+the requests closest to it in length, so padded batches waste little compute
+and no request starves. Every caller gets its own future.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import threading
+import time
+
+class QueueFullError(RuntimeError):
+    """
+    Raised when an inference queue is at capacity. Services map it to HTTP 429.
+    """
+
+class _Request:
+    __slots__ = ("item", "tokens", "future", "enqueued_at")
+
+    def __init__(self, item: Any, tokens: int):
+        self.item = item
+        self.tokens = tokens
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+class MicroBatcher:
+    """
+    Queue in front of a batch inference function.
+    `run_batch` receives a list of items (e.g. protein sequences) and must
+    return one result per item, in the same order. It is only ever called
+    from the batcher's worker thread.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Sequence[Any]],
+        max_wait_ms: float = 10.0,
+        max_batch_tokens: int = 8192,
+        max_batch_size: int = 32,
+        max_padding: float = 0.25,
+        max_queue: Optional[int] = None,
+        token_overhead: int = 2,
+        name: str = "batcher",
+    ):
+        """
+        `token_overhead` is added to each item's length to count special
+        tokens (ESM adds BOS and EOS). Batches are limited by padded size,
+        i.e. batch size times the longest item's token count, and a request
+        only joins a batch if at most `max_padding` of the padded batch would
+        be padding. With `max_queue` set, `submit` raises QueueFullError
+        instead of queueing more than that many requests.
+        """
+        self.run_batch = run_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_padding = max_padding
+        self.max_queue = max_queue
+        self.token_overhead = token_overhead
+        self.name = name
+
+        self._condition = threading.Condition()
+        self._pending: List[_Request] = []
+        self._pending_tokens = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+        self.requests_total = 0
+        self.rejected_total = 0
+        self.timeouts_total = 0
+        self.batches_total = 0
+        self.tokens_total = 0
+        self.padded_tokens_total = 0
+        self.batch_seconds_total = 0.0
+        self.batch_sizes: Dict[int, int] = {}
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+
+    def start(self):
+        """
+        Start the worker thread. Called automatically by the first `submit`.
+        """
+        with self._condition:
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._worker, name=f"{self.name}-inference", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stop the worker after its current batch. Requests still queued fail with RuntimeError.
+        """
+        with self._condition:
+            self._stopped = True
+            pending, self._pending = self._pending, []
+            self._pending_tokens = 0
+            self._condition.notify_all()
+        for request in pending:
+            if request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError(f"{self.name} stopped"))
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue one item and get a future for its result.
+        """
+        request = _Request(item, len(item) + self.token_overhead)
+        self.start()
+        with self._condition:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} is stopped")
+            if self.max_queue is not None and len(self._pending) >= self.max_queue:
+                self.rejected_total += 1
+                raise QueueFullError(f"{self.name} queue is full ({self.max_queue} requests)")
+            self._pending.append(request)
+            self._pending_tokens += request.tokens
+            self._condition.notify()
+        return request.future
+
+    async def run(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Queue one item and wait for its result without blocking the event loop.
+        Raises asyncio.TimeoutError after `timeout` seconds. A request that
+        times out or is cancelled is dropped if its batch has not started.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(item)), timeout)
+        except asyncio.TimeoutError:
+            with self._condition:
+                self.timeouts_total += 1
+            raise
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._condition:
+            batches = self.batches_total
+            return {
+                "queue_depth": len(self._pending),
+                "requests_total": self.requests_total,
+                "rejected_total": self.rejected_total,
+                "timeouts_total": self.timeouts_total,
+                "batches_total": batches,
+                "mean_batch_size": self.requests_total / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "last_batch_size": self.last_batch_size,
+                "last_batch_ms": self.last_batch_ms,
+                "mean_batch_ms": self.batch_seconds_total * 1000 / batches if batches else 0.0,
+                "token_utilization": self.tokens_total / self.padded_tokens_total if self.padded_tokens_total else 1.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "max_batch_tokens": self.max_batch_tokens,
+                "max_batch_size": self.max_batch_size,
+                "max_padding": self.max_padding,
+                "max_queue": self.max_queue,
+            }
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._batch_due():
+                    timeout = None
+                    if self._pending:
+                        timeout = self._pending[0].enqueued_at + self.max_wait - time.monotonic()
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                batch = self._take_batch()
+            self._run(batch)
+
+    def _batch_due(self) -> bool:
+        if not self._pending:
+            return False
+        return (
+            time.monotonic() - self._pending[0].enqueued_at >= self.max_wait
+            or self._pending_tokens >= self.max_batch_tokens
+            or len(self._pending) >= self.max_batch_size
+        )
+
+    def _take_batch(self) -> List[_Request]:
+        """
+        Remove a batch from the queue: the oldest request plus its nearest
+        neighbours by length, while the padded batch fits the token budget
+        and the padding limit.
+        """
+        pending = self._pending
+        order = sorted(range(len(pending)), key=lambda index: pending[index].tokens)
+        anchor = order.index(0)
+        low, high = anchor - 1, anchor + 1
+        selected = [0]
+        tokens = longest = pending[0].tokens
+
+        def fits(candidate: int) -> bool:
+            padded = (len(selected) + 1) * max(longest, candidate)
+            return padded <= self.max_batch_tokens and padded - tokens - candidate <= self.max_padding * padded
+
+        while len(selected) < self.max_batch_size:
+            below = pending[order[low]].tokens if low >= 0 else None
+            above = pending[order[high]].tokens if high < len(order) else None
+            fits_above = above is not None and fits(above)
+            fits_below = below is not None and fits(below)
+            if fits_above and (not fits_below or above - pending[0].tokens <= pending[0].tokens - below):
+                selected.append(order[high])
+                tokens += above
+                longest = above
+                high += 1
+            elif fits_below:
+                selected.append(order[low])
+                tokens += below
+                low -= 1
+            else:
+                break
+
+        chosen = set(selected)
+        batch = [pending[index] for index in sorted(chosen)]
+        self._pending = [request for index, request in enumerate(pending) if index not in chosen]
+        self._pending_tokens -= tokens
+        return batch
+
+    def _run(self, batch: List[_Request]):
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        try:
+            results = self.run_batch([request.item for request in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            results = None
+        elapsed = time.perf_counter() - start
+
+        if results is not None:
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
+
+        with self._condition:
+            self.requests_total += len(batch)
+            self.batches_total += 1
+            self.tokens_total += sum(request.tokens for request in batch)
+            self.padded_tokens_total += len(batch) * max(request.tokens for request in batch)
+            self.batch_seconds_total += elapsed
+            self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+            self.last_batch_size = len(batch)
+            self.last_batch_ms = elapsed * 1000
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking inference calls with a bounded queue.
+    At most `max_workers` calls run at once and at most `max_queue` more
+    wait; further submissions raise QueueFullError. A call that times out
+    keeps its worker until it finishes, so the bound holds on real work.
+    """
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 4, name: str = "inference"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.submitted_total = 0
+        self.rejected_total = 0
+        self.timeouts_total = 0
+        self.failed_total = 0
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected_total += 1
+                raise QueueFullError(f"{self.name} queue is full ({self.max_queue} waiting)")
+            self._in_flight += 1
+            self.submitted_total += 1
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run `func(*args)` on the pool and wait for it without blocking the event loop.
+        Raises asyncio.TimeoutError after `timeout` seconds.
+        """
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(func, *args)), timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts_total += 1
+            raise
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "submitted_total": self.submitted_total,
+                "rejected_total": self.rejected_total,
+                "timeouts_total": self.timeouts_total,
+                "failed_total": self.failed_total,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
+
+    def _release(self, future: Future):
+        with self._lock:
+            self._in_flight -= 1
+            if not future.cancelled() and future.exception() is not None:
+                self.failed_total += 1
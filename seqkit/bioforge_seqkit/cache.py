@@ -0,0 +1,458 @@
+"""
+Bounded result caches shared by the BioForge services.
+
+A Cache has a default TTL and one of two backends:
+
+- MemoryBackend: in-process, bounded by entry count and estimated memory,
+  with LRU or TinyLFU eviction and a background thread that drops expired
+  entries.
+- RedisBackend: any server speaking the Redis protocol (RESP), so several
+  workers or services share entries. It uses a plain socket client, with no
+  extra dependency. Expiry is left to the server. After a connection failure
+  the backend fails fast and only tries to reconnect after a backoff, which
+  doubles with every failed attempt.
+
+Every cache counts hits, misses, sets, evictions and expirations. Cache
+errors are logged and count as misses, so a cache outage never fails a
+request. Values are pickled for the Redis backend, so only point it at a
+server you trust.
+
+Services create their caches with `create_cache(name, ttl)`, configured by
+environment variables:
+
+    CACHE_BACKEND      memory (default) or redis
+    CACHE_REDIS_URL    redis://host:6379/0
+    CACHE_MAX_ENTRIES  per-cache entry limit (memory backend, default 10000)
+    CACHE_MAX_BYTES    per-cache memory limit (memory backend, default 64 MiB)
+    CACHE_POLICY       lru (default) or tinylfu
+"""
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from array import array
+from collections import OrderedDict
+from urllib.parse import urlparse
+import logging
+import os
+import pickle
+import socket
+import sys
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Estimate the memory held by a cached value, following containers and
+    object attributes a few levels deep.
+    """
+    size = sys.getsizeof(value)
+    if _depth > 4:
+        return size
+    if isinstance(value, dict):
+        size += sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, _depth + 1) for item in value)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(vars(value), _depth + 1)
+    return size
+
+class _FrequencySketch:
+    """
+    Count-min sketch of recent key frequencies (TinyLFU). Counters saturate
+    at 15 and are halved every `sample_size` increments, so the sketch tracks
+    recent popularity rather than all-time counts.
+    """
+
+    _DEPTH = 4
+
+    def __init__(self, capacity: int):
+        width = 1
+        while width < max(capacity, 16):
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [array("B", bytes(width)) for _ in range(self._DEPTH)]
+        self._sample_size = 10 * max(capacity, 16)
+        self._additions = 0
+
+    def _slots(self, key: Hashable):
+        base = hash(key)
+        for row in range(self._DEPTH):
+            yield row, hash((base, row)) & self._mask
+
+    def increment(self, key: Hashable):
+        for row, slot in self._slots(key):
+            if self._rows[row][slot] < 15:
+                self._rows[row][slot] += 1
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            for counters in self._rows:
+                for slot in range(len(counters)):
+                    counters[slot] >>= 1
+            self._additions //= 2
+
+    def frequency(self, key: Hashable) -> int:
+        return min(self._rows[row][slot] for row, slot in self._slots(key))
+
+class MemoryBackend:
+    """
+    In-process cache bounded by entry count and estimated bytes.
+    With policy "lru" the least recently used entry is evicted; with "tinylfu"
+    a new entry is only admitted over the LRU victim if it has been requested
+    more often recently, which keeps one-off keys from flushing popular ones.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: Optional[int] = 64 << 20,
+        policy: str = "lru",
+        sweep_interval: Optional[float] = 60.0,
+    ):
+        if policy not in ("lru", "tinylfu"):
+            raise ValueError(f"Unknown cache policy: {policy}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, size), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._sketch = _FrequencySketch(max_entries) if policy == "tinylfu" else None
+
+        self.evictions = 0
+        self.expirations = 0
+        self.rejections = 0
+
+        if sweep_interval:
+            _start_sweeper(self, sweep_interval)
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            if self._sketch is not None:
+                self._sketch.increment(key)
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            value, expires_at, size = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        size = estimate_size(value) + estimate_size(key)
+        with self._lock:
+            if self.max_bytes is not None and size > self.max_bytes:
+                self.rejections += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and (
+                len(self._entries) >= self.max_entries
+                or (self.max_bytes is not None and self._bytes + size > self.max_bytes)
+            ):
+                victim = next(iter(self._entries))
+                if self._sketch is not None and self._sketch.frequency(key) <= self._sketch.frequency(victim):
+                    self.rejections += 1
+                    return
+                self._remove(victim)
+                self.evictions += 1
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def expire(self) -> int:
+        """
+        Drop every expired entry. Called periodically by the sweeper thread.
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "policy": self.policy,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "rejections": self.rejections,
+            }
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+def _start_sweeper(backend: MemoryBackend, interval: float):
+    """
+    Expire entries in the background. The thread only holds a weak reference,
+    so it stops once the backend is garbage collected.
+    """
+    reference = weakref.ref(backend)
+
+    def sweep():
+        while True:
+            time.sleep(interval)
+            backend = reference()
+            if backend is None:
+                return
+            backend.expire()
+            del backend
+
+    threading.Thread(target=sweep, name="cache-sweeper", daemon=True).start()
+
+class RedisError(Exception):
+    pass
+
+class _RespConnection:
+    """
+    Minimal blocking client for the Redis serialization protocol (RESP2).
+    """
+
+    def __init__(self, host: str, port: int, db: int, password: Optional[str], timeout: float):
+        self._socket = socket.create_connection((host, port), timeout=timeout)
+        self._reader = self._socket.makefile("rb")
+        if password:
+            self.command("AUTH", password)
+        if db:
+            self.command("SELECT", db)
+
+    def command(self, *args: Any) -> Any:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self._socket.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def close(self):
+        self._reader.close()
+        self._socket.close()
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b"+":
+            return payload.decode()
+        if kind == b"-":
+            raise RedisError(payload.decode())
+        if kind == b":":
+            return int(payload)
+        if kind == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+class RedisBackend:
+    """
+    Cache entries in a Redis-protocol server, under `prefix`.
+    The connection is opened lazily and re-opened after an error, once the
+    reconnect backoff (`backoff` seconds, doubling up to `max_backoff`) has passed.
+    """
+
+    def __init__(self, url: str, prefix: str, timeout: float = 1.0, backoff: float = 1.0, max_backoff: float = 30.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._connection: Optional[_RespConnection] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def _key(self, key: Hashable) -> bytes:
+        return f"{self.prefix}:{key}".encode()
+
+    def _command(self, *args: Any) -> Any:
+        with self._lock:
+            if self._connection is None:
+                wait = self._retry_at - time.monotonic()
+                if wait > 0:
+                    raise ConnectionError(f"Redis at {self.host}:{self.port} unavailable, retrying in {wait:.1f}s")
+                try:
+                    self._connection = _RespConnection(self.host, self.port, self.db, self.password, self.timeout)
+                except (OSError, RedisError):
+                    self._failed()
+                    raise
+            try:
+                reply = self._connection.command(*args)
+            except (OSError, ConnectionError):
+                self._connection.close()
+                self._connection = None
+                self._failed()
+                raise
+            self._failures = 0
+            return reply
+
+    def _failed(self):
+        self._failures += 1
+        self._retry_at = time.monotonic() + min(self.max_backoff, self.backoff * 2 ** (self._failures - 1))
+
+    def get(self, key: Hashable) -> Any:
+        data = self._command("GET", self._key(key))
+        return _MISSING if data is None else pickle.loads(data)
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self._command("SET", self._key(key), pickle.dumps(value), "PX", max(1, int(ttl * 1000)))
+
+    def delete(self, key: Hashable):
+        self._command("DEL", self._key(key))
+
+    def clear(self):
+        cursor = b"0"
+        while True:
+            cursor, keys = self._command("SCAN", cursor, "MATCH", f"{self.prefix}:*", "COUNT", 1000)
+            if keys:
+                self._command("DEL", *keys)
+            if cursor in (b"0", "0"):
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "host": self.host,
+            "port": self.port,
+            "db": self.db,
+            "prefix": self.prefix,
+            "connection_failures": self._failures,
+        }
+
+class Cache:
+    """
+    A named cache with a default TTL over a pluggable backend.
+    """
+
+    def __init__(self, name: str, backend: Any, ttl: float = 3600):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.errors = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            self._error("get", e)
+            value = _MISSING
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        try:
+            self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            self._error("set", e)
+            return
+        with self._lock:
+            self.sets += 1
+
+    def delete(self, key: Hashable):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            self._error("delete", e)
+
+    def clear(self):
+        try:
+            self.backend.clear()
+        except Exception as e:
+            self._error("clear", e)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            backend_stats = self.backend.stats()
+        except Exception as e:
+            backend_stats = {"error": str(e)}
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "sets": self.sets,
+                "errors": self.errors,
+                **backend_stats,
+            }
+
+    def _error(self, operation: str, error: Exception):
+        with self._lock:
+            self.errors += 1
+        logger.warning(f"Cache {self.name} {operation} failed: {error}")
+
+_caches: List[Cache] = []
+
+def create_cache(
+    name: str,
+    ttl: float = 3600,
+    max_entries: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+) -> Cache:
+    """
+    Create a cache configured from the environment (see the module docstring).
+    Explicit limits override the environment defaults.
+    """
+    if os.environ.get("CACHE_BACKEND", "memory") == "redis":
+        backend = RedisBackend(os.environ.get("CACHE_REDIS_URL", "redis://localhost:6379/0"), f"bioforge:{name}")
+    else:
+        backend = MemoryBackend(
+            max_entries=max_entries or int(os.environ.get("CACHE_MAX_ENTRIES", "10000")),
+            max_bytes=max_bytes or int(os.environ.get("CACHE_MAX_BYTES", str(64 << 20))),
+            policy=os.environ.get("CACHE_POLICY", "lru"),
+        )
+    cache = Cache(name, backend, ttl)
+    _caches.append(cache)
+    return cache
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the stats of every cache created with `create_cache` in this process.
+    """
+    return {cache.name: cache.stats() for cache in _caches}
@@ -0,0 +1,191 @@
+"""
+Part-level memoization of signature screening.
+
+Designs are mostly recombinations of the same library parts. DesignScanner
+screens each distinct part once and caches its hits under the part's
+fingerprint and the signature index version. A design is then screened by
+shifting the cached part hits to the part offsets and screening only the
+junctions: the bases within `span - 1` of each part boundary, where `span` is
+the longest hit the index can report. Every hit that crosses a boundary lies
+inside such a window, so exact hits are the same as for a full scan.
+Overlapping windows are merged, so a design of short parts is never rescanned
+more than once. Junction windows are cached by content as well, so editing
+one part rescans that part and its two junctions.
+
+Homology hits are composed the same way. Near the ends of a part their
+containment can differ slightly from a full scan, since minimizers depend on
+the flanking sequence.
+"""
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+from bisect import bisect_right
+
+from bioforge_seqkit.encoding import encode
+from bioforge_seqkit.fingerprint import sequence_fingerprint
+from bioforge_seqkit.homology import HomologyHit
+from bioforge_seqkit.screening import Hit
+
+class DesignScan(NamedTuple):
+    """
+    Screening result of a design, in design coordinates.
+    `parts_scanned` counts the parts that were not cached; `junction_bases`
+    the bases of uncached junction windows that were rescanned.
+    """
+    hits: List[Hit]
+    similar_hits: List[HomologyHit]
+    parts_scanned: int
+    junction_bases: int
+
+def junction_windows(boundaries: Sequence[int], span: int, length: int) -> List[Tuple[int, int]]:
+    """
+    Merge the windows of `span - 1` bases on either side of each boundary.
+    """
+    windows: List[Tuple[int, int]] = []
+    if span <= 1:
+        return windows
+    for boundary in boundaries:
+        start, end = max(0, boundary - span + 1), min(length, boundary + span - 1)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+def _crosses(boundaries: Sequence[int], start: int, end: int) -> bool:
+    """
+    Check whether [start, end) contains a part boundary strictly inside it.
+    """
+    index = bisect_right(boundaries, start)
+    return index < len(boundaries) and boundaries[index] < end
+
+def _shift_similar(hit: HomologyHit, offset: int, part_length: int, length: int) -> HomologyHit:
+    """
+    Move a homology hit from part to design coordinates. Translated frames
+    are counted from the start (forward) or end (reverse) of the sequence, so
+    protein hits are relabelled too.
+    """
+    frame = hit.frame
+    if hit.level == "protein":
+        if hit.strand == 1:
+            frame = (frame + offset) % 3
+        else:
+            frame = (frame + length - offset - part_length) % 3
+    return hit._replace(start=hit.start + offset, end=hit.end + offset, frame=frame)
+
+class DesignScanner:
+    def __init__(
+        self,
+        cache: Optional[Any] = None,
+        min_containment: float = 0.2,
+        min_identity: float = 0.8,
+        min_protein_identity: float = 0.7,
+    ):
+        """
+        `cache` is any object with `get(key)` and `set(key, value)`, e.g. a
+        bioforge_seqkit.cache.Cache; without one, parts are rescanned every time.
+        """
+        self.cache = cache
+        self.min_containment = min_containment
+        self.min_identity = min_identity
+        self.min_protein_identity = min_protein_identity
+
+    def scan(self, index: Any, parts: Sequence[str]) -> DesignScan:
+        """
+        Screen a design, given as its ordered part sequences, against a
+        SignatureIndex on both stages (exact and homology).
+        """
+        hits: List[Hit] = []
+        similar_hits: List[HomologyHit] = []
+        offsets = []
+        parts_scanned = 0
+        length = sum(len(part) for part in parts)
+
+        offset = 0
+        for part in parts:
+            offsets.append(offset)
+            part_hits, part_similar, scanned = self._scan_part(index, part)
+            parts_scanned += scanned
+            hits.extend(hit._replace(start=hit.start + offset, end=hit.end + offset) for hit in part_hits)
+            similar_hits.extend(_shift_similar(hit, offset, len(part), length) for hit in part_similar)
+            offset += len(part)
+
+        boundaries = sorted(set(offsets[1:]) - {0, length})
+        if not boundaries:
+            return DesignScan(hits, similar_hits, parts_scanned, 0)
+
+        sequence = "".join(parts)
+        junction_bases = 0
+
+        exact_span = max(index.matcher.pattern_lengths, default=0)
+        for start, end in junction_windows(boundaries, exact_span, length):
+            window_hits, scanned = self._scan_window(index, "exact", sequence[start:end])
+            junction_bases += scanned
+            for hit in window_hits:
+                if _crosses(boundaries, hit.start + start, hit.end + start):
+                    hits.append(hit._replace(start=hit.start + start, end=hit.end + start))
+
+        homology_span = index.homology.max_hit_length(self.min_identity, self.min_protein_identity)
+        for start, end in junction_windows(boundaries, homology_span, length):
+            window_hits, scanned = self._scan_window(index, "homology", sequence[start:end])
+            junction_bases += scanned
+            for hit in window_hits:
+                hit = _shift_similar(hit, start, end - start, length)
+                if not _crosses(boundaries, hit.start, hit.end):
+                    continue
+                # A signature cut by a part boundary can still pass as a weaker hit in the part
+                # alone; keep whichever of the overlapping reports aligns best
+                duplicates = [other for other in similar_hits if self._same_hit(hit, other)]
+                if all(other.identity < hit.identity for other in duplicates):
+                    similar_hits = [other for other in similar_hits if other not in duplicates]
+                    similar_hits.append(hit)
+
+        hits.sort(key=lambda hit: hit.end)
+        similar_hits.sort(key=lambda hit: (hit.start, hit.pattern_id))
+        return DesignScan(hits, similar_hits, parts_scanned, junction_bases)
+
+    def _scan_part(self, index: Any, part: str) -> Tuple[Tuple[Hit, ...], Tuple[HomologyHit, ...], int]:
+        def scan():
+            codes = encode(part)
+            return tuple(index.matcher.scan(codes)), tuple(self._screen(index, codes))
+
+        (part_hits, part_similar), scanned = self._memoize(f"{index.version}_part_{sequence_fingerprint(part)}", scan)
+        return part_hits, part_similar, int(scanned)
+
+    def _scan_window(self, index: Any, stage: str, window: str) -> Tuple[Tuple[Any, ...], int]:
+        """
+        Screen a junction window on one stage. Windows are cached by content
+        too, so only the junctions next to an edited part are rescanned.
+        Returns the hits (window coordinates) and the number of bases scanned.
+        """
+        def scan():
+            if stage == "exact":
+                return tuple(index.matcher.scan(encode(window)))
+            return tuple(self._screen(index, encode(window)))
+
+        window_hits, scanned = self._memoize(f"{index.version}_{stage}_{sequence_fingerprint(window)}", scan)
+        return window_hits, len(window) if scanned else 0
+
+    def _memoize(self, key: str, scan: Callable[[], Any]) -> Tuple[Any, bool]:
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached, False
+        result = scan()
+        if self.cache is not None:
+            self.cache.set(key, result)
+        return result, True
+
+    def _screen(self, index: Any, codes) -> List[HomologyHit]:
+        return index.homology.screen(codes, self.min_containment, self.min_identity, self.min_protein_identity)
+
+    @staticmethod
+    def _same_hit(hit: HomologyHit, other: HomologyHit) -> bool:
+        """
+        Check whether two homology hits report the same match (found both in a part and at a junction).
+        """
+        return (
+            hit.pattern_id == other.pattern_id
+            and hit.strand == other.strand
+            and hit.level == other.level
+            and hit.start < other.end
+            and other.start < hit.end
+        )
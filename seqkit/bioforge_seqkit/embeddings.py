@@ -0,0 +1,205 @@
+"""
+Persistent, content-addressed store for protein embeddings.
+
+Embeddings are keyed by the SHA-256 of the protein sequence, in a directory
+per model version, so a model upgrade never serves stale vectors. Records are
+appended to fixed-layout shard files:
+
+    key (32 bytes) | vector (dim x dtype) | CRC32 of the vector (4 bytes)
+
+Every process memory-maps the shards read-only and indexes the keys. Writers
+append under an exclusive file lock, so any number of worker processes (and
+restarts) share one store; a reader that misses rescans the shard tails to
+pick up records written by other processes. Records whose checksum does not
+match are treated as misses and written again by the next put; the latest
+valid record of a key wins. A writer first trims any torn tail a crashed
+process left behind, so later records stay aligned.
+"""
+from typing import Dict, List, Optional, Tuple
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+import numpy as np
+
+_KEY_LENGTH = 32
+_CRC = struct.Struct("<I")
+_SHARD_PATTERN = re.compile(r"^shard-(\d{5})\.emb$")
+
+def protein_key(protein: str) -> bytes:
+    """
+    Get the store key of a protein sequence.
+    """
+    return hashlib.sha256(protein.strip().upper().encode()).digest()
+
+class EmbeddingStore:
+    def __init__(self, root: str, model_version: str, dtype: str = "float32", shard_bytes: int = 256 << 20):
+        """
+        Open (or create) the store for one model version under `root`.
+        The vector dimension is fixed by the first embedding written.
+        """
+        self.model_version = model_version
+        self.directory = os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]", "_", model_version))
+        self.shard_bytes = shard_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.dtype = np.dtype(dtype)
+        self.dim: Optional[int] = None
+        self._lock = threading.Lock()
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self._maps: List[Optional[mmap.mmap]] = []
+        self._scanned: List[int] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        with self._lock:
+            self._refresh()
+
+    @property
+    def record_size(self) -> int:
+        return _KEY_LENGTH + self.dim * self.dtype.itemsize + _CRC.size
+
+    def get(self, protein: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of a protein sequence.
+        """
+        key = protein_key(protein)
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                self._refresh()
+                location = self._index.get(key)
+            vector = self._read(location) if location is not None else None
+            if vector is None:
+                if location is not None:
+                    del self._index[key]
+                self.misses += 1
+            else:
+                self.hits += 1
+            return vector
+
+    def put(self, protein: str, vector: np.ndarray):
+        """
+        Store the embedding of a protein sequence, unless it is already stored.
+        """
+        key = protein_key(protein)
+        vector = np.ascontiguousarray(vector, dtype=self.dtype).ravel()
+
+        with self._lock, open(os.path.join(self.directory, "lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                location = self._index.get(key)
+                if location is not None and self._read(location) is not None:
+                    return
+                if self.dim is None:
+                    self._write_meta(len(vector))
+                elif len(vector) != self.dim:
+                    raise ValueError(f"Embedding has {len(vector)} dimensions, store expects {self.dim}")
+
+                shard = max(len(self._scanned) - 1, 0)
+                if self._shard_size(shard) + self.record_size > self.shard_bytes:
+                    shard += 1
+                data = vector.tobytes()
+                with open(self._shard_path(shard), "ab") as handle:
+                    # Drop a partial record left by a writer that died mid-append
+                    size = handle.seek(0, os.SEEK_END)
+                    if size % self.record_size:
+                        handle.truncate(size - size % self.record_size)
+                    handle.write(key + data + _CRC.pack(zlib.crc32(data)))
+                self.writes += 1
+                self._refresh()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self.model_version,
+                "directory": self.directory,
+                "entries": len(self._index),
+                "shards": len(self._scanned),
+                "dim": self.dim,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "writes": self.writes,
+            }
+
+    def _shard_path(self, shard: int) -> str:
+        return os.path.join(self.directory, f"shard-{shard:05d}.emb")
+
+    def _shard_size(self, shard: int) -> int:
+        try:
+            return os.path.getsize(self._shard_path(shard))
+        except OSError:
+            return 0
+
+    def _write_meta(self, dim: int):
+        meta = {"model_version": self.model_version, "dim": dim, "dtype": self.dtype.str}
+        tmp_path = os.path.join(self.directory, f"meta.json.tmp{os.getpid()}")
+        with open(tmp_path, "w") as handle:
+            json.dump(meta, handle)
+        os.replace(tmp_path, os.path.join(self.directory, "meta.json"))
+        self.dim = dim
+
+    def _refresh(self):
+        """
+        Index records appended since the last scan, by this or any other process.
+        """
+        if self.dim is None:
+            try:
+                with open(os.path.join(self.directory, "meta.json")) as handle:
+                    meta = json.load(handle)
+            except FileNotFoundError:
+                return
+            self.dim = meta["dim"]
+            self.dtype = np.dtype(meta["dtype"])
+
+        shards = sorted(
+            int(match.group(1)) for match in map(_SHARD_PATTERN.match, os.listdir(self.directory)) if match
+        )
+        for shard in shards:
+            while len(self._scanned) <= shard:
+                self._maps.append(None)
+                self._scanned.append(0)
+            complete = self._shard_size(shard) // self.record_size * self.record_size
+            if complete <= self._scanned[shard]:
+                continue
+
+            if self._maps[shard] is not None:
+                self._maps[shard].close()
+            with open(self._shard_path(shard), "rb") as handle:
+                self._maps[shard] = mmap.mmap(handle.fileno(), complete, access=mmap.ACCESS_READ)
+
+            # Copy the new keys out so no view keeps the map from being closed on the next growth
+            first = self._scanned[shard] // self.record_size
+            records = np.frombuffer(self._maps[shard], dtype=np.uint8).reshape(-1, self.record_size)[first:]
+            keys = records[:, :_KEY_LENGTH].tobytes()
+            checksums = records[:, -_CRC.size:].copy().view("<u4").ravel().tolist()
+            valid = [zlib.crc32(record[_KEY_LENGTH:-_CRC.size]) == crc for record, crc in zip(records, checksums)]
+            del records
+            for index, ok in enumerate(valid):
+                if ok:
+                    key = keys[index * _KEY_LENGTH:(index + 1) * _KEY_LENGTH]
+                    self._index[key] = (shard, (first + index) * self.record_size)
+            self._scanned[shard] = complete
+
+    def _read(self, location: Tuple[int, int]) -> Optional[np.ndarray]:
+        shard, offset = location
+        start = offset + _KEY_LENGTH
+        end = start + self.dim * self.dtype.itemsize
+        buffer = self._maps[shard]
+        data = buffer[start:end]
+        (crc,) = _CRC.unpack_from(buffer, end)
+        if zlib.crc32(data) != crc:
+            return None
+        return np.frombuffer(data, dtype=self.dtype).copy()
@@ -0,0 +1,58 @@
+from typing import Union
+import numpy as np
+
+# Nucleotide codes: A=0, C=1, G=2, T=3; anything else (N, gaps, IUPAC) is 4
+INVALID = 4
+
+_ENCODE_TABLE = np.full(256, INVALID, dtype=np.uint8)
+for _code, _bases in enumerate(("Aa", "Cc", "Gg", "Tt")):
+    for _base in _bases:
+        _ENCODE_TABLE[ord(_base)] = _code
+
+_COMPLEMENT_TABLE = np.array([3, 2, 1, 0, INVALID], dtype=np.uint8)
+
+# A raw sequence string or an already-encoded code array
+SequenceLike = Union[str, np.ndarray]
+
+def encode(sequence: str) -> np.ndarray:
+    """
+    Encode a DNA sequence as an array of nucleotide codes in a single pass.
+    Case-insensitive; non-ACGT characters are encoded as INVALID.
+    """
+    raw = np.frombuffer(sequence.encode("ascii", errors="replace"), dtype=np.uint8)
+    return _ENCODE_TABLE[raw]
+
+def as_codes(sequence: SequenceLike) -> np.ndarray:
+    """
+    Encode a sequence unless it is already an array of nucleotide codes.
+    """
+    return encode(sequence) if isinstance(sequence, str) else sequence
+
+def reverse_complement_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Get the reverse complement of an encoded sequence.
+    """
+    return _COMPLEMENT_TABLE[codes[::-1]]
+
+def codon_codes(codes: np.ndarray) -> np.ndarray:
+    """
+    Get the codon code starting at every position of an encoded sequence.
+    Codons are numbered 0-63 (16 * first + 4 * second + third); codons that
+    contain an invalid base are numbered 64.
+    """
+    if len(codes) < 3:
+        return np.empty(0, dtype=np.int16)
+    first = codes[:-2].astype(np.int16)
+    second = codes[1:-1].astype(np.int16)
+    third = codes[2:].astype(np.int16)
+    codons = first * 16 + second * 4 + third
+    invalid = (first == INVALID) | (second == INVALID) | (third == INVALID)
+    codons[invalid] = 64
+    return codons
+
+def codon_code(codon: str) -> int:
+    """
+    Get the codon code of a three-letter codon string.
+    """
+    first, second, third = encode(codon)
+    return int(first) * 16 + int(second) * 4 + int(third)
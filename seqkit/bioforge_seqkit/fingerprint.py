@@ -0,0 +1,37 @@
+"""
+Content fingerprints for cache keys.
+
+A fingerprint is a 128-bit BLAKE2b digest (32 hex characters), so cache keys
+stay small however long the sequence, and two inputs share a key only if
+every analysis would treat them the same. Sequences are normalized to upper
+case, since the analyses are case-insensitive; nothing else is stripped,
+because whitespace and gaps are reported as invalid characters.
+"""
+from typing import Iterable, Tuple
+import hashlib
+import struct
+
+_LENGTH = struct.Struct("<Q")
+
+def normalize_sequence(sequence: str) -> str:
+    return sequence.upper()
+
+def sequence_fingerprint(sequence: str) -> str:
+    """
+    Fingerprint a DNA sequence.
+    """
+    return hashlib.blake2b(normalize_sequence(sequence).encode(), digest_size=16).hexdigest()
+
+def design_fingerprint(parts: Iterable[Tuple[str, str, str]]) -> str:
+    """
+    Fingerprint a design from its ordered (type, name, sequence) parts.
+    Every field is length-prefixed, so moving a base across a part boundary
+    or renaming a part gives a different fingerprint.
+    """
+    digest = hashlib.blake2b(digest_size=16, person=b"bioforge-design")
+    for part_type, name, sequence in parts:
+        for field in (part_type, name, normalize_sequence(sequence)):
+            data = field.encode()
+            digest.update(_LENGTH.pack(len(data)))
+            digest.update(data)
+    return digest.hexdigest()
@@ -0,0 +1,391 @@
+"""
+Approximate (homology) screening against hazard signatures.
+
+Exact matching misses sequences a few mutations away from a signature. This
+stage indexes minimizer sketches of every signature, both as DNA (in both
+orientations) and as protein (the signature translated in frame 0), then:
+
+1. sketches the query the same way (DNA, plus all six translated frames),
+2. looks the query minimizers up in the sorted index and clusters the seed
+   hits per signature by diagonal,
+3. keeps clusters whose containment (fraction of the signature's minimizers
+   hit) passes a threshold, and
+4. verifies each candidate with a semi-global edit-distance alignment over a
+   window of the query around the cluster.
+
+Steps 1-3 are vectorized and linear in the query length; only candidates
+reach the verifier.
+"""
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+import numpy as np
+
+from bioforge_seqkit.encoding import INVALID, SequenceLike, as_codes, encode, reverse_complement_codes, codon_codes
+
+# Protein alphabet; codes >= PROTEIN_ALPHABET_SIZE mark untranslatable codons and separators
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY*"
+PROTEIN_ALPHABET_SIZE = len(AMINO_ACIDS)
+PROTEIN_INVALID = PROTEIN_ALPHABET_SIZE
+
+# Standard genetic code in TCAG order
+_STANDARD_CODE = "FFLLSSSSYY**CC*WLLLLPPPPHHQQRRRRIIIMTTTTNNKKSSRRVVVVAAAADDEEGGGG"
+
+def _codon_to_amino_acid_table() -> np.ndarray:
+    table = np.full(65, PROTEIN_INVALID, dtype=np.uint8)
+    tcag = "TCAG"
+    for first in range(4):
+        for second in range(4):
+            for third in range(4):
+                codon = "ACGT"[first] + "ACGT"[second] + "ACGT"[third]
+                amino_acid = _STANDARD_CODE[tcag.index(codon[0]) * 16 + tcag.index(codon[1]) * 4 + tcag.index(codon[2])]
+                table[first * 16 + second * 4 + third] = AMINO_ACIDS.index(amino_acid)
+    return table
+
+_TRANSLATION_TABLE = _codon_to_amino_acid_table()
+
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_MASKED_HASH = np.uint64(np.iinfo(np.uint64).max)
+
+# Index hashes seen more often than this are treated as repeats and not used as seeds
+MAX_SEED_OCCURRENCES = 1000
+
+class HomologyHit(NamedTuple):
+    """
+    An approximate signature match. `start`/`end` are forward-strand DNA
+    coordinates (end exclusive). `level` is "dna" or "protein"; `frame` is the
+    translated frame (0-2) for protein hits and 0 for DNA hits.
+    """
+    pattern_id: str
+    start: int
+    end: int
+    strand: int
+    frame: int
+    level: str
+    containment: float
+    identity: float
+
+def translate_codes(codes: np.ndarray, frame: int = 0) -> np.ndarray:
+    """
+    Translate an encoded DNA sequence in one frame into protein codes.
+    """
+    return _TRANSLATION_TABLE[codon_codes(codes)[frame::3]]
+
+def translate_six_frames(codes: np.ndarray) -> List[np.ndarray]:
+    """
+    Translate an encoded DNA sequence in all six frames: forward frames 0-2,
+    then reverse-complement frames 0-2.
+    """
+    reverse = reverse_complement_codes(codes)
+    return [translate_codes(strand, frame) for strand in (codes, reverse) for frame in range(3)]
+
+def _kmer_hashes(symbols: np.ndarray, k: int, bits: int, alphabet_size: int) -> np.ndarray:
+    """
+    Hash the k-mer starting at every position; k-mers containing an
+    out-of-alphabet symbol get the masked hash and are never selected.
+    """
+    count = len(symbols) - k + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+
+    values = np.zeros(count, dtype=np.uint64)
+    valid = np.ones(count, dtype=bool)
+    shift = np.uint64(bits)
+    for offset in range(k):
+        window = symbols[offset:offset + count]
+        values = (values << shift) | window.astype(np.uint64)
+        valid &= window < alphabet_size
+
+    hashes = values * _HASH_MULTIPLIER
+    hashes ^= hashes >> np.uint64(29)
+    hashes[~valid] = _MASKED_HASH
+    return hashes
+
+def _minimizer_positions(hashes: np.ndarray, window: int) -> np.ndarray:
+    """
+    Get the positions of the minimum hash in every window of consecutive k-mers.
+    """
+    if len(hashes) == 0:
+        return np.empty(0, dtype=np.int64)
+    if len(hashes) < window:
+        positions = np.array([hashes.argmin()])
+    else:
+        windows = np.lib.stride_tricks.sliding_window_view(hashes, window)
+        positions = windows.argmin(axis=1) + np.arange(len(windows))
+        positions = positions[np.concatenate(([True], positions[1:] != positions[:-1]))]
+    return positions[hashes[positions] != _MASKED_HASH]
+
+def _concatenate(sequences: Sequence[np.ndarray], separator: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Join sequences with a separator symbol; returns (symbols, start offsets)
+    where starts has one extra trailing entry.
+    """
+    lengths = np.array([len(sequence) + 1 for sequence in sequences], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lengths)))
+    symbols = np.full(int(starts[-1]), separator, dtype=np.uint8)
+    for start, sequence in zip(starts.tolist(), sequences):
+        symbols[start:start + len(sequence)] = sequence
+    return symbols, starts
+
+def _sketch(symbols: np.ndarray, starts: np.ndarray, k: int, window: int, bits: int, alphabet_size: int):
+    """
+    Minimizer sketch of concatenated sequences as (hashes, entry, position in entry).
+    """
+    hashes = _kmer_hashes(symbols, k, bits, alphabet_size)
+    positions = _minimizer_positions(hashes, window)
+    entries = np.searchsorted(starts, positions, side="right") - 1
+    return hashes[positions], entries.astype(np.int32), (positions - starts[entries]).astype(np.int32)
+
+def semi_global_distance(pattern: np.ndarray, text: np.ndarray) -> Tuple[int, int, int]:
+    """
+    Edit distance of the whole pattern against its best-matching substring of
+    the text, with the start and end positions of that substring.
+    Each DP row is computed with vector operations; the horizontal (insertion)
+    dependency is resolved with a running minimum. Every cell carries the text
+    column its alignment started at, so the start reflects indels.
+    """
+    columns = np.arange(len(text) + 1, dtype=np.int32)
+    previous = np.zeros(len(text) + 1, dtype=np.int32)
+    starts = columns.copy()
+    for row, symbol in enumerate(pattern.tolist(), 1):
+        current = np.empty_like(previous)
+        current[0] = row
+        diagonal = previous[:-1] + (text != symbol)
+        up = previous[1:] + 1
+        current[1:] = np.minimum(diagonal, up)
+        current_starts = np.empty_like(starts)
+        current_starts[0] = 0
+        current_starts[1:] = np.where(diagonal <= up, starts[:-1], starts[1:])
+        # Cells reached by insertions take the start of the cell the run began at
+        shifted = current - columns
+        running = np.minimum.accumulate(shifted)
+        source = np.maximum.accumulate(np.where(shifted == running, columns, 0))
+        previous = running + columns
+        starts = current_starts[source]
+    end = int(previous.argmin())
+    return int(previous[end]), int(starts[end]), end
+
+class _SketchIndex:
+    """
+    Sorted minimizer index over one set of entry sequences (DNA or protein).
+    """
+
+    TABLES = ("symbols", "starts", "hashes", "entries", "positions", "sizes")
+
+    def __init__(self, tables: Dict[str, np.ndarray], k: int, window: int, bits: int, alphabet_size: int):
+        self.k = k
+        self.window = window
+        self.bits = bits
+        self.alphabet_size = alphabet_size
+        for name in self.TABLES:
+            setattr(self, name, tables[name])
+
+    @classmethod
+    def build(cls, sequences: Sequence[np.ndarray], k: int, window: int, bits: int, alphabet_size: int) -> "_SketchIndex":
+        symbols, starts = _concatenate(sequences, alphabet_size)
+        hashes, entries, positions = _sketch(symbols, starts, k, window, bits, alphabet_size)
+        order = np.argsort(hashes, kind="stable")
+        tables = {
+            "symbols": symbols,
+            "starts": starts,
+            "hashes": hashes[order],
+            "entries": entries[order],
+            "positions": positions[order],
+            "sizes": np.bincount(entries, minlength=len(sequences)).astype(np.int32),
+        }
+        return cls(tables, k, window, bits, alphabet_size)
+
+    def tables(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.TABLES}
+
+    def entry(self, index: int) -> np.ndarray:
+        return self.symbols[self.starts[index]:self.starts[index + 1] - 1]
+
+    def candidates(self, queries: Sequence[np.ndarray], min_containment: float):
+        """
+        Seed, cluster and filter. Yields (query index, entry, containment,
+        first diagonal, last diagonal) for every cluster passing the threshold.
+        """
+        symbols, starts = _concatenate(queries, self.alphabet_size)
+        query_hashes, query_entries, query_positions = _sketch(
+            symbols, starts, self.k, self.window, self.bits, self.alphabet_size
+        )
+        if len(query_hashes) == 0 or len(self.hashes) == 0:
+            return
+
+        low = np.searchsorted(self.hashes, query_hashes, side="left")
+        high = np.searchsorted(self.hashes, query_hashes, side="right")
+        counts = high - low
+        counts[counts > MAX_SEED_OCCURRENCES] = 0
+        total = int(counts.sum())
+        if total == 0:
+            return
+
+        # Expand each query seed into one row per matching index entry
+        seed_offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        matches = np.repeat(low, counts) + seed_offsets
+        seed_queries = np.repeat(query_entries, counts)
+        seed_entries = self.entries[matches]
+        diagonals = np.repeat(query_positions, counts).astype(np.int64) - self.positions[matches]
+
+        # Cluster seeds per (query, entry) along nearby diagonals
+        order = np.lexsort((diagonals, seed_entries, seed_queries))
+        seed_queries = seed_queries[order]
+        seed_entries = seed_entries[order]
+        diagonals = diagonals[order]
+        band = max(self.k, 16)
+        breaks = np.ones(total, dtype=bool)
+        breaks[1:] = (
+            (seed_queries[1:] != seed_queries[:-1])
+            | (seed_entries[1:] != seed_entries[:-1])
+            | (diagonals[1:] - diagonals[:-1] > band)
+        )
+        cluster_starts = np.flatnonzero(breaks)
+        cluster_sizes = np.diff(np.append(cluster_starts, total))
+        cluster_entries = seed_entries[cluster_starts]
+        containment = np.minimum(cluster_sizes / np.maximum(self.sizes[cluster_entries], 1), 1.0)
+
+        cluster_ends = cluster_starts + cluster_sizes - 1
+        for cluster in np.flatnonzero(containment >= min_containment).tolist():
+            yield (
+                int(seed_queries[cluster_starts[cluster]]),
+                int(cluster_entries[cluster]),
+                float(containment[cluster]),
+                int(diagonals[cluster_starts[cluster]]),
+                int(diagonals[cluster_ends[cluster]]),
+            )
+
+    def verify(self, entry: int, query: np.ndarray, first_diagonal: int, last_diagonal: int) -> Tuple[int, int, float]:
+        """
+        Align an entry against the query window around a seed cluster.
+        Returns (start, end, identity) in query coordinates.
+        """
+        pattern = self.entry(entry)
+        slack = max(self.k, len(pattern) // 10)
+        window_start = max(0, first_diagonal - slack)
+        window_end = min(len(query), last_diagonal + len(pattern) + slack)
+        distance, start, end = semi_global_distance(pattern, query[window_start:window_end])
+        return window_start + start, window_start + end, 1.0 - distance / max(len(pattern), 1)
+
+class HomologyIndex:
+    """
+    Minimizer-sketch index for approximate screening of DNA signatures at the
+    DNA and protein level.
+    """
+
+    def __init__(
+        self,
+        pattern_ids: List[str],
+        dna: _SketchIndex,
+        protein: _SketchIndex,
+    ):
+        self.pattern_ids = pattern_ids
+        self.dna = dna
+        self.protein = protein
+
+    @classmethod
+    def build(
+        cls,
+        signatures: Sequence[Tuple[str, str]],
+        k: int = 15,
+        window: int = 10,
+        protein_k: int = 5,
+        protein_window: int = 5,
+    ) -> "HomologyIndex":
+        """
+        Build the index from (pattern ID, DNA sequence) pairs.
+        DNA entries alternate forward / reverse complement per signature;
+        protein entries are the frame-0 translation of each signature.
+        """
+        pattern_ids = [signature_id for signature_id, _ in signatures]
+        dna_entries = []
+        protein_entries = []
+        for _, sequence in signatures:
+            codes = encode(sequence)
+            dna_entries.append(codes)
+            dna_entries.append(reverse_complement_codes(codes))
+            protein_entries.append(translate_codes(codes))
+
+        dna = _SketchIndex.build(dna_entries, k, window, 2, INVALID)
+        protein = _SketchIndex.build(protein_entries, protein_k, protein_window, 5, PROTEIN_ALPHABET_SIZE)
+        return cls(pattern_ids, dna, protein)
+
+    def parameters(self) -> Dict[str, int]:
+        return {
+            "k": self.dna.k,
+            "window": self.dna.window,
+            "protein_k": self.protein.k,
+            "protein_window": self.protein.window,
+        }
+
+    def max_hit_length(self, min_identity: float = 0.8, min_protein_identity: float = 0.7) -> int:
+        """
+        Upper bound on the DNA span of the sequence a reported hit aligns to:
+        the longest signature plus the insertions the identity thresholds allow.
+        """
+        if len(self.pattern_ids) == 0:
+            return 0
+        dna = int(np.diff(self.dna.starts).max()) - 1
+        protein = int(np.diff(self.protein.starts).max()) - 1
+        return max(
+            int(np.ceil(dna * (2 - min_identity))),
+            3 * int(np.ceil(protein * (2 - min_protein_identity))) + 2,
+        )
+
+    def tables(self) -> Dict[str, np.ndarray]:
+        """
+        Get the index arrays, for serialization.
+        """
+        tables = {f"dna_{name}": table for name, table in self.dna.tables().items()}
+        tables.update({f"protein_{name}": table for name, table in self.protein.tables().items()})
+        return tables
+
+    @classmethod
+    def from_tables(cls, pattern_ids: List[str], parameters: Dict[str, int], tables: Dict[str, np.ndarray]) -> "HomologyIndex":
+        """
+        Rebuild an index from prebuilt arrays (e.g. views over a memory-mapped file).
+        """
+        dna = _SketchIndex(
+            {name: tables[f"dna_{name}"] for name in _SketchIndex.TABLES},
+            parameters["k"], parameters["window"], 2, INVALID,
+        )
+        protein = _SketchIndex(
+            {name: tables[f"protein_{name}"] for name in _SketchIndex.TABLES},
+            parameters["protein_k"], parameters["protein_window"], 5, PROTEIN_ALPHABET_SIZE,
+        )
+        return cls(pattern_ids, dna, protein)
+
+    def screen(
+        self,
+        sequence: SequenceLike,
+        min_containment: float = 0.2,
+        min_identity: float = 0.8,
+        min_protein_identity: float = 0.7,
+    ) -> List[HomologyHit]:
+        """
+        Find signatures approximately present in a DNA sequence, on either strand,
+        at the DNA level or in any of the six translated frames.
+        """
+        codes = as_codes(sequence)
+        n = len(codes)
+        hits = []
+
+        for _, entry, containment, first, last in self.dna.candidates([codes], min_containment):
+            start, end, identity = self.dna.verify(entry, codes, first, last)
+            if identity >= min_identity:
+                strand = 1 if entry % 2 == 0 else -1
+                hits.append(HomologyHit(self.pattern_ids[entry // 2], start, end, strand, 0, "dna", containment, identity))
+
+        frames = translate_six_frames(codes)
+        for frame_index, entry, containment, first, last in self.protein.candidates(frames, min_containment):
+            start, end, identity = self.protein.verify(entry, frames[frame_index], first, last)
+            if identity >= min_protein_identity:
+                strand = 1 if frame_index < 3 else -1
+                frame = frame_index % 3
+                local_start, local_end = frame + 3 * start, frame + 3 * end
+                if strand == -1:
+                    local_start, local_end = n - local_end, n - local_start
+                hits.append(HomologyHit(
+                    self.pattern_ids[entry], local_start, local_end, strand, frame, "protein", containment, identity
+                ))
+
+        hits.sort(key=lambda hit: (hit.start, hit.pattern_id))
+        return hits
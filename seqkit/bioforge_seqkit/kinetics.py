@@ -0,0 +1,259 @@
+"""
+Mechanistic gene expression model.
+
+Each design is reduced to one equivalent expression cassette built from its
+part list, and simulated with four ODEs (time in hours):
+
+    dN/dt = g * N                              cell density (OD, logistic)
+    dm/dt = k_tx * P - (d_m + g) * m           mRNA per cell
+    dp/dt = k_tl * R * m - (d_p + g) * p       protein per cell
+    dx/dt = k_cat * p * N - d_x * x            product in the culture
+
+where g = mu_max * (1 - burden) * (1 - N / K) is the specific growth rate,
+which also dilutes mRNA and protein, and burden = b_max * p / (p + K_b)
+slows growth as the cell spends resources on expression. P, R and the
+terminator efficiency come from part metadata; the environment, host and
+temperature scale mu_max and k_tx.
+
+Many designs are integrated at once with a fixed-step RK4 over NumPy arrays
+(one row per design). The step is sized from the fastest rate in the batch,
+so the fast mRNA turnover stays inside RK4's stability region without an
+implicit solver.
+"""
+from typing import Any, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+import math
+import numpy as np
+
+SPECIES = ("density", "mrna", "protein", "product")
+
+# Default rate constants, roughly E. coli: molecules per cell and hours
+DEFAULT_RATES: Dict[str, float] = {
+    "k_tx": 300.0,  # Transcripts per hour from a promoter of strength 1
+    "k_tl": 2000.0,  # Proteins per transcript per hour from an RBS of strength 1
+    "d_m": 14.0,  # mRNA degradation (3 min half-life)
+    "d_p": 0.1,  # Active protein degradation
+    "b_max": 0.5,  # Largest fraction of growth lost to expression burden
+    "K_b": 20000.0,  # Protein per cell at half the maximum burden
+    "k_cat": 1e-4,  # Product formed per protein per hour per OD
+    "d_x": 0.01,  # Product decay
+    "mu_max": 1.4,  # Maximum specific growth rate (30 min doubling)
+    "carrying_capacity": 1.0,  # OD
+    "initial_density": 0.05,  # OD
+}
+
+# Range of each rate constant an override may set. Wide enough for real circuits, but bounded,
+# since the fastest rate sets the number of integration steps
+RATE_BOUNDS: Dict[str, Tuple[float, float]] = {
+    "k_tx": (0.0, 1e4),
+    "k_tl": (0.0, 1e5),
+    "d_m": (0.0, 200.0),
+    "d_p": (0.0, 50.0),
+    "b_max": (0.0, 1.0),
+    "K_b": (1.0, 1e8),
+    "k_cat": (0.0, 1.0),
+    "d_x": (0.0, 50.0),
+    "mu_max": (0.0, 10.0),
+    "carrying_capacity": (0.01, 100.0),
+    "initial_density": (1e-6, 100.0),
+}
+
+# Part strengths used when the part metadata gives none
+DEFAULT_PROMOTER_STRENGTH = 0.5
+DEFAULT_RBS_STRENGTH = 0.5
+DEFAULT_TERMINATOR_EFFICIENCY = 0.9
+
+# Host growth (mu_max per hour) and optimal temperature (Celsius)
+HOSTS = {
+    "ecoli": (1.4, 37.0),
+    "yeast": (0.35, 30.0),
+    "mammalian": (0.03, 37.0),
+    "plant": (0.02, 25.0),
+}
+TEMPERATURE_TOLERANCE = 8.0
+
+# Growth and expression multipliers per environment
+ENVIRONMENTS = {
+    "standard": (1.0, 1.0),
+    "nutrient-rich": (1.25, 1.1),
+    "minimal": (0.6, 0.8),
+    "stress": (0.5, 0.7),
+}
+
+def _strength(metadata: Optional[Mapping[str, Any]], keys: Sequence[str], default: float) -> float:
+    for key in keys:
+        if metadata and metadata.get(key) is not None:
+            return max(0.0, float(metadata[key]))
+    return default
+
+def cassette(parts: Iterable[Tuple[str, Optional[Mapping[str, Any]]]]) -> Dict[str, float]:
+    """
+    Reduce an ordered list of (part type, metadata) to one equivalent cassette.
+
+    Promoters start (and add to) transcription, terminators end it, letting
+    through 1 - efficiency of the upstream flux. Each gene is translated
+    from the nearest upstream RBS and is protected by the first terminator
+    downstream. Genes are lumped weighted by their transcription, which is
+    exact when they share degradation rates. Returns the promoter flux P,
+    RBS strength R and terminator efficiency of the cassette.
+    """
+    flux = 0.0
+    rbs = 0.0
+    genes = []  # (transcription flux, RBS strength)
+    unterminated = []  # Genes with no terminator downstream yet
+    terminated = {}  # Gene index -> efficiency of its terminator
+
+    for part_type, metadata in parts:
+        part_type = part_type.lower()
+        if part_type == "promoter":
+            flux += _strength(metadata, ("strength", "promoter_strength"), DEFAULT_PROMOTER_STRENGTH)
+        elif part_type == "rbs":
+            rbs = _strength(metadata, ("strength", "rbs_strength"), DEFAULT_RBS_STRENGTH)
+        elif part_type == "gene":
+            unterminated.append(len(genes))
+            genes.append((flux, rbs))
+            rbs = 0.0
+        elif part_type == "terminator":
+            efficiency = min(1.0, _strength(metadata, ("efficiency", "strength"), DEFAULT_TERMINATOR_EFFICIENCY))
+            for gene in unterminated:
+                terminated[gene] = efficiency
+            unterminated = []
+            flux *= 1.0 - efficiency
+
+    total = sum(gene_flux for gene_flux, _ in genes)
+    if total == 0:
+        return {"promoter": 0.0, "rbs": 0.0, "terminator": 0.0}
+    return {
+        "promoter": total,
+        "rbs": sum(gene_flux * gene_rbs for gene_flux, gene_rbs in genes) / total,
+        "terminator": sum(gene_flux * terminated.get(index, 0.0) for index, (gene_flux, _) in enumerate(genes)) / total,
+    }
+
+def conditions(environment: str = "standard", host: str = "ecoli", temperature: float = 37.0) -> Tuple[float, float]:
+    """
+    Get the (growth, expression) multipliers of the culture conditions, relative to E. coli in standard medium at 37 C.
+    """
+    mu_host, optimum = HOSTS.get(host, HOSTS["ecoli"])
+    growth, expression = ENVIRONMENTS.get(environment, ENVIRONMENTS["standard"])
+    temperature_factor = math.exp(-(((temperature - optimum) / TEMPERATURE_TOLERANCE) ** 2))
+    return growth * temperature_factor * mu_host / HOSTS["ecoli"][0], expression * temperature_factor
+
+def rate_arrays(
+    cassettes: Sequence[Mapping[str, float]],
+    growth_factors: Sequence[float],
+    expression_factors: Sequence[float],
+    overrides: Optional[Sequence[Optional[Mapping[str, float]]]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Build per-design rate arrays (one entry per row of the batch).
+    A missing terminator makes the transcript less stable and adds burden
+    from read-through transcription.
+    """
+    rates = {name: np.full(len(cassettes), value) for name, value in DEFAULT_RATES.items()}
+    for row, custom in enumerate(overrides or []):
+        for name, value in (custom or {}).items():
+            if name in rates:
+                rates[name][row] = float(value)
+
+    promoter = np.array([unit["promoter"] for unit in cassettes])
+    rbs = np.array([unit["rbs"] for unit in cassettes])
+    terminator = np.array([unit["terminator"] for unit in cassettes])
+    return {
+        "transcription": rates["k_tx"] * promoter * np.asarray(expression_factors, dtype=float),
+        "translation": rates["k_tl"] * rbs,
+        "d_m": rates["d_m"] * (1.5 - 0.5 * terminator),
+        "d_p": rates["d_p"],
+        "b_max": np.minimum(1.0, rates["b_max"] + 0.1 * (1.0 - terminator) * (promoter > 0)),
+        "K_b": rates["K_b"],
+        "k_cat": rates["k_cat"],
+        "d_x": rates["d_x"],
+        "mu_max": rates["mu_max"] * np.asarray(growth_factors, dtype=float),
+        "carrying_capacity": rates["carrying_capacity"],
+        "initial_density": rates["initial_density"],
+    }
+
+def _derivatives(y: np.ndarray, rates: Dict[str, np.ndarray]) -> np.ndarray:
+    density, mrna, protein, product = y
+    burden = rates["b_max"] * protein / (protein + rates["K_b"])
+    growth = rates["mu_max"] * (1.0 - burden) * (1.0 - density / rates["carrying_capacity"])
+    return np.stack((
+        growth * density,
+        rates["transcription"] - (rates["d_m"] + growth) * mrna,
+        rates["translation"] * mrna - (rates["d_p"] + growth) * protein,
+        rates["k_cat"] * protein * density - rates["d_x"] * product,
+    ))
+
+def _fastest_rate(rates: Dict[str, np.ndarray]) -> float:
+    return float(np.max(rates["d_m"] + rates["mu_max"])) + float(np.max(rates["d_p"] + rates["mu_max"]))
+
+def step_count(rates: Dict[str, np.ndarray], times: np.ndarray, max_step_rate: float = 1.0) -> int:
+    """
+    Get the number of RK4 steps integrate_chunks takes for `rates` over
+    `times`, to bound the work of a simulation before running it.
+    """
+    times = np.asarray(times, dtype=float)
+    if len(times) < 2 or not len(rates["mu_max"]):
+        return 0
+    return int(np.maximum(1, np.ceil(np.diff(times) * _fastest_rate(rates) / max_step_rate)).sum())
+
+def integrate_chunks(
+    rates: Dict[str, np.ndarray],
+    times: np.ndarray,
+    chunk_points: int = 1000,
+    max_step_rate: float = 1.0,
+    dtype: Any = np.float64,
+) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    """
+    Integrate the model for every row of `rates` with fixed-step RK4 and
+    yield (index of the first time point, species) for consecutive chunks of
+    `chunk_points` time points, each species a (rows x chunk) array. Only
+    the current state and one chunk are kept, so memory does not grow with
+    the number of time points.
+    Each output interval is split into substeps so that the step times the
+    fastest rate in the batch stays below `max_step_rate`.
+    """
+    times = np.asarray(times, dtype=float)
+    rows = len(rates["mu_max"])
+    y = np.zeros((len(SPECIES), rows))
+    y[0] = rates["initial_density"]
+    fastest = _fastest_rate(rates) if rows else 0.0
+
+    for first in range(0, len(times), chunk_points):
+        output = np.empty((min(chunk_points, len(times) - first), len(SPECIES), rows), dtype=dtype)
+        for position in range(len(output)):
+            index = first + position
+            if index > 0 and rows:
+                interval = times[index] - times[index - 1]
+                substeps = max(1, math.ceil(interval * fastest / max_step_rate))
+                h = interval / substeps
+                for _ in range(substeps):
+                    k1 = _derivatives(y, rates)
+                    k2 = _derivatives(y + 0.5 * h * k1, rates)
+                    k3 = _derivatives(y + 0.5 * h * k2, rates)
+                    k4 = _derivatives(y + h * k3, rates)
+                    y = y + (h / 6.0) * (k1 + 2.0 * k2 + 2.0 * k3 + k4)
+            output[position] = y
+        yield first, {name: output[:, species, :].T for species, name in enumerate(SPECIES)}
+
+def integrate(
+    rates: Dict[str, np.ndarray],
+    times: np.ndarray,
+    max_step_rate: float = 1.0,
+    dtype: Any = np.float64,
+) -> Dict[str, np.ndarray]:
+    """
+    Integrate the model for every row of `rates` and return each species as
+    a (rows x len(times)) array. See integrate_chunks.
+    """
+    rows = len(rates["mu_max"])
+    chunks = [species for _, species in integrate_chunks(rates, times, max(len(times), 1), max_step_rate, dtype)]
+    if not chunks:
+        return {name: np.empty((rows, 0), dtype=dtype) for name in SPECIES}
+    return chunks[0]
+
+def steady_state_protein(rates: Dict[str, np.ndarray]) -> np.ndarray:
+    """
+    Protein per cell during balanced growth at mu_max, ignoring burden
+    (with mu_max = 0, once growth has stopped).
+    """
+    growth = rates["mu_max"]
+    return rates["transcription"] * rates["translation"] / ((rates["d_m"] + growth) * (rates["d_p"] + growth))
@@ -0,0 +1,71 @@
+from typing import List, NamedTuple, Sequence
+import numpy as np
+
+from bioforge_seqkit.encoding import SequenceLike, as_codes, reverse_complement_codes, codon_codes, codon_code
+
+START_CODON = codon_code("ATG")
+STOP_CODONS = np.array([codon_code(codon) for codon in ("TAA", "TAG", "TGA")])
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+class ORF(NamedTuple):
+    """
+    An open reading frame as a coordinate span on the forward strand.
+    `start` is inclusive and `end` is exclusive; the span includes the stop
+    codon. `frame` is the reading frame (0-2) on the ORF's own strand.
+    """
+    start: int
+    end: int
+    strand: int
+    frame: int
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+def find_orfs(sequence: SequenceLike, min_length: int = 30, strands: Sequence[int] = (1, -1)) -> List[ORF]:
+    """
+    Find all open reading frames in a DNA sequence.
+    Every in-frame ATG is paired with the first downstream in-frame stop codon;
+    ATGs without a downstream stop are not reported. Results are ordered by
+    strand, then frame, then start position on that strand.
+    """
+    codes = as_codes(sequence)
+    n = len(codes)
+    orfs = []
+
+    for strand in strands:
+        strand_codes = codes if strand == 1 else reverse_complement_codes(codes)
+        codons = codon_codes(strand_codes)
+        starts = np.flatnonzero(codons == START_CODON)
+        stops = np.flatnonzero(np.isin(codons, STOP_CODONS))
+
+        for frame in range(3):
+            frame_starts = starts[starts % 3 == frame]
+            frame_stops = stops[stops % 3 == frame]
+            if len(frame_starts) == 0 or len(frame_stops) == 0:
+                continue
+
+            # Pair each start with the next in-frame stop
+            next_stop = np.searchsorted(frame_stops, frame_starts)
+            has_stop = next_stop < len(frame_stops)
+            orf_starts = frame_starts[has_stop]
+            orf_ends = frame_stops[next_stop[has_stop]] + 3
+            keep = orf_ends - orf_starts >= min_length
+
+            for start, end in zip(orf_starts[keep].tolist(), orf_ends[keep].tolist()):
+                if strand == 1:
+                    orfs.append(ORF(start, end, 1, frame))
+                else:
+                    orfs.append(ORF(n - end, n - start, -1, frame))
+
+    return orfs
+
+def orf_sequence(sequence: str, orf: ORF) -> str:
+    """
+    Get the coding sequence of an ORF, reverse-complemented for the minus strand.
+    """
+    span = sequence[orf.start:orf.end].upper()
+    if orf.strand == 1:
+        return span
+    return span[::-1].translate(_COMPLEMENT)
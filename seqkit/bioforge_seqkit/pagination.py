@@ -0,0 +1,48 @@
+"""
+Opaque cursors for paginated listings.
+
+A cursor is the URL-safe base64 of a small JSON document: the position
+after the last item of a page, plus a digest of the search parameters it
+belongs to. A cursor sent with other parameters is rejected rather than
+silently paging through a different listing. The digest is an HMAC keyed
+with CURSOR_SECRET, so with a secret set, clients cannot forge cursors;
+services still check the shape of every decoded position.
+"""
+from typing import Any, Dict, Optional
+import base64
+import hmac
+import json
+import os
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Key of the cursor scope digests; services that hand each other cursors must share it
+CURSOR_SECRET = os.environ.get("CURSOR_SECRET", "")
+
+class InvalidCursorError(ValueError):
+    """A cursor that is malformed or belongs to another search."""
+
+def cursor_scope(*parameters: Any) -> str:
+    """Digest of the search parameters a cursor is valid for."""
+    payload = json.dumps(parameters, default=str).encode()
+    return hmac.new(CURSOR_SECRET.encode(), payload, "sha256").hexdigest()[:16]
+
+def encode_cursor(position: Dict[str, Any], scope: str) -> str:
+    """Encode a position (a JSON-serializable dict) as an opaque cursor."""
+    document = json.dumps({**position, "scope": scope}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(document.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str], scope: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the position of a cursor, or None without a cursor (the first page).
+    Raises InvalidCursorError if the cursor is malformed or was made for another scope.
+    """
+    if not cursor:
+        return None
+    try:
+        document = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursorError("Malformed cursor")
+    if not isinstance(document, dict) or not hmac.compare_digest(str(document.pop("scope", "")), scope):
+        raise InvalidCursorError("Cursor belongs to another search")
+    return document
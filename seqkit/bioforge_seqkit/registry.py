@@ -0,0 +1,143 @@
+"""
+Lazy model registry.
+
+Models are registered with a loader and loaded on first use, or ahead of time
+in a background thread, so a service can start answering sequence-only
+requests before multi-GB weights are in memory. Each model is loaded at most
+once; concurrent first users wait for the same load.
+"""
+from typing import Any, Callable, Dict, Iterable, Optional
+import asyncio
+import threading
+import time
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+class ModelUnavailableError(RuntimeError):
+    """
+    Raised when a model failed to load. Services fall back or answer 503.
+    """
+
+class _Entry:
+    def __init__(self, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]]):
+        self.loader = loader
+        self.warmup = warmup
+        self.lock = threading.Lock()
+        self.status = NOT_LOADED
+        self.model = None
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+def model_memory(model: Any) -> Dict[str, int]:
+    """
+    Count the parameter and buffer memory of a model, or of every PyTorch
+    module in a tuple such as (model, alphabet).
+    """
+    modules = model if isinstance(model, (tuple, list)) else (model,)
+    parameters = parameter_bytes = buffer_bytes = 0
+    for module in modules:
+        if not hasattr(module, "parameters"):
+            continue
+        for parameter in module.parameters():
+            parameters += parameter.numel()
+            parameter_bytes += parameter.numel() * parameter.element_size()
+        for buffer in module.buffers():
+            buffer_bytes += buffer.numel() * buffer.element_size()
+    return {
+        "parameters": parameters,
+        "parameter_bytes": parameter_bytes,
+        "buffer_bytes": buffer_bytes,
+        "total_bytes": parameter_bytes + buffer_bytes,
+    }
+
+class ModelRegistry:
+    def __init__(self, warmup: bool = False):
+        """
+        With `warmup`, each model's warm-up function runs right after it loads,
+        so the first real request does not pay for lazy initialization.
+        """
+        self.warmup = warmup
+        self._entries: Dict[str, _Entry] = {}
+
+    def register(self, name: str, loader: Callable[[], Any], warmup: Optional[Callable[[Any], None]] = None):
+        self._entries[name] = _Entry(loader, warmup)
+
+    def get(self, name: str) -> Any:
+        """
+        Get a model, loading it first if needed. Blocks while loading;
+        raises ModelUnavailableError if the model could not be loaded.
+        """
+        entry = self._entries[name]
+        if entry.status != READY:
+            with entry.lock:
+                if entry.status in (NOT_LOADED, LOADING):
+                    self._load(entry)
+        if entry.status == FAILED:
+            raise ModelUnavailableError(f"Model {name} is not available: {entry.error}")
+        return entry.model
+
+    async def acquire(self, name: str) -> Any:
+        """
+        Get a model without blocking the event loop while it loads.
+        """
+        if self._entries[name].status == READY:
+            return self._entries[name].model
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, name)
+
+    def load_in_background(self, names: Iterable[str]):
+        """
+        Start loading models in a background thread, one after another.
+        """
+        names = [name for name in names if name]
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except ModelUnavailableError:
+                    pass  # Recorded on the entry and reported by info()
+
+        if names:
+            threading.Thread(target=load_all, name="model-preload", daemon=True).start()
+
+    def status(self, name: str) -> str:
+        return self._entries[name].status
+
+    def is_ready(self, names: Iterable[str]) -> bool:
+        return all(self._entries[name].status == READY for name in names if name)
+
+    def info(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load state, timings and memory footprint of every registered model.
+        """
+        info = {}
+        for name, entry in self._entries.items():
+            info[name] = {
+                "status": entry.status,
+                "error": entry.error,
+                "load_seconds": entry.load_seconds,
+                "warmup_seconds": entry.warmup_seconds,
+                "memory": model_memory(entry.model) if entry.status == READY else None,
+            }
+        return info
+
+    def _load(self, entry: _Entry):
+        entry.status = LOADING
+        start = time.perf_counter()
+        try:
+            model = entry.loader()
+            entry.load_seconds = time.perf_counter() - start
+            if self.warmup and entry.warmup is not None:
+                start = time.perf_counter()
+                entry.warmup(model)
+                entry.warmup_seconds = time.perf_counter() - start
+        except Exception as e:
+            entry.status = FAILED
+            entry.error = str(e)
+            return
+        entry.model = model
+        entry.status = READY
@@ -0,0 +1,196 @@
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+from array import array
+from collections import deque
+
+from bioforge_seqkit.encoding import INVALID, SequenceLike, as_codes, encode, reverse_complement_codes
+
+# Transition table width: one column per base plus one for invalid characters
+_WIDTH = INVALID + 1
+
+class Hit(NamedTuple):
+    """
+    A signature match. `start`/`end` are forward-strand coordinates (end exclusive);
+    `strand` is -1 when the reverse complement of the signature matched.
+    """
+    pattern_id: str
+    start: int
+    end: int
+    strand: int
+
+class PatternMatcher:
+    """
+    Aho-Corasick automaton over a set of DNA signatures.
+    Each signature is inserted together with its reverse complement, so one
+    left-to-right pass over a sequence finds matches on both strands. The scan
+    cost depends on the sequence length and the number of hits, not on the
+    number of signatures.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        """
+        Build the automaton from (pattern ID, DNA sequence) pairs.
+        """
+        self.pattern_ids: List[str] = []
+        self.pattern_lengths: List[int] = []
+
+        # Goto trie, flattened: children[state * _WIDTH + code]
+        children = array("i", [-1] * _WIDTH)
+        # Terminal entries per state as (pattern index, strand)
+        terminals = {}
+
+        for pattern_id, sequence in patterns:
+            codes = encode(sequence)
+            if len(codes) == 0 or (codes == INVALID).any():
+                raise ValueError(f"Signature {pattern_id} must be a non-empty A/C/G/T sequence")
+
+            index = len(self.pattern_ids)
+            self.pattern_ids.append(pattern_id)
+            self.pattern_lengths.append(len(codes))
+
+            orientations = [(codes, 1)]
+            reverse = reverse_complement_codes(codes)
+            if bytes(reverse) != bytes(codes):
+                orientations.append((reverse, -1))
+
+            for oriented, strand in orientations:
+                state = 0
+                for code in oriented.tolist():
+                    next_state = children[state * _WIDTH + code]
+                    if next_state == -1:
+                        next_state = len(children) // _WIDTH
+                        children[state * _WIDTH + code] = next_state
+                        children.extend([-1] * _WIDTH)
+                    state = next_state
+                terminals.setdefault(state, []).append((index, strand))
+
+        self._build(children, terminals)
+
+    def _build(self, children: array, terminals: dict):
+        """
+        Resolve failure links into a full transition table (a DFA) and link
+        each state to the nearest terminal state on its failure chain.
+        """
+        state_count = len(children) // _WIDTH
+        fail = array("i", [0]) * state_count
+        output_link = array("i", [-1]) * state_count
+        delta = children
+
+        queue = deque()
+        for code in range(_WIDTH):
+            child = delta[code]
+            if child == -1 or code == INVALID:
+                delta[code] = 0
+            else:
+                queue.append(child)
+
+        while queue:
+            state = queue.popleft()
+            fallback = fail[state]
+            output_link[state] = fallback if fallback in terminals else output_link[fallback]
+
+            row = state * _WIDTH
+            fallback_row = fallback * _WIDTH
+            for code in range(INVALID):
+                child = delta[row + code]
+                if child == -1:
+                    delta[row + code] = delta[fallback_row + code]
+                else:
+                    fail[child] = delta[fallback_row + code]
+                    queue.append(child)
+            delta[row + INVALID] = 0
+
+        # Flatten terminal entries: terminal_entries[terminal_offsets[s]:terminal_offsets[s + 1]]
+        terminal_offsets = array("i", [0]) * (state_count + 1)
+        terminal_entries = array("i")
+        for state in range(state_count):
+            for index, strand in terminals.get(state, ()):
+                terminal_entries.extend((index, strand))
+            terminal_offsets[state + 1] = len(terminal_entries) // 2
+
+        # States that end at least one signature, directly or via their output link
+        reports = bytearray(state_count)
+        for state in range(state_count):
+            if state in terminals or output_link[state] != -1:
+                reports[state] = 1
+
+        self._set_tables(delta, output_link, terminal_offsets, terminal_entries, reports)
+
+    def _set_tables(self, delta, output_link, terminal_offsets, terminal_entries, reports):
+        self._delta = delta
+        self._output_link = output_link
+        self._terminal_offsets = terminal_offsets
+        self._terminal_entries = terminal_entries
+        self._reports = reports
+
+    def tables(self) -> Dict[str, Sequence[int]]:
+        """
+        Get the automaton tables as flat buffers, for serialization.
+        """
+        return {
+            "delta": self._delta,
+            "output_link": self._output_link,
+            "terminal_offsets": self._terminal_offsets,
+            "terminal_entries": self._terminal_entries,
+            "reports": self._reports,
+        }
+
+    @classmethod
+    def from_tables(
+        cls, pattern_ids: List[str], pattern_lengths: List[int], tables: Dict[str, Sequence[int]]
+    ) -> "PatternMatcher":
+        """
+        Rebuild a matcher from prebuilt tables without re-running construction.
+        The tables may be memoryviews over a memory-mapped index file.
+        """
+        matcher = cls.__new__(cls)
+        matcher.pattern_ids = pattern_ids
+        matcher.pattern_lengths = pattern_lengths
+        matcher._set_tables(
+            tables["delta"],
+            tables["output_link"],
+            tables["terminal_offsets"],
+            tables["terminal_entries"],
+            tables["reports"],
+        )
+        return matcher
+
+    @property
+    def pattern_count(self) -> int:
+        return len(self.pattern_ids)
+
+    @property
+    def state_count(self) -> int:
+        return len(self._reports)
+
+    def scan(self, sequence: SequenceLike) -> List[Hit]:
+        """
+        Find every signature occurrence on either strand of a DNA sequence.
+        Hits are ordered by end position.
+        """
+        delta = self._delta
+        reports = self._reports
+        hits = []
+        state = 0
+
+        for position, code in enumerate(bytes(as_codes(sequence))):
+            state = delta[state * _WIDTH + code]
+            if reports[state]:
+                self._collect(state, position + 1, hits)
+
+        return hits
+
+    def matched_ids(self, sequence: SequenceLike) -> List[str]:
+        """
+        Get the distinct IDs of the signatures found in a DNA sequence, in order of first hit.
+        """
+        return list(dict.fromkeys(hit.pattern_id for hit in self.scan(sequence)))
+
+    def _collect(self, state: int, end: int, hits: List[Hit]):
+        offsets = self._terminal_offsets
+        entries = self._terminal_entries
+        while state != -1:
+            for entry in range(offsets[state], offsets[state + 1]):
+                index = entries[entry * 2]
+                length = self.pattern_lengths[index]
+                hits.append(Hit(self.pattern_ids[index], end - length, end, entries[entry * 2 + 1]))
+            state = self._output_link[state]
@@ -0,0 +1,328 @@
+"""
+Hazard signature database.
+
+Signatures are kept as FASTA plus a metadata TSV and compiled offline into a
+single index file holding the prebuilt Aho-Corasick tables and the homology
+(minimizer sketch) index. Services memory-map the index read-only, so loading
+takes milliseconds and every worker process on a host shares one physical
+copy through the page cache.
+
+Compile an index with:
+
+    python -m bioforge_seqkit.signatures compile signatures.fasta \\
+        --metadata signatures.tsv --organisms restricted_organisms.txt \\
+        --output signatures.idx
+"""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import numpy as np
+
+from bioforge_seqkit.homology import HomologyIndex
+from bioforge_seqkit.screening import PatternMatcher
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BFSIG002"
+_HEADER_LENGTH = struct.Struct("<Q")
+_ALIGNMENT = 8
+
+# Table name -> memoryview format of its elements
+_TABLE_FORMATS = {
+    "delta": "i",
+    "output_link": "i",
+    "terminal_offsets": "i",
+    "terminal_entries": "i",
+    "reports": "B",
+}
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+EXAMPLE_FASTA = os.path.join(DATA_DIR, "example_signatures.fasta")
+EXAMPLE_METADATA = os.path.join(DATA_DIR, "example_signatures.tsv")
+EXAMPLE_ORGANISMS = os.path.join(DATA_DIR, "restricted_organisms.txt")
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    return open(path)
+
+def read_fasta(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Read (ID, sequence) records from a FASTA file, optionally gzip-compressed.
+    The ID is the first word of the header line.
+    """
+    record_id = None
+    chunks = []
+    with _open_text(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith(">"):
+                if record_id is not None:
+                    yield record_id, "".join(chunks)
+                record_id = line[1:].split(None, 1)[0]
+                chunks = []
+            else:
+                chunks.append(line)
+    if record_id is not None:
+        yield record_id, "".join(chunks)
+
+def read_metadata(path: str) -> Dict[str, Dict[str, str]]:
+    """
+    Read signature metadata from a TSV file with a header row and an `id` column.
+    """
+    with _open_text(path) as handle:
+        return {row.pop("id"): row for row in csv.DictReader(handle, delimiter="\t")}
+
+def read_organisms(path: str) -> List[str]:
+    """
+    Read a restricted organism list, one name per line.
+    """
+    with _open_text(path) as handle:
+        return [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+
+class SignatureIndex:
+    """
+    A loaded signature database: the exact matcher, the homology index and metadata.
+    """
+
+    def __init__(
+        self,
+        matcher: PatternMatcher,
+        homology: HomologyIndex,
+        metadata: Dict[str, Dict[str, str]],
+        restricted_organisms: List[str],
+        version: str,
+    ):
+        self.matcher = matcher
+        self.homology = homology
+        self.metadata = metadata
+        self.restricted_organisms = restricted_organisms
+        self.version = version
+
+    @classmethod
+    def build(
+        cls,
+        fasta_path: str,
+        metadata_path: Optional[str] = None,
+        organisms_path: Optional[str] = None,
+        version: Optional[str] = None,
+    ) -> "SignatureIndex":
+        """
+        Build an index in memory from source files.
+        """
+        signatures = list(read_fasta(fasta_path))
+        metadata = read_metadata(metadata_path) if metadata_path else {}
+        organisms = read_organisms(organisms_path) if organisms_path else []
+
+        if version is None:
+            digest = hashlib.sha256()
+            for signature_id, sequence in signatures:
+                digest.update(f"{signature_id}\t{sequence.upper()}\n".encode())
+            for organism in organisms:
+                digest.update(f"{organism}\n".encode())
+            version = digest.hexdigest()[:16]
+
+        return cls(PatternMatcher(signatures), HomologyIndex.build(signatures), metadata, organisms, version)
+
+    @classmethod
+    def build_example(cls) -> "SignatureIndex":
+        """
+        Build the small example database bundled with the toolkit.
+        """
+        return cls.build(EXAMPLE_FASTA, EXAMPLE_METADATA, EXAMPLE_ORGANISMS)
+
+    def save(self, path: str):
+        """
+        Write the index to a file. The file is written next to its destination
+        and renamed into place, so running services never see a partial index.
+        """
+        tables = {name: memoryview(table).cast("B") for name, table in self.matcher.tables().items()}
+        homology_tables = self.homology.tables()
+
+        layout = {}
+        homology_layout = {}
+        offset = 0
+        for name, table in tables.items():
+            layout[name] = [offset, len(table)]
+            offset += len(table) + (-len(table) % _ALIGNMENT)
+        for name, array in homology_tables.items():
+            homology_layout[name] = [offset, array.nbytes, array.dtype.str]
+            offset += array.nbytes + (-array.nbytes % _ALIGNMENT)
+
+        header = json.dumps({
+            "version": self.version,
+            "byteorder": sys.byteorder,
+            "pattern_ids": self.matcher.pattern_ids,
+            "pattern_lengths": self.matcher.pattern_lengths,
+            "metadata": self.metadata,
+            "restricted_organisms": self.restricted_organisms,
+            "tables": layout,
+            "homology_parameters": self.homology.parameters(),
+            "homology_tables": homology_layout,
+        }).encode()
+        header += b" " * (-(len(MAGIC) + _HEADER_LENGTH.size + len(header)) % _ALIGNMENT)
+
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as handle:
+            handle.write(MAGIC)
+            handle.write(_HEADER_LENGTH.pack(len(header)))
+            handle.write(header)
+            for table in tables.values():
+                handle.write(table)
+                handle.write(b"\0" * (-len(table) % _ALIGNMENT))
+            for array in homology_tables.values():
+                handle.write(np.ascontiguousarray(array).tobytes())
+                handle.write(b"\0" * (-array.nbytes % _ALIGNMENT))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SignatureIndex":
+        """
+        Memory-map a compiled index file. The automaton and homology tables are
+        used in place; only the header (IDs and metadata) is parsed.
+        """
+        with open(path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mapped[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a signature index")
+        start = len(MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack_from(mapped, len(MAGIC))
+        header = json.loads(mapped[start:start + header_length])
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was compiled on a {header['byteorder']}-endian host")
+
+        data_start = start + header_length
+        buffer = memoryview(mapped)
+        tables = {}
+        for name, (offset, size) in header["tables"].items():
+            table_start = data_start + offset
+            tables[name] = buffer[table_start:table_start + size].cast(_TABLE_FORMATS[name])
+
+        homology_tables = {}
+        for name, (offset, size, dtype) in header["homology_tables"].items():
+            table_start = data_start + offset
+            homology_tables[name] = np.frombuffer(buffer[table_start:table_start + size], dtype=dtype)
+
+        matcher = PatternMatcher.from_tables(header["pattern_ids"], header["pattern_lengths"], tables)
+        homology = HomologyIndex.from_tables(header["pattern_ids"], header["homology_parameters"], homology_tables)
+        return cls(matcher, homology, header["metadata"], header["restricted_organisms"], header["version"])
+
+class SignatureDatabase:
+    """
+    Hot-reloadable handle on a compiled signature index.
+    The index file is re-checked at most every `check_interval` seconds and
+    reloaded when it has been replaced, without restarting the service.
+    Without a path, the bundled example database is used and never reloads.
+    """
+
+    def __init__(self, path: Optional[str] = None, check_interval: float = 5.0):
+        self.path = path or None
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stat = None
+        self._checked_at = 0.0
+        self.loaded_at = 0.0
+
+        if self.path:
+            self._index = self._load()
+        else:
+            self._index = SignatureIndex.build_example()
+            self.loaded_at = time.time()
+
+    def current(self) -> SignatureIndex:
+        """
+        Get the current index, reloading it first if the file has changed.
+        """
+        if self.path and time.monotonic() - self._checked_at >= self.check_interval:
+            self._checked_at = time.monotonic()
+            if self._file_stat() != self._stat:
+                self.reload()
+        return self._index
+
+    def reload(self) -> SignatureIndex:
+        """
+        Load the index file again. In-flight scans keep the index they started with.
+        """
+        if self.path:
+            with self._lock:
+                self._index = self._load()
+        return self._index
+
+    def info(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "version": index.version,
+            "path": self.path,
+            "signatures": index.matcher.pattern_count,
+            "restricted_organisms": len(index.restricted_organisms),
+            "loaded_at": self.loaded_at,
+        }
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return self._stat  # Keep serving the loaded index while the file is missing
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _load(self) -> SignatureIndex:
+        stat = self._file_stat()
+        index = SignatureIndex.load(self.path)
+        self._stat = stat
+        self.loaded_at = time.time()
+        return index
+
+def main(argv: Optional[List[str]] = None) -> int:
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(prog="python -m bioforge_seqkit.signatures")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    compile_parser = commands.add_parser("compile", help="Compile a signature index")
+    compile_parser.add_argument("fasta", nargs="?", default=EXAMPLE_FASTA, help="Signature FASTA (.gz allowed)")
+    compile_parser.add_argument("--metadata", help="Signature metadata TSV with an id column")
+    compile_parser.add_argument("--organisms", help="Restricted organism list, one per line")
+    compile_parser.add_argument("--version", help="Index version label (default: content hash)")
+    compile_parser.add_argument("--output", required=True, help="Index file to write")
+
+    info_parser = commands.add_parser("info", help="Describe a compiled signature index")
+    info_parser.add_argument("index")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        metadata, organisms = args.metadata, args.organisms
+        if args.fasta == EXAMPLE_FASTA:
+            metadata = metadata or EXAMPLE_METADATA
+            organisms = organisms or EXAMPLE_ORGANISMS
+        start = time.perf_counter()
+        index = SignatureIndex.build(args.fasta, metadata, organisms, args.version)
+        index.save(args.output)
+        logger.info(
+            f"Compiled {index.matcher.pattern_count} signatures ({index.matcher.state_count} states) "
+            f"into {args.output} in {time.perf_counter() - start:.2f}s, version {index.version}"
+        )
+    else:
+        start = time.perf_counter()
+        index = SignatureIndex.load(args.index)
+        logger.info(
+            f"{args.index}: version {index.version}, {index.matcher.pattern_count} signatures, "
+            f"{len(index.restricted_organisms)} restricted organisms, "
+            f"loaded in {(time.perf_counter() - start) * 1000:.1f} ms"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,460 @@
+"""
+Sequence-similarity index ("find parts similar to this sequence").
+
+Each part is sketched as the hashes of its canonical k-mers (the smaller
+of a k-mer and its reverse complement, so parts match in either
+orientation). Long parts keep only the hashes below 2^64 / scale, about one
+k-mer in `scale` (a FracMinHash sketch); parts too short to keep
+`min_hashes` hashes that way keep all of their k-mers. Queries are hashed in
+full, so the number of a part's sketch hashes found in the query gives
+
+- part containment: the fraction of the part's k-mers found in the query, and
+- query containment: the fraction of the query's k-mers found in the part
+  (the shared k-mers are estimated as the shared hashes times the part's scale).
+
+The index is inverted: (hash, part) postings sorted by hash. A search binary
+searches every distinct query hash and counts the postings per part, so it
+costs O(query length x log(index size) + hits), however many parts there are.
+
+Parts are added in immutable segments. A part that is added again is marked
+deleted in the segment that held it, and segments of similar size are merged
+as in a log-structured merge tree, so there are O(log n) segments and each
+posting is rewritten O(log n) times. With a directory, each segment is a file
+that is memory-mapped read-only and a manifest, replaced atomically, lists
+the live segments and their deleted parts: an index over a million parts
+opens in milliseconds and only the pages that searches touch are read.
+A directory has a single writer (one process adding parts).
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import numpy as np
+
+from bioforge_seqkit.encoding import INVALID, SequenceLike, as_codes
+from bioforge_seqkit.homology import _HASH_MULTIPLIER, _MASKED_HASH, _concatenate
+
+MAGIC = b"BFSIM001"
+_HEADER_LENGTH = struct.Struct("<Q")
+_ALIGNMENT = 8
+MANIFEST = "manifest.json"
+
+DEFAULT_K = 21
+DEFAULT_SCALE = 20
+
+# Parts with fewer expected sketch hashes than this are indexed with every k-mer
+MIN_SKETCH_HASHES = 16
+
+# Query hashes shared by more parts than this (vector backbones, tags) are skipped as repeats
+MAX_POSTINGS = 10_000
+
+# Bases sketched at a time when building a segment, bounding the memory used for hashing
+SKETCH_CHUNK_BASES = 4_000_000
+
+# Segments are merged while the older one holds at most this many times the parts of the newer one
+MERGE_RATIO = 2
+
+ORDERS = ("query", "part")
+
+class SimilarityHit(NamedTuple):
+    """
+    A part sharing k-mers with the query. `shared_hashes` counts the part's
+    sketch hashes found in the query; containments are between 0 and 1.
+    """
+    part_id: str
+    shared_hashes: int
+    query_containment: float
+    part_containment: float
+
+class _Segment(NamedTuple):
+    name: Optional[str]  # File name in the index directory
+    ids: np.ndarray  # Sorted part IDs (bytes)
+    sizes: np.ndarray  # Sketch hashes per part
+    scales: np.ndarray  # 1 for parts sketched in full, else the index scale
+    hashes: np.ndarray  # Posting hashes, sorted
+    rows: np.ndarray  # Part (row of ids) of each posting
+    deleted: np.ndarray  # Parts superseded by a newer segment
+
+    @property
+    def live(self) -> int:
+        return len(self.ids) - int(np.count_nonzero(self.deleted))
+
+def canonical_hashes(symbols: np.ndarray, k: int) -> np.ndarray:
+    """
+    Hash the canonical k-mer (the smaller of the k-mer and its reverse
+    complement, packed two bits per base) starting at every position of
+    encoded DNA; k-mers with an invalid base get the masked hash.
+    """
+    count = len(symbols) - k + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.uint64)
+
+    forward = np.zeros(count, dtype=np.uint64)
+    reverse = np.zeros(count, dtype=np.uint64)
+    valid = np.ones(count, dtype=bool)
+    for offset in range(k):
+        window = symbols[offset:offset + count]
+        bases = window.astype(np.uint64) & np.uint64(3)
+        forward = (forward << np.uint64(2)) | bases
+        reverse |= (bases ^ np.uint64(3)) << np.uint64(2 * offset)
+        valid &= window < 4
+
+    hashes = np.minimum(forward, reverse) * _HASH_MULTIPLIER
+    hashes ^= hashes >> np.uint64(29)
+    hashes[~valid] = _MASKED_HASH
+    return hashes
+
+def _expand_ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenate the index ranges [start, end) into one array."""
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(int(lengths.sum()))
+
+class SimilarityIndex:
+    """
+    K-mer containment index over part sequences. Without a path the index
+    lives in memory; with one it is kept in that directory, and an index
+    built there with other parameters is discarded and starts empty.
+    Searches run concurrently with adds and see the index as of their start.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        k: int = DEFAULT_K,
+        scale: int = DEFAULT_SCALE,
+        min_hashes: int = MIN_SKETCH_HASHES,
+    ):
+        if not 1 <= k <= 32:
+            raise ValueError("k must be between 1 and 32")
+        self.path = path or None
+        self.k = k
+        self.scale = max(1, scale)
+        self.min_hashes = min_hashes
+        # Opaque position of the last change indexed (e.g. a catalog revision)
+        self.watermark: Any = None
+        self._max_hash = np.uint64(np.iinfo(np.uint64).max // self.scale)
+        self._lock = threading.Lock()
+        self._segments: Tuple[_Segment, ...] = ()
+        self._generation = 0
+        if self.path:
+            os.makedirs(self.path, exist_ok=True)
+            self._open()
+
+    def __len__(self) -> int:
+        return sum(segment.live for segment in self._segments)
+
+    def parameters(self) -> Dict[str, int]:
+        return {"k": self.k, "scale": self.scale, "min_hashes": self.min_hashes}
+
+    def info(self) -> Dict[str, Any]:
+        segments = self._segments
+        return {
+            **self.parameters(),
+            "path": self.path,
+            "parts": sum(segment.live for segment in segments),
+            "postings": sum(len(segment.hashes) for segment in segments),
+            "segments": len(segments),
+            "watermark": self.watermark,
+        }
+
+    def add(self, parts: Iterable[Tuple[str, SequenceLike]], watermark: Any = None) -> int:
+        """
+        Index (part ID, sequence) pairs, replacing parts already indexed under
+        the same ID, and record `watermark` with them. Parts shorter than k
+        are kept but can never match. Returns the number of parts added.
+        """
+        batch: Dict[str, SequenceLike] = {}
+        for part_id, sequence in parts:
+            batch[part_id] = sequence
+        with self._lock:
+            segments = list(self._segments)
+            obsolete = []
+            if batch:
+                ids = np.array([part_id.encode() for part_id in batch])
+                segments = [self._deleted(segment, ids) for segment in segments]
+                segments.append(self._build(list(batch.items())))
+                segments, obsolete = self._merged(segments)
+                segments = [segment if segment.name else self._write(segment) for segment in segments]
+            if watermark is not None:
+                self.watermark = watermark
+            self._segments = tuple(segments)
+            self._save_manifest()
+            self._remove(obsolete)
+        return len(batch)
+
+    def remove(self, part_ids: Iterable[str]) -> int:
+        """Remove parts from the index. Returns the number of parts that were indexed."""
+        ids = np.array([part_id.encode() for part_id in part_ids])
+        if len(ids) == 0:
+            return 0
+        with self._lock:
+            before = len(self)
+            self._segments = tuple(self._deleted(segment, ids) for segment in self._segments)
+            self._save_manifest()
+            return before - len(self)
+
+    def clear(self):
+        """Remove every part and the watermark."""
+        with self._lock:
+            obsolete = [segment.name for segment in self._segments]
+            self._segments = ()
+            self.watermark = None
+            self._save_manifest()
+            self._remove(obsolete)
+
+    def search(
+        self,
+        sequence: SequenceLike,
+        limit: int = 10,
+        min_containment: float = 0.0,
+        order_by: str = "query",
+    ) -> List[SimilarityHit]:
+        """
+        Find the parts with the highest containment of the query in them
+        (order_by="query": parts holding most of the sequence) or of them in
+        the query (order_by="part": parts found in the sequence, e.g. the
+        parts of a construct), at least `min_containment`.
+        """
+        if order_by not in ORDERS:
+            raise ValueError(f"order_by must be one of {', '.join(ORDERS)}")
+        hashes = canonical_hashes(as_codes(sequence), self.k)
+        hashes = np.unique(hashes[hashes != _MASKED_HASH])
+        segments = self._segments
+        if len(hashes) == 0 or not segments or limit <= 0:
+            return []
+
+        bounds = [
+            (np.searchsorted(segment.hashes, hashes, side="left"), np.searchsorted(segment.hashes, hashes, side="right"))
+            for segment in segments
+        ]
+        postings = sum(high - low for low, high in bounds)
+        seeds = (postings > 0) & (postings <= MAX_POSTINGS)
+
+        ids, shared, query_containment, part_containment = [], [], [], []
+        for segment, (low, high) in zip(segments, bounds):
+            rows = segment.rows[_expand_ranges(low[seeds], high[seeds])]
+            rows = rows[~segment.deleted[rows]]
+            if len(rows) == 0:
+                continue
+            rows, counts = np.unique(rows, return_counts=True)
+            ids.append(segment.ids[rows])
+            shared.append(counts)
+            query_containment.append(np.minimum(1.0, counts * segment.scales[rows] / len(hashes)))
+            part_containment.append(counts / segment.sizes[rows])
+        if not ids:
+            return []
+
+        ids = np.concatenate(ids)
+        shared = np.concatenate(shared)
+        query_containment = np.concatenate(query_containment)
+        part_containment = np.concatenate(part_containment)
+        scores = query_containment if order_by == "query" else part_containment
+        candidates = np.flatnonzero(scores >= min_containment)
+        best = candidates[np.lexsort((-shared[candidates], -scores[candidates]))[:limit]]
+        return [
+            SimilarityHit(ids[i].decode(), int(shared[i]), float(query_containment[i]), float(part_containment[i]))
+            for i in best
+        ]
+
+    def _build(self, parts: List[Tuple[str, SequenceLike]]) -> _Segment:
+        """Sketch parts into a new segment, a chunk of sequences at a time."""
+        ids = np.array([part_id.encode() for part_id, _ in parts])
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        sizes = np.zeros(len(ids), dtype=np.uint32)
+        scales = np.ones(len(ids), dtype=np.uint32)
+        hash_chunks, row_chunks = [], []
+
+        first = 0
+        while first < len(order):
+            codes, bases = [], 0
+            while first + len(codes) < len(order) and (not codes or bases < SKETCH_CHUNK_BASES):
+                codes.append(as_codes(parts[order[first + len(codes)]][1]))
+                bases += len(codes[-1])
+            symbols, starts = _concatenate(codes, INVALID)
+            hashes = canonical_hashes(symbols, self.k)
+            positions = np.flatnonzero(hashes != _MASKED_HASH)
+            hashes = hashes[positions]
+            rows = np.searchsorted(starts, positions, side="right") - 1
+
+            # Parts too short for a scaled sketch of min_hashes keep every k-mer
+            sampled = np.bincount(rows, minlength=len(codes)) > self.scale * self.min_hashes
+            keep = ~sampled[rows] | (hashes <= self._max_hash)
+            scales[first:first + len(codes)] = np.where(sampled, self.scale, 1)
+            hash_chunks.append(hashes[keep])
+            row_chunks.append((rows[keep] + first).astype(np.uint32))
+            first += len(codes)
+
+        hashes = np.concatenate(hash_chunks) if hash_chunks else np.empty(0, dtype=np.uint64)
+        rows = np.concatenate(row_chunks) if row_chunks else np.empty(0, dtype=np.uint32)
+        # Distinct (hash, part) postings, sorted by hash
+        order = np.lexsort((rows, hashes))
+        hashes, rows = hashes[order], rows[order]
+        distinct = np.ones(len(hashes), dtype=bool)
+        distinct[1:] = (hashes[1:] != hashes[:-1]) | (rows[1:] != rows[:-1])
+        hashes, rows = hashes[distinct], rows[distinct]
+        sizes[:] = np.bincount(rows, minlength=len(ids))
+        return _Segment(None, ids, sizes, scales, hashes, rows, np.zeros(len(ids), dtype=bool))
+
+    @staticmethod
+    def _deleted(segment: _Segment, ids: np.ndarray) -> _Segment:
+        """Get the segment with the parts of `ids` it holds marked deleted."""
+        if len(segment.ids) == 0:
+            return segment
+        rows = np.minimum(np.searchsorted(segment.ids, ids), len(segment.ids) - 1)
+        rows = rows[segment.ids[rows] == ids]
+        if len(rows) == 0:
+            return segment
+        deleted = segment.deleted.copy()
+        deleted[rows] = True
+        return segment._replace(deleted=deleted)
+
+    def _merged(self, segments: List[_Segment]) -> Tuple[List[_Segment], List[str]]:
+        """
+        Merge the newest segments while they are of similar size, dropping
+        deleted parts. Returns the segments (merged ones not yet written) and
+        the files no longer used.
+        """
+        obsolete = []
+        while len(segments) >= 2 and segments[-2].live <= MERGE_RATIO * segments[-1].live:
+            older, newer = segments[-2], segments[-1]
+            obsolete.extend(segment.name for segment in (older, newer) if segment.name)
+            merged = self._merge(older, newer)
+            segments[-2:] = [merged] if len(merged.ids) else []
+        return segments, obsolete
+
+    @staticmethod
+    def _merge(older: _Segment, newer: _Segment) -> _Segment:
+        live = [np.flatnonzero(~segment.deleted) for segment in (older, newer)]
+        ids = np.concatenate([older.ids[live[0]], newer.ids[live[1]]])
+        order = np.argsort(ids, kind="stable")
+        new_rows = np.empty(len(ids), dtype=np.int32)
+        new_rows[order] = np.arange(len(ids), dtype=np.int32)
+
+        hashes, rows = [], []
+        first = 0
+        for segment, kept in zip((older, newer), live):
+            mapping = np.full(len(segment.ids), -1, dtype=np.int32)
+            mapping[kept] = new_rows[first:first + len(kept)]
+            first += len(kept)
+            mapped = mapping[segment.rows]
+            hashes.append(segment.hashes[mapped >= 0])
+            rows.append(mapped[mapped >= 0])
+        hashes = np.concatenate(hashes)
+        rows = np.concatenate(rows).astype(np.uint32)
+        # Both runs are sorted already, which the stable sort detects
+        by_hash = np.argsort(hashes, kind="stable")
+
+        sizes = np.concatenate([older.sizes[live[0]], newer.sizes[live[1]]])[order]
+        scales = np.concatenate([older.scales[live[0]], newer.scales[live[1]]])[order]
+        return _Segment(None, ids[order], sizes, scales, hashes[by_hash], rows[by_hash], np.zeros(len(ids), dtype=bool))
+
+    def _open(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST)) as handle:
+                manifest = json.load(handle)
+        except FileNotFoundError:
+            return
+        self._generation = manifest["generation"]
+        names = [entry["name"] for entry in manifest["segments"]]
+        if manifest["parameters"] != self.parameters():
+            # Sketches built with other parameters cannot be searched together; start over
+            self._save_manifest()
+            self._remove(names)
+            return
+        self.watermark = manifest["watermark"]
+        self._segments = tuple(
+            _load_segment(os.path.join(self.path, entry["name"]), entry["name"], entry["deleted"])
+            for entry in manifest["segments"]
+        )
+
+    def _write(self, segment: _Segment) -> _Segment:
+        """Save a new segment in the index directory and map it back."""
+        if not self.path:
+            return segment
+        self._generation += 1
+        name = f"segment-{self._generation:06d}.bfsim"
+        path = os.path.join(self.path, name)
+        _save_segment(segment, path)
+        return _load_segment(path, name, np.flatnonzero(segment.deleted).tolist())
+
+    def _save_manifest(self):
+        if not self.path:
+            return
+        manifest = {
+            "parameters": self.parameters(),
+            "generation": self._generation,
+            "watermark": self.watermark,
+            "segments": [
+                {"name": segment.name, "deleted": np.flatnonzero(segment.deleted).tolist()}
+                for segment in self._segments
+            ],
+        }
+        path = os.path.join(self.path, MANIFEST)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, "w") as handle:
+            json.dump(manifest, handle)
+        os.replace(tmp_path, path)
+
+    def _remove(self, names: Iterable[Optional[str]]):
+        """Delete segment files; searches still holding them keep their mapping."""
+        if not self.path:
+            return
+        for name in names:
+            if name:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    pass
+
+_SEGMENT_TABLES = ("ids", "sizes", "scales", "hashes", "rows")
+
+def _save_segment(segment: _Segment, path: str):
+    """
+    Write a segment file (same layout as signature index files): magic,
+    header length, JSON header with the table layout, then the aligned tables.
+    """
+    tables = {name: np.ascontiguousarray(getattr(segment, name)) for name in _SEGMENT_TABLES}
+    layout = {}
+    offset = 0
+    for name, array in tables.items():
+        layout[name] = [offset, array.nbytes, array.dtype.str]
+        offset += array.nbytes + (-array.nbytes % _ALIGNMENT)
+    header = json.dumps({"byteorder": sys.byteorder, "parts": len(segment.ids), "tables": layout}).encode()
+    header += b" " * (-(len(MAGIC) + _HEADER_LENGTH.size + len(header)) % _ALIGNMENT)
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as handle:
+        handle.write(MAGIC)
+        handle.write(_HEADER_LENGTH.pack(len(header)))
+        handle.write(header)
+        for array in tables.values():
+            array.tofile(handle)
+            handle.write(b"\0" * (-array.nbytes % _ALIGNMENT))
+    os.replace(tmp_path, path)
+
+def _load_segment(path: str, name: str, deleted: List[int]) -> _Segment:
+    """Memory-map a segment file; its tables are used in place."""
+    with open(path, "rb") as handle:
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a similarity index segment")
+    start = len(MAGIC) + _HEADER_LENGTH.size
+    (header_length,) = _HEADER_LENGTH.unpack_from(mapped, len(MAGIC))
+    header = json.loads(mapped[start:start + header_length])
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was written on a {header['byteorder']}-endian host")
+
+    data_start = start + header_length
+    buffer = memoryview(mapped)
+    tables = {}
+    for table, (offset, size, dtype) in header["tables"].items():
+        table_start = data_start + offset
+        tables[table] = np.frombuffer(buffer[table_start:table_start + size], dtype=dtype)
+    mask = np.zeros(header["parts"], dtype=bool)
+    mask[deleted] = True
+    return _Segment(name, deleted=mask, **tables)
@@ -0,0 +1,274 @@
+"""
+Stochastic gene expression ensembles.
+
+Simulates the transcription, translation, degradation and dilution reactions
+of bioforge_seqkit.kinetics as molecule counts in single cells, for
+low-copy circuits where the noise matters as much as the mean. Trajectories
+are advanced with tau-leaping, with the propensities of a whole chunk of
+trajectories computed as NumPy arrays: production is drawn from Poisson
+distributions and first-order losses from binomials, so counts never go
+negative. Cells grow along the culture's deterministic density curve, which
+sets their dilution rate.
+
+Ensembles are split into fixed-size chunks, each with its own
+np.random.Generator spawned from one SeedSequence, and run across a process
+pool. Chunks do not depend on which worker runs them, so a seed gives the
+same ensemble for any number of workers. The ensembles of many designs can
+run at once, so their chunks share the pool. Results are summarized as
+per-time quantiles rather than raw trajectories.
+"""
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+import math
+import os
+import threading
+import numpy as np
+
+SPECIES = ("mrna", "protein")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+def _exposure(loss: np.ndarray, h: float) -> np.ndarray:
+    """
+    Expected time a molecule made during a leap of length h survives until
+    its end, with first-order loss rate `loss`. Drawing production from
+    Poisson(rate * exposure) makes synthesis plus decay exact within a leap.
+    """
+    loss = np.asarray(loss, dtype=float)
+    return np.divide(-np.expm1(-loss * h), loss, out=np.full(loss.shape, h), where=loss > 0)
+
+def _fastest_rate(rates: Mapping[str, float]) -> float:
+    return max(rates["d_m"], rates["d_p"]) + rates["mu_max"]
+
+def leap_count(rates: Mapping[str, float], times: Sequence[float], max_step_rate: float = 0.2) -> int:
+    """
+    Get the number of leaps tau_leap takes per trajectory for `rates` over
+    `times`, to bound the work of an ensemble before running it.
+    """
+    times = np.asarray(times, dtype=float)
+    if len(times) < 2:
+        return 0
+    return int(np.maximum(1, np.ceil(np.diff(times) * _fastest_rate(rates) / max_step_rate)).sum())
+
+def tau_leap(
+    rates: Mapping[str, float],
+    times: Sequence[float],
+    density: Sequence[float],
+    trajectories: int,
+    rng: np.random.Generator,
+    max_step_rate: float = 0.2,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate `trajectories` cells of one design, given its rates (one row of
+    kinetics.rate_arrays) and the culture density at `times`. Returns the
+    mRNA and protein counts per cell as (trajectories x len(times)) arrays.
+    Each output interval is split into leaps of at most `max_step_rate`
+    divided by the fastest first-order rate.
+    """
+    mrna = np.zeros(trajectories, dtype=np.int64)
+    protein = np.zeros(trajectories, dtype=np.int64)
+    output = {name: np.zeros((trajectories, len(times)), dtype=np.int32) for name in SPECIES}
+
+    fastest = _fastest_rate(rates)
+    for index in range(1, len(times)):
+        interval = times[index] - times[index - 1]
+        leaps = max(1, math.ceil(interval * fastest / max_step_rate))
+        h = interval / leaps
+        for leap in range(leaps):
+            # Culture density at the middle of the leap, interpolated between output points
+            position = (leap + 0.5) / leaps
+            crowding = 1.0 - (density[index - 1] + position * (density[index] - density[index - 1])) / rates["carrying_capacity"]
+            burden = rates["b_max"] * protein / (protein + rates["K_b"])
+            growth = rates["mu_max"] * (1.0 - burden) * max(crowding, 0.0)
+
+            mrna_loss = rates["d_m"] + growth
+            protein_loss = rates["d_p"] + growth
+            # Molecules made during the leap that are still there at its end
+            transcribed = rng.poisson(rates["transcription"] * _exposure(mrna_loss, h), trajectories)
+            translated = rng.poisson(rates["translation"] * _exposure(protein_loss, h) * mrna)
+            mrna_lost = rng.binomial(mrna, -np.expm1(-mrna_loss * h))
+            protein_lost = rng.binomial(protein, -np.expm1(-protein_loss * h))
+            mrna += transcribed - mrna_lost
+            protein += translated - protein_lost
+        output["mrna"][:, index] = mrna
+        output["protein"][:, index] = protein
+    return output
+
+def summarize(samples: Mapping[str, np.ndarray], quantiles: Sequence[float] = QUANTILES) -> Dict[str, Any]:
+    """
+    Summarize (trajectories x time) samples per species: the mean, standard
+    deviation, Fano factor (variance / mean) and quantiles at each time point.
+    """
+    summary: Dict[str, Any] = {}
+    for name, values in samples.items():
+        mean = values.mean(axis=0)
+        std = values.std(axis=0)
+        fano = np.divide(std ** 2, mean, out=np.zeros_like(mean), where=mean > 0)
+        levels = np.quantile(values, quantiles, axis=0)
+        summary[name] = {
+            "mean": mean.tolist(),
+            "std": std.tolist(),
+            "fano_factor": fano.tolist(),
+            "quantiles": {f"p{round(q * 100):g}": level.tolist() for q, level in zip(quantiles, levels)},
+        }
+    return summary
+
+def chunk_sizes(trajectories: int, chunk_size: int) -> List[int]:
+    """
+    Split an ensemble into chunks of `chunk_size` trajectories (the last one may be smaller).
+    """
+    return [min(chunk_size, trajectories - start) for start in range(0, trajectories, chunk_size)]
+
+class EnsembleJob(NamedTuple):
+    """
+    One ensemble: the rates of a design (one row of kinetics.rate_arrays),
+    the output times, the culture density at those times, the number of
+    trajectories and the seed (anything np.random.SeedSequence accepts, or a
+    SeedSequence; None for fresh entropy).
+    """
+    rates: Mapping[str, float]
+    times: Sequence[float]
+    density: Sequence[float]
+    trajectories: int
+    seed: Optional[Any] = None
+
+def _run_chunk(
+    rates: Mapping[str, float],
+    times: Sequence[float],
+    density: Sequence[float],
+    trajectories: int,
+    seed: np.random.SeedSequence,
+    max_step_rate: float,
+) -> Dict[str, np.ndarray]:
+    return tau_leap(rates, times, density, trajectories, np.random.default_rng(seed), max_step_rate)
+
+class EnsembleRunner:
+    """
+    Runs stochastic ensembles in chunks on a process pool.
+    With one worker, chunks run in the calling thread instead.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 250, max_step_rate: float = 0.2):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_step_rate = max_step_rate
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+    def _run_chunks(self, jobs: Sequence[EnsembleJob]) -> Iterator[Tuple[int, int, Dict[str, np.ndarray]]]:
+        """
+        Run the chunks of several ensembles and yield (job index, chunk index,
+        samples) as they finish. All chunks are submitted at once, so a few
+        small ensembles still keep every worker busy. Pending chunks are
+        cancelled if the caller stops iterating.
+        """
+        tasks = []
+        for job_index, job in enumerate(jobs):
+            seed = job.seed if isinstance(job.seed, np.random.SeedSequence) else np.random.SeedSequence(job.seed)
+            sizes = chunk_sizes(job.trajectories, self.chunk_size)
+            rates = {name: float(value) for name, value in job.rates.items()}
+            times, density = [float(t) for t in job.times], [float(n) for n in job.density]
+            for chunk_index, (size, chunk_seed) in enumerate(zip(sizes, seed.spawn(len(sizes)))):
+                tasks.append((job_index, chunk_index, (rates, times, density, size, chunk_seed, self.max_step_rate)))
+
+        if self.max_workers == 1:
+            for job_index, chunk_index, args in tasks:
+                yield job_index, chunk_index, _run_chunk(*args)
+            return
+
+        pool = self._pool()
+        futures = {pool.submit(_run_chunk, *args): (job_index, chunk_index) for job_index, chunk_index, args in tasks}
+        try:
+            for future in as_completed(futures):
+                job_index, chunk_index = futures[future]
+                yield job_index, chunk_index, future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def chunks(
+        self,
+        rates: Mapping[str, float],
+        times: Sequence[float],
+        density: Sequence[float],
+        trajectories: int,
+        seed: Optional[Any] = None,
+    ) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """
+        Run an ensemble and yield (chunk index, samples) as chunks finish.
+        See EnsembleJob for the arguments.
+        """
+        for _, chunk_index, samples in self._run_chunks([EnsembleJob(rates, times, density, trajectories, seed)]):
+            yield chunk_index, samples
+
+    def stream(
+        self,
+        rates: Mapping[str, float],
+        times: Sequence[float],
+        density: Sequence[float],
+        trajectories: int,
+        seed: Optional[Any] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run an ensemble and yield partial summaries as it progresses, ending
+        with the summary of the whole ensemble (`done` set). Partial summaries
+        are emitted each time the number of finished chunks doubles, so they
+        cost at most as much as the final one.
+        """
+        finished: Dict[int, Dict[str, np.ndarray]] = {}
+        chunks = self.chunks(rates, times, density, trajectories, seed)
+        total = len(chunk_sizes(trajectories, self.chunk_size))
+        next_report = 1
+        for index, samples in chunks:
+            finished[index] = samples
+            if len(finished) == total:
+                break
+            if len(finished) >= next_report:
+                next_report *= 2
+                yield self._summary(finished, trajectories, done=False)
+        yield self._summary(finished, trajectories, done=True)
+
+    def run(
+        self,
+        rates: Mapping[str, float],
+        times: Sequence[float],
+        density: Sequence[float],
+        trajectories: int,
+        seed: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run an ensemble and get the summary of all its trajectories.
+        """
+        return self.run_many([EnsembleJob(rates, times, density, trajectories, seed)])[0]
+
+    def run_many(self, jobs: Sequence[EnsembleJob]) -> List[Dict[str, Any]]:
+        """
+        Run several ensembles concurrently and get their summaries, in order.
+        """
+        finished: List[Dict[int, Dict[str, np.ndarray]]] = [{} for _ in jobs]
+        for job_index, chunk_index, samples in self._run_chunks(jobs):
+            finished[job_index][chunk_index] = samples
+        return [self._summary(chunks, job.trajectories, done=True) for chunks, job in zip(finished, jobs)]
+
+    @staticmethod
+    def _summary(finished: Dict[int, Dict[str, np.ndarray]], trajectories: int, done: bool) -> Dict[str, Any]:
+        # Concatenate in chunk order, so the summary does not depend on which chunk finished first
+        order = sorted(finished)
+        samples = {name: np.concatenate([finished[index][name] for index in order]) for name in SPECIES}
+        return {
+            "trajectories": trajectories,
+            "completed": len(samples["mrna"]),
+            "done": done,
+            **summarize(samples),
+        }
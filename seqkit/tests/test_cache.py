@@ -0,0 +1,107 @@
+import socket
+import socketserver
+import threading
+import time
+from bioforge_seqkit.cache import Cache, MemoryBackend, RedisBackend
+
+class RespHandler(socketserver.StreamRequestHandler):
+    """Serve GET, SET, DEL and SCAN from the server's dict."""
+
+    def handle(self):
+        self.server.connections.append(self.connection)
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.execute(args))
+
+    def execute(self, args):
+        command, store = args[0].upper(), self.server.store
+        if command == b"GET":
+            value = store.get(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            store[args[1]] = args[2]
+            return b"+OK\r\n"
+        if command == b"DEL":
+            return b":%d\r\n" % sum(store.pop(key, None) is not None for key in args[1:])
+        if command == b"SCAN":
+            keys = [key for key in store if key.startswith(args[3].rstrip(b"*"))]
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(keys) + b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in keys)
+        return b"-ERR unknown command\r\n"
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), RespHandler)
+        self.store = {}
+        self.connections = []
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        for connection in self.connections:
+            connection.shutdown(socket.SHUT_RDWR)
+            connection.close()
+
+def test_redis_backend_round_trip():
+    server = RedisStandIn()
+    try:
+        cache = Cache("test", RedisBackend(f"redis://127.0.0.1:{server.server_address[1]}/0", "test"))
+        cache.set("part", {"id": "BBa_B0034"})
+        assert cache.get("part") == {"id": "BBa_B0034"}
+        assert cache.get("other", "missing") == "missing"
+        cache.clear()
+        assert cache.get("part") is None
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+        assert len(server.connections) == 1
+    finally:
+        server.stop()
+
+def test_redis_backend_backs_off_while_unavailable():
+    server = RedisStandIn()
+    port = server.server_address[1]
+    backend = RedisBackend(f"redis://127.0.0.1:{port}/0", "test", backoff=0.2)
+    cache = Cache("test", backend)
+    cache.set("part", 1)
+    server.stop()
+
+    assert cache.get("part") is None
+    server = RedisStandIn(port)
+    try:
+        # Within the backoff the cache fails fast, without reconnecting
+        started = time.monotonic()
+        assert cache.get("part") is None
+        assert time.monotonic() - started < 0.1
+        assert server.connections == []
+        assert cache.stats()["errors"] == 2
+
+        time.sleep(0.25)
+        cache.set("part", 2)
+        assert cache.get("part") == 2
+        assert len(server.connections) == 1
+        assert backend.stats()["connection_failures"] == 0
+    finally:
+        server.stop()
+
+def test_counters_are_consistent_across_threads():
+    cache = Cache("test", MemoryBackend(max_entries=100, max_bytes=1 << 20))
+    cache.set("hit", 1)
+
+    def lookups():
+        for index in range(2000):
+            cache.get("hit" if index % 2 else "miss")
+
+    threads = [threading.Thread(target=lookups) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.hits == cache.misses == 8000
@@ -0,0 +1,56 @@
+import os
+import numpy as np
+from bioforge_seqkit.embeddings import EmbeddingStore
+
+DIM = 8
+
+def vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).random(DIM, dtype=np.float32)
+
+def shard_path(store: EmbeddingStore) -> str:
+    return os.path.join(store.directory, "shard-00000.emb")
+
+def test_put_and_get_across_instances(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "esm-v1")
+    store.put("MKA", vector(1))
+    assert np.array_equal(store.get("mka"), vector(1))
+    assert EmbeddingStore(str(tmp_path), "esm-v1").get("MKA") is not None
+    assert EmbeddingStore(str(tmp_path), "esm-v2").get("MKA") is None
+
+def test_torn_append_does_not_misalign_later_records(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "esm-v1")
+    store.put("MKA", vector(1))
+    with open(shard_path(store), "ab") as handle:
+        handle.write(b"\x00" * 10)
+
+    store.put("MKB", vector(2))
+    store.put("MKC", vector(3))
+
+    reopened = EmbeddingStore(str(tmp_path), "esm-v1")
+    assert np.array_equal(reopened.get("MKA"), vector(1))
+    assert np.array_equal(reopened.get("MKB"), vector(2))
+    assert np.array_equal(reopened.get("MKC"), vector(3))
+
+def test_corrupt_record_is_rewritten(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "esm-v1")
+    store.put("MKA", vector(1))
+    with open(shard_path(store), "r+b") as handle:
+        handle.seek(32)
+        handle.write(b"\xff" * 4)
+
+    store = EmbeddingStore(str(tmp_path), "esm-v1")
+    assert store.get("MKA") is None
+    store.put("MKA", vector(1))
+    assert np.array_equal(store.get("MKA"), vector(1))
+    assert np.array_equal(EmbeddingStore(str(tmp_path), "esm-v1").get("MKA"), vector(1))
+
+def test_corrupt_record_seen_by_open_store_is_rewritten(tmp_path):
+    store = EmbeddingStore(str(tmp_path), "esm-v1")
+    store.put("MKA", vector(1))
+    with open(shard_path(store), "r+b") as handle:
+        handle.seek(32)
+        handle.write(b"\xff" * 4)
+
+    assert store.get("MKA") is None
+    store.put("MKA", vector(1))
+    assert np.array_equal(store.get("MKA"), vector(1))
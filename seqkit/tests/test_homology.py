@@ -0,0 +1,59 @@
+import random
+import numpy as np
+import pytest
+from bioforge_seqkit.homology import HomologyIndex, semi_global_distance
+
+def random_dna(rng, length):
+    return "".join(rng.choice("ACGT") for _ in range(length))
+
+def reverse_complement(sequence):
+    return sequence[::-1].translate(str.maketrans("ACGT", "TGCA"))
+
+def mutate(rng, sequence, substitutions):
+    """Substitute bases, delete two bases and insert three, away from the ends."""
+    bases = list(sequence)
+    for position in rng.sample(range(len(bases)), substitutions):
+        bases[position] = rng.choice([base for base in "ACGT" if base != bases[position]])
+    del bases[150:152]
+    bases[400:400] = list("GTA")
+    return "".join(bases)
+
+def edit_distance(pattern, text):
+    previous = list(range(len(text) + 1))
+    for row, symbol in enumerate(pattern, 1):
+        current = [row]
+        for column, other in enumerate(text, 1):
+            current.append(min(previous[column] + 1, current[column - 1] + 1, previous[column - 1] + (symbol != other)))
+        previous = current
+    return previous[-1]
+
+@pytest.mark.parametrize("seed", range(30))
+def test_semi_global_distance_matches_brute_force(seed):
+    rng = random.Random(seed)
+    pattern = [rng.randrange(4) for _ in range(rng.randint(1, 8))]
+    text = [rng.randrange(4) for _ in range(rng.randint(0, 16))]
+    distance, start, end = semi_global_distance(np.array(pattern), np.array(text))
+    best = min(edit_distance(pattern, text[i:j]) for i in range(len(text) + 1) for j in range(i, len(text) + 1))
+    assert distance == best
+    assert 0 <= start <= end <= len(text)
+    assert edit_distance(pattern, text[start:end]) == distance
+
+@pytest.fixture(scope="module")
+def signatures():
+    rng = random.Random(5)
+    return [(f"sig_{i}", random_dna(rng, 600)) for i in range(50)]
+
+@pytest.mark.parametrize("strand", [1, -1])
+def test_near_miss_is_reported_at_its_aligned_span(signatures, strand):
+    rng = random.Random(strand)
+    variant = mutate(rng, signatures[7][1], substitutions=20)
+    planted = variant if strand == 1 else reverse_complement(variant)
+    sequence = random_dna(rng, 3001) + planted + random_dna(rng, 2000)
+
+    hits = [hit for hit in HomologyIndex.build(signatures).screen(sequence) if hit.level == "dna"]
+    assert [(hit.pattern_id, hit.strand) for hit in hits] == [("sig_7", strand)]
+    assert (hits[0].start, hits[0].end) == (3001, 3001 + len(planted))
+    assert hits[0].identity == pytest.approx(1 - 25 / 600, abs=0.01)
+
+def test_unrelated_sequence_has_no_hits(signatures):
+    assert HomologyIndex.build(signatures).screen(random_dna(random.Random(9), 5000)) == []
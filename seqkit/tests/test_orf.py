@@ -0,0 +1,51 @@
+import random
+import pytest
+from bioforge_seqkit import find_orfs, orf_sequence
+
+def scan_orfs(sequence, min_length=30):
+    """The codon-by-codon scanner find_orfs replaced: forward strand, frame by frame."""
+    sequence = sequence.upper()
+    orfs = []
+    for frame in range(3):
+        frame_seq = sequence[frame:]
+        frame_seq = frame_seq[:len(frame_seq) - len(frame_seq) % 3]
+        for i in range(0, len(frame_seq), 3):
+            if frame_seq[i:i + 3] == "ATG":
+                for j in range(i, len(frame_seq), 3):
+                    if frame_seq[j:j + 3] in ("TAA", "TAG", "TGA"):
+                        if j + 3 - i >= min_length:
+                            orfs.append(frame_seq[i:j + 3])
+                        break
+    return orfs
+
+def reverse_complement(sequence):
+    return sequence.upper()[::-1].translate(str.maketrans("ACGTN", "TGCAN"))
+
+def random_sequence(rng, length):
+    # ATG-rich, with some lowercase and N, so ORFs and invalid codons are common
+    return "".join(rng.choice("ACGTACGTATGacgtN") for _ in range(length))
+
+@pytest.mark.parametrize("seed", range(20))
+def test_forward_strand_matches_codon_scan(seed):
+    rng = random.Random(seed)
+    sequence = random_sequence(rng, rng.randrange(0, 2000))
+    for min_length in (3, 30, 90):
+        orfs = find_orfs(sequence, min_length, strands=(1,))
+        assert [orf_sequence(sequence, orf) for orf in orfs] == scan_orfs(sequence, min_length)
+        assert all(orf.length >= min_length and orf.length % 3 == 0 for orf in orfs)
+
+@pytest.mark.parametrize("seed", range(20))
+def test_reverse_strand_matches_scan_of_reverse_complement(seed):
+    rng = random.Random(seed)
+    sequence = random_sequence(rng, rng.randrange(0, 2000))
+    orfs = find_orfs(sequence, 30, strands=(-1,))
+    assert [orf_sequence(sequence, orf) for orf in orfs] == scan_orfs(reverse_complement(sequence), 30)
+    assert all(orf.strand == -1 and 0 <= orf.start < orf.end <= len(sequence) for orf in orfs)
+
+def test_coordinates():
+    sequence = "CC" + "ATGAAATAG" + "GG"
+    (orf,) = find_orfs(sequence, 9, strands=(1,))
+    assert (orf.start, orf.end, orf.strand, orf.frame) == (2, 11, 1, 2)
+    (orf,) = find_orfs(reverse_complement(sequence), 9, strands=(-1,))
+    assert (orf.start, orf.end, orf.strand) == (2, 11, -1)
+    assert find_orfs("ATGAAAAAA", 3) == []
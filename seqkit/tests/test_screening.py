@@ -0,0 +1,54 @@
+import random
+import pytest
+from bioforge_seqkit.screening import Hit, PatternMatcher
+
+def reverse_complement(sequence):
+    return sequence[::-1].translate(str.maketrans("ACGT", "TGCA"))
+
+def brute_force_scan(patterns, sequence):
+    """Compare every signature, and its reverse complement, at every position."""
+    sequence = sequence.upper()
+    hits = []
+    for pattern_id, pattern in patterns:
+        orientations = [(pattern, 1)]
+        if reverse_complement(pattern) != pattern:
+            orientations.append((reverse_complement(pattern), -1))
+        for oriented, strand in orientations:
+            for start in range(len(sequence) - len(oriented) + 1):
+                if sequence[start:start + len(oriented)] == oriented:
+                    hits.append(Hit(pattern_id, start, start + len(oriented), strand))
+    return hits
+
+def random_dna(rng, length, alphabet="ACGT"):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+@pytest.mark.parametrize("seed", range(20))
+def test_scan_matches_brute_force(seed):
+    rng = random.Random(seed)
+    # Short patterns over a biased alphabet, so hits overlap, nest and share suffixes
+    patterns = [(f"sig_{i}", random_dna(rng, rng.randint(1, 8), "AACGT")) for i in range(rng.randint(1, 40))]
+    patterns.append(("palindrome", "GAATTC"))
+    patterns.append(("duplicate", patterns[0][1]))
+    sequence = random_dna(rng, rng.randint(0, 3000), "AACGTNacgt")
+
+    matcher = PatternMatcher(patterns)
+    hits = matcher.scan(sequence)
+    assert sorted(hits) == sorted(brute_force_scan(patterns, sequence))
+    assert [hit.end for hit in hits] == sorted(hit.end for hit in hits)
+
+def test_tables_round_trip():
+    rng = random.Random(7)
+    patterns = [(f"sig_{i}", random_dna(rng, 6)) for i in range(50)]
+    sequence = random_dna(rng, 5000)
+    matcher = PatternMatcher(patterns)
+    rebuilt = PatternMatcher.from_tables(matcher.pattern_ids, matcher.pattern_lengths, matcher.tables())
+    assert rebuilt.scan(sequence) == matcher.scan(sequence)
+
+def test_matched_ids_in_order_of_first_hit():
+    matcher = PatternMatcher([("a", "AAA"), ("b", "CCG")])
+    assert matcher.matched_ids("CGGTTTAAA") == ["b", "a"]
+
+@pytest.mark.parametrize("pattern", ["", "ACNT"])
+def test_invalid_signatures_are_rejected(pattern):
+    with pytest.raises(ValueError):
+        PatternMatcher([("bad", pattern)])
@@ -1,11 +1,21 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError, conint
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import numpy as np
+import asyncio
+import hashlib
+import json
+import os
 import time
 import logging
 
+from bioforge_seqkit import design_fingerprint, kinetics
+from bioforge_seqkit.pathway import DEFAULT_KCAT, DEFAULT_KM, KCAT_BOUNDS, KM_BOUNDS, max_step_count, simulate_pathway
+from bioforge_seqkit.stochastic import EnsembleJob, EnsembleRunner, leap_count
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -50,6 +60,54 @@ class SimulationParameters(BaseModel):
     host_organism: str = "ecoli"  # ecoli, yeast, mammalian, plant
     temperature: float = 37.0  # in Celsius
     custom_parameters: Optional[Dict[str, Any]] = None
+    mode: str = "empirical"  # empirical, mechanistic, stochastic
+    duration_hours: float = 24.0  # simulated time span in mechanistic and stochastic modes
+    trajectories: int = 1000  # cells simulated per ensemble in stochastic mode
+    seed: Optional[conint(ge=0)] = None  # makes the random noise reproducible
+
+# Score adjustments (growth rate, protein expression, stability) per environment and host
+ENVIRONMENT_EFFECTS = {
+    "nutrient-rich": (0.1, 0.1, 0.0),
+    "minimal": (-0.1, -0.1, 0.0),
+    "stress": (-0.2, 0.0, -0.1),
+}
+HOST_EFFECTS = {
+    "yeast": (-0.05, -0.1, 0.0),
+    "mammalian": (-0.2, -0.2, 0.0),
+    "plant": (-0.3, -0.3, 0.0),
+}
+
+# Upper bound on designs x parameter sets x time points in one batch request
+MAX_BATCH_POINTS = int(os.environ.get("SIMULATION_MAX_BATCH_POINTS", "20000000"))
+
+# Longest simulated time span, and most integration steps (or tau leaps per cell) one design may take
+MAX_DURATION_HOURS = float(os.environ.get("SIMULATION_MAX_DURATION_HOURS", "720"))
+MAX_SIMULATION_STEPS = int(os.environ.get("SIMULATION_MAX_STEPS", "200000"))
+
+# Cassette of a design without a terminator: its transcripts decay fastest, so it takes the most steps
+UNTERMINATED_CASSETTE = {"promoter": 1.0, "rbs": 1.0, "terminator": 0.0}
+
+# Protein per cell of a cassette with strength 1 parts once growth stops; mechanistic expression is scored against it
+EXPRESSION_REFERENCE = kinetics.steady_state_protein(
+    kinetics.rate_arrays([{"promoter": 1.0, "rbs": 1.0, "terminator": 1.0}], [0.0], [1.0])
+)[0]
+
+class BatchSimulationRequest(BaseModel):
+    designs: List[DNADesign]
+    parameters: List[SimulationParameters] = [SimulationParameters()]
+
+# Time points per chunk of the streamed time series
+STREAM_CHUNK_POINTS = int(os.environ.get("SIMULATION_STREAM_CHUNK_POINTS", "1000"))
+
+# Stochastic ensembles run in chunks on a process pool (one worker per CPU by default)
+ensemble_runner = EnsembleRunner(
+    max_workers=int(os.environ.get("SIMULATION_WORKERS", "0")) or None,
+    chunk_size=int(os.environ.get("SIMULATION_CHUNK_SIZE", "250")),
+)
+
+@app.on_event("shutdown")
+def stop_ensembles():
+    ensemble_runner.shutdown()
 
 # API endpoints
 @app.get("/")
@@ -58,145 +116,680 @@ async def root():
     return {"message": "BioForge Simulation Service is running"}
 
 @app.post("/api/simulate")
-async def run_simulation(design: DNADesign, parameters: Optional[SimulationParameters] = None):
-    """Run a simulation for a DNA design."""
+def run_simulation(design: DNADesign, parameters: Optional[SimulationParameters] = None):
+    """
+    Run a simulation for a DNA design. Mechanistic and stochastic runs are
+    CPU-bound, so the handler is synchronous and runs in the threadpool.
+    """
     logger.info(f"Running simulation for design: {design.name}")
     
     # Use default parameters if none provided
     if parameters is None:
         parameters = SimulationParameters()
     
-    # Analyze the design
-    has_promoter = any(part.type.lower() == "promoter" for part in design.parts)
-    has_rbs = any(part.type.lower() == "rbs" for part in design.parts)
-    has_gene = any(part.type.lower() == "gene" for part in design.parts)
-    has_terminator = any(part.type.lower() == "terminator" for part in design.parts)
-    
-    # Calculate base scores
-    growth_rate = 0.5  # Default growth rate
-    protein_expression = 0.0  # Default protein expression
-    metabolic_burden = 0.3  # Default metabolic burden
-    stability = 0.7  # Default stability
-    
-    # Adjust scores based on design components
-    if has_promoter:
-        growth_rate += 0.1
-        protein_expression += 0.3
-    
-    if has_rbs:
-        protein_expression += 0.2
-    
-    if has_gene:
-        metabolic_burden += 0.2
-        protein_expression += 0.3
-    
-    if has_terminator:
-        stability += 0.2
-    
-    # Adjust based on environment
-    if parameters.environment == "nutrient-rich":
-        growth_rate += 0.1
-        protein_expression += 0.1
-    elif parameters.environment == "minimal":
-        growth_rate -= 0.1
-        protein_expression -= 0.1
-    elif parameters.environment == "stress":
-        growth_rate -= 0.2
-        stability -= 0.1
-    
-    # Adjust based on host organism
-    if parameters.host_organism == "yeast":
-        growth_rate -= 0.05
-        protein_expression -= 0.1
-    elif parameters.host_organism == "mammalian":
-        growth_rate -= 0.2
-        protein_expression -= 0.2
-    elif parameters.host_organism == "plant":
-        growth_rate -= 0.3
-        protein_expression -= 0.3
-    
-    # Adjust based on temperature
-    if parameters.temperature < 30.0 or parameters.temperature > 40.0:
-        growth_rate -= 0.1
-        stability -= 0.1
-    
-    # Check the order of components
-    correct_order = True
-    promoter_index = -1
-    rbs_index = -1
-    gene_index = -1
-    terminator_index = -1
-    
-    for i, part in enumerate(design.parts):
-        if part.type.lower() == "promoter":
-            promoter_index = i
-        elif part.type.lower() == "rbs":
-            rbs_index = i
-        elif part.type.lower() == "gene":
-            gene_index = i
-        elif part.type.lower() == "terminator":
-            terminator_index = i
-    
-    # Check if the order is correct: promoter -> RBS -> gene -> terminator
-    if promoter_index != -1 and rbs_index != -1 and gene_index != -1 and terminator_index != -1:
-        if not (promoter_index < rbs_index < gene_index < terminator_index):
-            correct_order = False
-            stability -= 0.2
-            protein_expression -= 0.2
-    
-    # Generate time series data
-    time_points = parameters.time_points
-    time_series = {
-        "time": list(range(time_points)),
-        "growth": _generate_growth_curve(time_points, growth_rate),
-        "protein": _generate_protein_curve(time_points, protein_expression, has_promoter and has_rbs and has_gene),
-        "metabolite": _generate_metabolite_curve(time_points, metabolic_burden, has_gene)
-    }
+    _check_parameters([parameters])
+    return _simulate_batch([design], [parameters])[0][0]
+
+@app.post("/api/simulate/stochastic/stream")
+async def stream_stochastic_simulation(request: Request, design: DNADesign, parameters: Optional[SimulationParameters] = None):
+    """
+    Run a stochastic ensemble for a DNA design and stream its summary as
+    newline-delimited JSON: partial summaries while it runs, then the
+    summary of the whole ensemble (`done` set). A client that disconnects
+    cancels the chunks still queued on the pool.
+    """
+    logger.info(f"Streaming stochastic simulation for design: {design.name}")
     
-    # Add some noise to make it look more realistic
-    growth_rate = min(1.0, max(0.0, growth_rate + np.random.uniform(-0.05, 0.05)))
-    protein_expression = min(1.0, max(0.0, protein_expression + np.random.uniform(-0.05, 0.05)))
-    metabolic_burden = min(1.0, max(0.0, metabolic_burden + np.random.uniform(-0.05, 0.05)))
-    stability = min(1.0, max(0.0, stability + np.random.uniform(-0.05, 0.05)))
+    if parameters is None:
+        parameters = SimulationParameters()
+    parameters = parameters.copy(update={"mode": "stochastic"})
+    _check_parameters([parameters])
+    
+    rates, times, density = await run_in_threadpool(_ensemble_inputs, design, parameters)
+    
+    async def lines():
+        summaries = ensemble_runner.stream(rates, times, density, parameters.trajectories, _item_seeds([design], [parameters])[0][0])
+        try:
+            while not await request.is_disconnected():
+                summary = await run_in_threadpool(next, summaries, None)
+                if summary is None:
+                    break
+                yield json.dumps({"time": times, **summary}) + "\n"
+        finally:
+            summaries.close()
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/simulate/stream")
+async def stream_simulation(request: Request, design: DNADesign, parameters: Optional[SimulationParameters] = None):
+    """
+    Run a simulation for a DNA design and stream it as server-sent events
+    while it is computed: "start", then "series" chunks of the time series,
+    "ensemble" summaries in stochastic mode and the "result" scores (see
+    _simulation_events). Each chunk is computed in the threadpool only once
+    the previous one is sent, so a client that disconnects stops the run.
+    """
+    logger.info(f"Streaming simulation for design: {design.name}")
+    
+    if parameters is None:
+        parameters = SimulationParameters()
+    _check_parameters([parameters])
+    
+    async def events():
+        simulation = _simulation_events(design, parameters, STREAM_CHUNK_POINTS)
+        try:
+            while not await request.is_disconnected():
+                event = await run_in_threadpool(next, simulation, None)
+                if event is None:
+                    break
+                yield f"event: {event[0]}\ndata: {json.dumps(event[1])}\n\n"
+        finally:
+            simulation.close()
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.websocket("/ws/simulate")
+async def simulate_websocket(websocket: WebSocket):
+    """
+    Stream a simulation over a WebSocket. The client sends
+    {"design": ..., "parameters": ...} and receives the events of
+    /api/simulate/stream as {"event": ..., "data": ...} messages. Sending
+    {"action": "cancel"} or closing the socket stops the computation.
+    """
+    await websocket.accept()
+    try:
+        message = await websocket.receive_json()
+        design = DNADesign.parse_obj(message.get("design"))
+        parameters = SimulationParameters.parse_obj(message.get("parameters") or {})
+        _check_parameters([parameters])
+    except WebSocketDisconnect:
+        return
+    except (ValidationError, HTTPException, ValueError, AttributeError) as error:
+        detail = error.detail if isinstance(error, HTTPException) else str(error)
+        await websocket.send_json({"event": "error", "data": {"detail": detail}})
+        await websocket.close(code=1008)
+        return
+    logger.info(f"Streaming simulation over WebSocket for design: {design.name}")
+    
+    async def wait_for_cancel():
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except WebSocketDisconnect:
+                return "disconnect"
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("action") == "cancel":
+                return "cancel"
+    
+    cancel = asyncio.ensure_future(wait_for_cancel())
+    simulation = _simulation_events(design, parameters, STREAM_CHUNK_POINTS)
+    stopped = None
+    try:
+        while not cancel.done():
+            event = await run_in_threadpool(next, simulation, None)
+            if event is None or cancel.done():
+                break
+            await websocket.send_json({"event": event[0], "data": event[1]})
+    finally:
+        simulation.close()
+        if cancel.done():
+            stopped = cancel.result()
+        else:
+            cancel.cancel()
+    
+    if stopped == "disconnect":
+        return
+    if stopped == "cancel":
+        await websocket.send_json({"event": "cancelled", "data": {}})
+    await websocket.close()
+
+@app.post("/api/simulate/batch")
+def run_simulation_batch(request: BatchSimulationRequest):
+    """
+    Run every design under every parameter set (e.g. a design of experiments).
+    Results are ordered by design, then parameter set. A batch can take
+    seconds of CPU, so the handler is synchronous and runs in the threadpool.
+    """
+    logger.info(f"Running batch simulation: {len(request.designs)} designs x {len(request.parameters)} parameter sets")
+    
+    _check_parameters(request.parameters, len(request.designs))
+    
+    results = _simulate_batch(request.designs, request.parameters)
+    
+    # Results are plain lists and floats already; skip the generic encoder, which dominates large batches
+    return JSONResponse({
+        "designs": len(request.designs),
+        "parameter_sets": len(request.parameters),
+        "results": [
+            {"design_index": design_index, "parameter_index": parameter_index, "design_id": design.id, **result}
+            for design_index, design in enumerate(request.designs)
+            for parameter_index, result in enumerate(results[design_index])
+        ],
+    })
+
+def _check_parameters(parameter_sets: List[SimulationParameters], designs: int = 1):
+    """Reject parameter sets the simulators cannot run, or too much work for one request."""
+    # Each trajectory of a stochastic ensemble counts as a separate simulation
+    points = designs * sum(
+        parameters.time_points * (parameters.trajectories if parameters.mode == "stochastic" else 1)
+        for parameters in parameter_sets
+    )
+    if points > MAX_BATCH_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Request has {points} time points in total, the limit is {MAX_BATCH_POINTS}; split it into smaller batches",
+        )
+    for parameters in parameter_sets:
+        if parameters.time_points < 1:
+            raise HTTPException(status_code=400, detail="time_points must be at least 1")
+        if parameters.mode not in SIMULATION_MODES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown simulation mode: {parameters.mode}; expected one of {', '.join(SIMULATION_MODES)}",
+            )
+        if parameters.mode == "stochastic" and parameters.trajectories < 1:
+            raise HTTPException(status_code=400, detail="trajectories must be at least 1")
+        if parameters.mode in ("mechanistic", "stochastic"):
+            if not 0 < parameters.duration_hours <= MAX_DURATION_HOURS:
+                raise HTTPException(
+                    status_code=400, detail=f"duration_hours must be positive and at most {MAX_DURATION_HOURS:g}"
+                )
+            for name, value in (parameters.custom_parameters or {}).items():
+                if name not in kinetics.RATE_BOUNDS:
+                    continue
+                if not isinstance(value, (int, float)):
+                    raise HTTPException(status_code=400, detail=f"custom parameter {name} must be a number")
+                low, high = kinetics.RATE_BOUNDS[name]
+                if not low <= value <= high:
+                    raise HTTPException(
+                        status_code=400, detail=f"custom parameter {name} must be between {low:g} and {high:g}"
+                    )
+            steps = _simulation_steps(parameters)
+            if steps > MAX_SIMULATION_STEPS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Simulation takes up to {steps} integration steps per design, the limit is "
+                           f"{MAX_SIMULATION_STEPS}; use fewer time points, a shorter duration or slower rates",
+                )
+
+def _simulation_steps(parameters: SimulationParameters) -> int:
+    """
+    Get the most integration steps a design takes under a mechanistic or
+    stochastic parameter set (tau leaps per cell for stochastic ensembles).
+    """
+    growth, expression = kinetics.conditions(parameters.environment, parameters.host_organism, parameters.temperature)
+    rates = kinetics.rate_arrays([UNTERMINATED_CASSETTE], [growth], [expression], [parameters.custom_parameters])
+    times = np.linspace(0.0, parameters.duration_hours, parameters.time_points)
+    steps = kinetics.step_count(rates, times)
+    if parameters.mode == "stochastic":
+        cell_rates = {name: float(values[0]) for name, values in rates.items()}
+        steps = max(steps, leap_count(cell_rates, times, ensemble_runner.max_step_rate))
+    return steps
+
+def _item_seeds(
+    designs: List[DNADesign], parameter_sets: List[SimulationParameters]
+) -> List[List[np.random.SeedSequence]]:
+    """
+    Get the seed sequence of every design simulated under every parameter
+    set, one list of designs per parameter set. With a seed, it is derived
+    from the seed, the design's content fingerprint and the other parameters,
+    so a design gets bit-identical results from call to call wherever it sits
+    in a request. Without one, every design gets fresh entropy.
+    """
+    fingerprints = None
+    seeds = []
+    for parameters in parameter_sets:
+        if parameters.seed is None:
+            seeds.append(np.random.SeedSequence().spawn(len(designs)))
+            continue
+        if fingerprints is None:
+            fingerprints = [
+                design_fingerprint((part.type, part.name, part.sequence) for part in design.parts) for design in designs
+            ]
+        settings = json.dumps(parameters.dict(exclude={"seed"}), sort_keys=True, default=str)
+        column = []
+        for fingerprint in fingerprints:
+            digest = hashlib.blake2b(f"{fingerprint}:{settings}".encode(), digest_size=16).digest()
+            words = [int.from_bytes(digest[index:index + 4], "little") for index in range(0, len(digest), 4)]
+            column.append(np.random.SeedSequence([parameters.seed, *words]))
+        seeds.append(column)
+    return seeds
+
+def _design_features(design: DNADesign) -> Dict[str, bool]:
+    """Find which components a design has and whether they are in order."""
+    types = [part.type.lower() for part in design.parts]
     
-    # Prepare the result
-    result = {
+    # Check the order of components: promoter -> RBS -> gene -> terminator
+    last_index = {part_type: index for index, part_type in enumerate(types)}
+    order = [last_index.get(part_type, -1) for part_type in ("promoter", "rbs", "gene", "terminator")]
+    correct_order = -1 in order or order == sorted(order)
+    
+    return {
+        "has_promoter": "promoter" in last_index,
+        "has_rbs": "rbs" in last_index,
+        "has_gene": "gene" in last_index,
+        "has_terminator": "terminator" in last_index,
+        "correct_order": correct_order,
+    }
+
+def _has_expression_system(feature: Dict[str, bool]) -> bool:
+    """Check whether a design can express protein: it needs a promoter, an RBS and a gene."""
+    return feature["has_promoter"] and feature["has_rbs"] and feature["has_gene"]
+
+def _result_parameters(parameters: SimulationParameters) -> Dict[str, Any]:
+    """Get the parameters echoed back in a simulation result."""
+    echoed = {
+        "time_points": parameters.time_points,
+        "environment": parameters.environment,
+        "host_organism": parameters.host_organism,
+        "temperature": parameters.temperature,
+    }
+    if parameters.mode != "empirical":
+        echoed["mode"] = parameters.mode
+        echoed["duration_hours"] = parameters.duration_hours
+    if parameters.mode == "stochastic":
+        echoed["trajectories"] = parameters.trajectories
+    echoed["seed"] = parameters.seed
+    return echoed
+
+def _simulate_batch(designs: List[DNADesign], parameter_sets: List[SimulationParameters]) -> List[List[Dict[str, Any]]]:
+    """
+    Simulate every design under every parameter set, each with the simulator
+    named by its mode.
+    """
+    results = [[None] * len(parameter_sets) for _ in designs]
+    for mode, simulate in SIMULATION_MODES.items():
+        columns = [index for index, parameters in enumerate(parameter_sets) if parameters.mode == mode]
+        if not columns:
+            continue
+        for design_index, design_results in enumerate(simulate(designs, [parameter_sets[index] for index in columns])):
+            for index, result in zip(columns, design_results):
+                results[design_index][index] = result
+    return results
+
+# Noise sources of a simulated design, each a stream of its PCG64 sequence starting 2**96 draws after the previous one
+SERIES_STREAMS = ("growth", "protein", "metabolite", "scores")
+SERIES_STREAM_BITS = 96
+
+# Standard deviation of the noise on the empirical curves
+CURVE_NOISE = 0.02
+
+def _series_generators(seed: np.random.SeedSequence) -> Dict[str, np.random.Generator]:
+    """
+    Get the generators of one simulated design: one for the noise of each
+    curve and one for the score jitter, so a curve can be drawn in pieces
+    (as when streaming) and still match the curve drawn at once.
+    """
+    generators = {}
+    for stream, name in enumerate(SERIES_STREAMS):
+        bit_generator = np.random.PCG64(seed)
+        bit_generator.advance(stream << SERIES_STREAM_BITS)
+        generators[name] = np.random.Generator(bit_generator)
+    return generators
+
+def _series_noise(seeds: List[np.random.SeedSequence], time_points: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Draw all the noise of many simulated designs, one per seed: the
+    (designs x 3 x time points) noise of the growth, protein and metabolite
+    curves and the (designs x 4) score jitter. The values are the ones
+    _series_generators gives, but each design builds a single generator and
+    rewinds it from stream to stream, which costs a fraction of building one
+    generator per stream.
+    """
+    curves = np.empty((len(seeds), 3, time_points))
+    jitter = np.empty((len(seeds), 4))
+    for row, seed in enumerate(seeds):
+        bit_generator = np.random.PCG64(seed)
+        rng = np.random.Generator(bit_generator)
+        state = bit_generator.state
+        for stream in range(len(SERIES_STREAMS)):
+            if stream:
+                bit_generator.state = state
+                bit_generator.advance(stream << SERIES_STREAM_BITS)
+            if stream < 3:
+                rng.standard_normal(out=curves[row, stream])
+            else:
+                jitter[row] = rng.uniform(-0.05, 0.05, 4)
+    return curves * CURVE_NOISE, jitter
+
+def _empirical_scores(features: List[Dict[str, bool]], parameter_sets: List[SimulationParameters]) -> Dict[str, np.ndarray]:
+    """
+    Score every design under every parameter set from its components, before
+    any noise. Returns (N designs x M parameter sets) arrays.
+    """
+    column = lambda name: np.array([feature[name] for feature in features], dtype=bool).reshape(-1, 1)
+    has_promoter, has_rbs, has_gene = column("has_promoter"), column("has_rbs"), column("has_gene")
+    has_terminator, correct_order = column("has_terminator"), column("correct_order")
+    
+    # Parameter effects, one column per parameter set
+    effects = np.array([
+        np.add(ENVIRONMENT_EFFECTS.get(parameters.environment, (0.0, 0.0, 0.0)),
+               HOST_EFFECTS.get(parameters.host_organism, (0.0, 0.0, 0.0)))
+        for parameters in parameter_sets
+    ]).reshape(-1, 3).T
+    off_temperature = np.array([
+        parameters.temperature < 30.0 or parameters.temperature > 40.0 for parameters in parameter_sets
+    ])[None, :]
+    
+    # Base scores adjusted for the design components, the parameters and the component order
+    growth_rate = 0.5 + 0.1 * has_promoter + effects[0] - 0.1 * off_temperature
+    return {
         "growth_rate": growth_rate,
-        "protein_expression": protein_expression,
-        "metabolic_burden": metabolic_burden,
-        "stability": stability,
-        "time_series": time_series,
-        "parameters": {
-            "time_points": parameters.time_points,
-            "environment": parameters.environment,
-            "host_organism": parameters.host_organism,
-            "temperature": parameters.temperature
-        },
-        "notes": []
+        "protein_expression": 0.3 * has_promoter + 0.2 * has_rbs + 0.3 * has_gene + effects[1] - 0.2 * ~correct_order,
+        "metabolic_burden": np.broadcast_to(0.3 + 0.2 * has_gene, growth_rate.shape),
+        "stability": 0.7 + 0.2 * has_terminator + effects[2] - 0.1 * off_temperature - 0.2 * ~correct_order,
+    }
+
+def _simulate_empirical(designs: List[DNADesign], parameter_sets: List[SimulationParameters]) -> List[List[Dict[str, Any]]]:
+    """
+    Score every design under every parameter set from its components.
+    Scores are computed on an (N designs x M parameter sets) grid and the
+    curves of all combinations with the same number of time points as 2-D
+    arrays, one row per combination. Every combination draws its noise from
+    its own seed, and a group's noise as one array (see _series_noise).
+    """
+    features = [_design_features(design) for design in designs]
+    seeds = _item_seeds(designs, parameter_sets)
+    scores = _empirical_scores(features, parameter_sets)
+    expression_system = np.array([_has_expression_system(feature) for feature in features], dtype=bool)[:, None]
+    gene = np.array([feature["has_gene"] for feature in features], dtype=bool)[:, None]
+    jitter = np.empty((len(designs), len(parameter_sets), 4))
+    
+    # Time series per group of parameter sets with the same number of time points
+    curves = {}
+    for time_points in sorted({parameters.time_points for parameters in parameter_sets}):
+        columns = [index for index, parameters in enumerate(parameter_sets) if parameters.time_points == time_points]
+        has_expression_system = np.broadcast_to(expression_system, (len(designs), len(columns)))
+        has_product = np.broadcast_to(gene, (len(designs), len(columns)))
+        noise, group_jitter = _series_noise(
+            [seeds[column][row] for row in range(len(designs)) for column in columns], time_points
+        )
+        jitter[:, columns] = group_jitter.reshape(len(designs), len(columns), 4)
+        growth = _generate_growth_curve(time_points, scores["growth_rate"][:, columns].ravel(), noise[:, 0])
+        protein = _generate_protein_curve(
+            time_points, scores["protein_expression"][:, columns].ravel(), has_expression_system.ravel(), noise[:, 1]
+        )
+        metabolite = _generate_metabolite_curve(
+            time_points, scores["metabolic_burden"][:, columns].ravel(), has_product.ravel(), noise[:, 2]
+        )
+        shape = (len(designs), len(columns), time_points)
+        curves[time_points] = (
+            columns,
+            growth.reshape(shape).tolist(),
+            protein.reshape(shape).tolist(),
+            metabolite.reshape(shape).tolist(),
+        )
+    
+    # Add some noise to make it look more realistic
+    noisy = lambda name, index: np.clip(scores[name] + jitter[:, :, index], 0.0, 1.0).tolist()
+    growth_rate, protein_expression = noisy("growth_rate", 0), noisy("protein_expression", 1)
+    metabolic_burden, stability = noisy("metabolic_burden", 2), noisy("stability", 3)
+    
+    results = [[None] * len(parameter_sets) for _ in designs]
+    for time_points, (columns, growth, protein, metabolite) in curves.items():
+        time = list(range(time_points))
+        for design_index, feature in enumerate(features):
+            for position, parameter_index in enumerate(columns):
+                parameters = parameter_sets[parameter_index]
+                results[design_index][parameter_index] = {
+                    "growth_rate": growth_rate[design_index][parameter_index],
+                    "protein_expression": protein_expression[design_index][parameter_index],
+                    "metabolic_burden": metabolic_burden[design_index][parameter_index],
+                    "stability": stability[design_index][parameter_index],
+                    "time_series": {
+                        "time": time,
+                        "growth": growth[design_index][position],
+                        "protein": protein[design_index][position],
+                        "metabolite": metabolite[design_index][position]
+                    },
+                    "parameters": _result_parameters(parameters),
+                    "notes": _design_notes(feature)
+                }
+    return results
+
+def _mechanistic_rates(
+    designs: List[DNADesign],
+    parameter_sets: List[SimulationParameters],
+) -> Dict[str, np.ndarray]:
+    """
+    Build the kinetics.rate_arrays of designs[i] under parameter_sets[i], one
+    row per pair. Promoter and RBS strengths are read from the part metadata
+    ("strength") and terminator efficiencies from "efficiency";
+    custom_parameters override the rate constants.
+    """
+    cassettes = [kinetics.cassette((part.type, part.metadata) for part in design.parts) for design in designs]
+    conditions = [
+        kinetics.conditions(parameters.environment, parameters.host_organism, parameters.temperature)
+        for parameters in parameter_sets
+    ]
+    return kinetics.rate_arrays(
+        cassettes,
+        [growth for growth, _ in conditions],
+        [expression for _, expression in conditions],
+        [parameters.custom_parameters for parameters in parameter_sets],
+    )
+
+def _growth_and_burden(rates: Dict[str, np.ndarray], series: Dict[str, np.ndarray]):
+    """Get the specific growth rate and the burden along (rows x time) trajectories."""
+    burden = rates["b_max"][:, None] * series["protein"] / (series["protein"] + rates["K_b"][:, None])
+    growth = rates["mu_max"][:, None] * (1.0 - burden) * (1.0 - series["density"] / rates["carrying_capacity"][:, None])
+    return growth, burden
+
+def _expression_scores(max_growth, final_protein, final_burden, terminator) -> Dict[str, Any]:
+    """Turn the outcome of mechanistic simulations (arrays, one entry per row) into 0-1 scores."""
+    return {
+        "growth_rate": np.clip(max_growth / kinetics.DEFAULT_RATES["mu_max"], 0.0, 1.0).tolist(),
+        "protein_expression": np.clip(final_protein / EXPRESSION_REFERENCE, 0.0, 1.0).tolist(),
+        "metabolic_burden": np.asarray(final_burden, dtype=float).tolist(),
+        # Transcriptional insulation of the cassette by its terminators
+        "stability": (0.5 + 0.5 * np.asarray(terminator, dtype=float)).tolist(),
     }
+
+def _kinetics_info(rates: Dict[str, np.ndarray]) -> List[Dict[str, float]]:
+    """Summarize the rates of each row for a mechanistic result."""
+    steady_state = kinetics.steady_state_protein(rates).tolist()
+    return [
+        {
+            "transcription_rate": float(rates["transcription"][row]),
+            "translation_rate": float(rates["translation"][row]),
+            "mrna_half_life_hours": float(np.log(2) / rates["d_m"][row]),
+            "max_growth_rate": float(rates["mu_max"][row]),
+            "steady_state_protein": steady_state[row]
+        }
+        for row in range(len(steady_state))
+    ]
+
+def _simulate_mechanistic(designs: List[DNADesign], parameter_sets: List[SimulationParameters]) -> List[List[Dict[str, Any]]]:
+    """
+    Integrate the gene expression ODEs of bioforge_seqkit.kinetics
+    (transcription, translation, degradation and growth dilution) for every
+    design under every parameter set (see _mechanistic_rates). All
+    combinations on the same time grid are integrated together.
+    """
+    features = [_design_features(design) for design in designs]
+    grids = {}
+    for index, parameters in enumerate(parameter_sets):
+        grids.setdefault((parameters.time_points, parameters.duration_hours), []).append(index)
+
+    results = [[None] * len(parameter_sets) for _ in designs]
+    for (time_points, duration_hours), columns in grids.items():
+        rows = [(design_index, index) for design_index in range(len(designs)) for index in columns]
+        rates = _mechanistic_rates(
+            [designs[design_index] for design_index, _ in rows],
+            [parameter_sets[index] for _, index in rows],
+        )
+        times = np.linspace(0.0, duration_hours, time_points)
+        series = kinetics.integrate(rates, times)
+        growth, burden = _growth_and_burden(rates, series)
+
+        terminator = [kinetics.cassette((part.type, part.metadata) for part in designs[design_index].parts)["terminator"]
+                      for design_index, _ in rows]
+        scores = _expression_scores(growth.max(axis=1), series["protein"][:, -1], burden[:, -1], terminator)
+        info = _kinetics_info(rates)
+        time = times.tolist()
+        density, mrna = series["density"].tolist(), series["mrna"].tolist()
+        protein, product = series["protein"].tolist(), series["product"].tolist()
+
+        for row, (design_index, index) in enumerate(rows):
+            results[design_index][index] = {
+                **{name: values[row] for name, values in scores.items()},
+                "time_series": {
+                    "time": time,
+                    "growth": density[row],
+                    "mrna": mrna[row],
+                    "protein": protein[row],
+                    "metabolite": product[row]
+                },
+                "kinetics": info[row],
+                "parameters": _result_parameters(parameter_sets[index]),
+                "notes": _design_notes(features[design_index])
+            }
+    return results
+
+def _ensemble_inputs(design: DNADesign, parameters: SimulationParameters):
+    """
+    Get the rates of a design under one parameter set, the output times and
+    the deterministic culture density the cells of an ensemble grow along.
+    """
+    rates = _mechanistic_rates([design], [parameters])
+    times = np.linspace(0.0, parameters.duration_hours, parameters.time_points)
+    density = kinetics.integrate(rates, times)["density"][0]
+    return {name: float(values[0]) for name, values in rates.items()}, times.tolist(), density.tolist()
+
+def _simulate_stochastic(designs: List[DNADesign], parameter_sets: List[SimulationParameters]) -> List[List[Dict[str, Any]]]:
+    """
+    Simulate like the mechanistic mode and add the cell-to-cell distribution
+    of mRNA and protein from a tau-leaping ensemble (bioforge_seqkit.stochastic):
+    mean, standard deviation, Fano factor and quantiles per time point.
+    The ensembles of all combinations run concurrently on the process pool.
+    """
+    results = _simulate_mechanistic(designs, parameter_sets)
+    seeds = _item_seeds(designs, parameter_sets)
+    combinations = [(row, column) for row in range(len(designs)) for column in range(len(parameter_sets))]
+    jobs = [
+        EnsembleJob(*_ensemble_inputs(designs[row], parameter_sets[column]), parameter_sets[column].trajectories, seeds[column][row])
+        for row, column in combinations
+    ]
+    for (row, column), ensemble in zip(combinations, ensemble_runner.run_many(jobs)):
+        result = results[row][column]
+        result["ensemble"] = {name: ensemble[name] for name in ("trajectories", "mrna", "protein")}
+    return results
+
+# Simulator per SimulationParameters.mode
+SIMULATION_MODES = {
+    "empirical": _simulate_empirical,
+    "mechanistic": _simulate_mechanistic,
+    "stochastic": _simulate_stochastic,
+}
+
+def _simulation_events(
+    design: DNADesign,
+    parameters: SimulationParameters,
+    chunk_points: int,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Simulate one design and yield (event, data) as the results come in:
+    "start" with the echoed parameters and notes, one "series" per chunk of
+    `chunk_points` time points (`start` is the index of its first point),
+    "ensemble" with the partial and final ensemble summaries in stochastic
+    mode, and "result" with the scores. The curves and scores are the same
+    as /api/simulate returns for the same seed, but only one chunk is held in
+    memory; stop iterating (or close the generator) to stop the computation.
+    """
+    feature = _design_features(design)
+    seed = _item_seeds([design], [parameters])[0][0]
+    time_points = parameters.time_points
+    start = {"time_points": time_points, "parameters": _result_parameters(parameters), "notes": _design_notes(feature)}
+
+    if parameters.mode == "empirical":
+        scores = _empirical_scores([feature], [parameters])
+        rngs = _series_generators(seed)
+        yield "start", start
+        for first in range(0, time_points, chunk_points):
+            stop = min(time_points, first + chunk_points)
+            yield "series", {
+                "start": first,
+                "time": list(range(first, stop)),
+                "growth": _generate_growth_curve(
+                    time_points, scores["growth_rate"][0], _noise([rngs["growth"]], stop - first), first, stop
+                )[0].tolist(),
+                "protein": _generate_protein_curve(
+                    time_points, scores["protein_expression"][0], [_has_expression_system(feature)], _noise([rngs["protein"]], stop - first), first, stop
+                )[0].tolist(),
+                "metabolite": _generate_metabolite_curve(
+                    time_points, scores["metabolic_burden"][0], [feature["has_gene"]], _noise([rngs["metabolite"]], stop - first), first, stop
+                )[0].tolist(),
+            }
+        jitter = rngs["scores"].uniform(-0.05, 0.05, 4)
+        yield "result", {
+            name: float(np.clip(scores[name][0, 0] + jitter[index], 0.0, 1.0))
+            for index, name in enumerate(("growth_rate", "protein_expression", "metabolic_burden", "stability"))
+        }
+        return
+
+    rates = _mechanistic_rates([design], [parameters])
+    times = np.linspace(0.0, parameters.duration_hours, time_points)
+    yield "start", {**start, "kinetics": _kinetics_info(rates)[0]}
+
+    # The ensemble grows along the whole density curve, one value per time point
+    density = [] if parameters.mode == "stochastic" else None
+    max_growth = 0.0
+    for first, series in kinetics.integrate_chunks(rates, times, chunk_points):
+        growth, burden = _growth_and_burden(rates, series)
+        max_growth = max(max_growth, float(growth.max()))
+        if density is not None:
+            density.extend(series["density"][0].tolist())
+        yield "series", {
+            "start": first,
+            "time": times[first:first + len(growth[0])].tolist(),
+            "growth": series["density"][0].tolist(),
+            "mrna": series["mrna"][0].tolist(),
+            "protein": series["protein"][0].tolist(),
+            "metabolite": series["product"][0].tolist(),
+        }
+
+    if density is not None:
+        summaries = ensemble_runner.stream(
+            {name: float(values[0]) for name, values in rates.items()}, times.tolist(), density, parameters.trajectories, seed
+        )
+        try:
+            for summary in summaries:
+                yield "ensemble", summary
+        finally:
+            # Cancels the chunks still queued on the pool
+            summaries.close()
+
+    terminator = kinetics.cassette((part.type, part.metadata) for part in design.parts)["terminator"]
+    scores = _expression_scores(np.array([max_growth]), series["protein"][:, -1], burden[:, -1], [terminator])
+    yield "result", {name: values[0] for name, values in scores.items()}
+
+def _design_notes(feature: Dict[str, bool]) -> List[str]:
+    """Add notes based on the design."""
+    notes = []
     
-    # Add notes based on the design
-    if not has_promoter:
-        result["notes"].append("No promoter found. Gene expression may be limited.")
+    if not feature["has_promoter"]:
+        notes.append("No promoter found. Gene expression may be limited.")
     
-    if not has_rbs:
-        result["notes"].append("No ribosome binding site found. Protein translation may be inefficient.")
+    if not feature["has_rbs"]:
+        notes.append("No ribosome binding site found. Protein translation may be inefficient.")
     
-    if not has_gene:
-        result["notes"].append("No coding sequence found. No protein will be produced.")
+    if not feature["has_gene"]:
+        notes.append("No coding sequence found. No protein will be produced.")
     
-    if not has_terminator:
-        result["notes"].append("No terminator found. Transcription may continue past the intended region.")
+    if not feature["has_terminator"]:
+        notes.append("No terminator found. Transcription may continue past the intended region.")
     
-    if not correct_order:
-        result["notes"].append("Components are not in the optimal order. Consider rearranging for better performance.")
+    if not feature["correct_order"]:
+        notes.append("Components are not in the optimal order. Consider rearranging for better performance.")
     
-    return result
+    return notes
 
 @app.post("/api/simulate/protein-folding")
-async def simulate_protein_folding(sequence: str):
-    """Simulate protein folding for a given amino acid sequence."""
+async def simulate_protein_folding(sequence: str, seed: Optional[int] = Query(None, ge=0)):
+    """Simulate protein folding for a given amino acid sequence. A seed makes the result reproducible."""
     logger.info(f"Simulating protein folding for sequence of length: {len(sequence)}")
+    rng = np.random.default_rng(seed)
     
     # In a real implementation, this would use a protein folding simulation
     # For now, we'll just return some simulated data
@@ -223,13 +816,13 @@ async def simulate_protein_folding(sequence: str):
     coil_propensity = 1.0 - helix_propensity - sheet_propensity
     
     # Simulate folding energy
-    folding_energy = -50.0 - hydrophobic_ratio * 100.0 + np.random.normal(0, 10)
+    folding_energy = -50.0 - hydrophobic_ratio * 100.0 + rng.normal(0, 10)
     
     # Simulate folding time
-    folding_time = 1.0 + len(sequence) / 100.0 + np.random.exponential(1.0)
+    folding_time = 1.0 + len(sequence) / 100.0 + rng.exponential(1.0)
     
     # Simulate stability
-    stability = 0.7 + hydrophobic_ratio * 0.3 - charged_ratio * 0.2 + np.random.normal(0, 0.1)
+    stability = 0.7 + hydrophobic_ratio * 0.3 - charged_ratio * 0.2 + rng.normal(0, 0.1)
     stability = min(1.0, max(0.0, stability))
     
     return {
@@ -244,155 +837,179 @@ async def simulate_protein_folding(sequence: str):
         "folding_energy": folding_energy,
         "folding_time": folding_time,
         "stability": stability,
-        "aggregation_propensity": 0.3 + charged_ratio * 0.2 + np.random.normal(0, 0.1)
+        "aggregation_propensity": 0.3 + charged_ratio * 0.2 + rng.normal(0, 0.1)
     }
 
 @app.post("/api/simulate/metabolic-pathway")
-async def simulate_metabolic_pathway(designs: List[DNADesign], parameters: Optional[SimulationParameters] = None):
-    """Simulate a metabolic pathway with multiple designs."""
+def simulate_metabolic_pathway(designs: List[DNADesign], parameters: Optional[SimulationParameters] = None):
+    """
+    Simulate a metabolic pathway with multiple designs, design i expressing the enzyme of step i.
+    This is CPU work, so it runs in the threadpool rather than on the event loop.
+    """
     logger.info(f"Simulating metabolic pathway with {len(designs)} designs")
     
     # Use default parameters if none provided
     if parameters is None:
         parameters = SimulationParameters()
-    
-    # In a real implementation, this would use a metabolic pathway simulation
-    # For now, we'll just return some simulated data
-    
-    # Simulate each design
+    _check_parameters([parameters], len(designs))
+    
+    # Without enzymes, the substrate is never converted
+    if not designs:
+        time_points = parameters.time_points
+        return {
+            "pathway_efficiency": 0.0,
+            "design_results": [],
+            "time_series": {
+                "time": list(range(time_points)),
+                "substrate": [1.0] * time_points,
+                "intermediate": [0.0] * time_points,
+                "intermediates": [],
+                "product": [0.0] * time_points,
+                "flux": []
+            },
+            "bottleneck_index": -1,
+            "yield": 0.0,
+            "productivity": 0.0
+        }
+    
+    # Fast enzymes shrink the integration step; reject pathways that would take too many before simulating
+    enzyme_kinetics = [_enzyme_kinetics(design) for design in designs]
+    if parameters.mode == "empirical":
+        times = np.arange(parameters.time_points, dtype=float)
+    else:
+        times = np.linspace(0.0, parameters.duration_hours, parameters.time_points)
+    steps = max_step_count(times, [kcat for kcat, _ in enzyme_kinetics], [km for _, km in enzyme_kinetics])
+    if steps > MAX_SIMULATION_STEPS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Pathway takes up to {steps} integration steps, the limit is {MAX_SIMULATION_STEPS}; "
+                   "use fewer time points or slower enzymes (lower kcat / km)",
+        )
+    
+    # Simulate all designs in one batch; stochastic ensembles fan out over the process pool
+    results = [result for (result,) in _simulate_batch(designs, [parameters])]
     design_results = []
-    for design in designs:
-        result = await run_simulation(design, parameters)
+    for design, result, (kcat, km) in zip(designs, results, enzyme_kinetics):
         design_results.append({
             "design_id": design.id,
             "design_name": design.name,
             "growth_rate": result["growth_rate"],
             "protein_expression": result["protein_expression"],
-            "metabolic_burden": result["metabolic_burden"]
+            "metabolic_burden": result["metabolic_burden"],
+            "kcat": kcat,
+            "km": km
         })
     
     # Calculate pathway efficiency
-    if len(designs) > 0:
-        avg_protein_expression = sum(r["protein_expression"] for r in design_results) / len(design_results)
-        avg_metabolic_burden = sum(r["metabolic_burden"] for r in design_results) / len(design_results)
-        pathway_efficiency = avg_protein_expression * (1.0 - avg_metabolic_burden)
-    else:
-        pathway_efficiency = 0.0
-    
-    # Generate pathway time series
-    time_points = parameters.time_points
-    pathway_time_series = {
-        "time": list(range(time_points)),
-        "substrate": _generate_substrate_curve(time_points, pathway_efficiency),
-        "intermediate": _generate_intermediate_curve(time_points, pathway_efficiency, len(designs)),
-        "product": _generate_product_curve(time_points, pathway_efficiency)
-    }
-    
-    return {
+    avg_protein_expression = sum(r["protein_expression"] for r in design_results) / len(design_results)
+    avg_metabolic_burden = sum(r["metabolic_burden"] for r in design_results) / len(design_results)
+    pathway_efficiency = avg_protein_expression * (1.0 - avg_metabolic_burden)
+    
+    # Integrate substrate, intermediates and product as one coupled system, driven by each design's enzyme curve
+    times = results[0]["time_series"]["time"]
+    enzymes = np.array([_enzyme_levels(result) for result in results])
+    kcat = np.array([kcat for kcat, _ in enzyme_kinetics])
+    km = np.array([km for _, km in enzyme_kinetics])
+    pathway = simulate_pathway(enzymes, times, kcat, km)
+    
+    # The step with the least catalytic capacity limits the pathway
+    capacity = kcat * enzymes.mean(axis=1)
+    product = pathway["product"]
+    
+    # Plain lists and floats only; skip the generic encoder, which dominates long pathways
+    return JSONResponse({
         "pathway_efficiency": pathway_efficiency,
         "design_results": design_results,
-        "time_series": pathway_time_series,
-        "bottleneck_index": np.argmin([r["protein_expression"] for r in design_results]) if design_results else -1,
-        "yield": pathway_efficiency * 0.8 + np.random.normal(0, 0.05),
-        "productivity": pathway_efficiency * 0.7 + np.random.normal(0, 0.05)
-    }
+        "time_series": {
+            "time": times,
+            "substrate": pathway["substrate"].tolist(),
+            "intermediate": pathway["intermediates"].sum(axis=0).tolist(),
+            "intermediates": pathway["intermediates"].tolist(),
+            "product": product.tolist(),
+            "flux": pathway["flux"].tolist()
+        },
+        "bottleneck_index": int(np.argmin(capacity)),
+        "yield": float(product[-1]),
+        "productivity": float(product[-1] / times[-1]) if times[-1] > 0 else 0.0
+    })
+
+def _enzyme_kinetics(design: DNADesign):
+    """
+    Get the kcat and km of a design's enzyme from the metadata of its first
+    gene, with defaults. Values outside KCAT_BOUNDS and KM_BOUNDS are clamped.
+    """
+    clamp = lambda value, bounds: min(max(float(value), bounds[0]), bounds[1])
+    for part in design.parts:
+        if part.type.lower() == "gene":
+            metadata = part.metadata or {}
+            kcat, km = metadata.get("kcat"), metadata.get("km")
+            return (
+                clamp(kcat, KCAT_BOUNDS) if isinstance(kcat, (int, float)) and kcat >= 0 else DEFAULT_KCAT,
+                clamp(km, KM_BOUNDS) if isinstance(km, (int, float)) and km > 0 else DEFAULT_KM,
+            )
+    return DEFAULT_KCAT, DEFAULT_KM
 
-def _generate_growth_curve(time_points, growth_rate):
-    """Generate a simulated growth curve."""
+def _enzyme_levels(result: Dict[str, Any]) -> np.ndarray:
+    """Get a design's enzyme level over time (0-1) from its simulation result."""
+    if result["parameters"].get("mode", "empirical") == "empirical":
+        return np.asarray(result["time_series"]["protein"], dtype=float)
+    # Mechanistic and stochastic protein is per cell; the ensemble mean includes the effect of noise on burden
+    protein = result["ensemble"]["protein"]["mean"] if "ensemble" in result else result["time_series"]["protein"]
+    return np.clip(np.asarray(protein, dtype=float) / EXPRESSION_REFERENCE, 0.0, 1.0)
+
+def _noise(rngs, points):
+    """Draw the next `points` values of curve noise from each generator, one row per generator."""
+    noise = np.empty((len(rngs), points))
+    for row, rng in enumerate(rngs):
+        rng.standard_normal(out=noise[row])
+    return noise * CURVE_NOISE
+
+def _generate_growth_curve(time_points, growth_rate, noise, start=0, stop=None):
+    """
+    Generate simulated growth curves, one row per growth rate (and row of noise).
+    `start` and `stop` select a window of the time points; `noise` covers only the window.
+    """
     # Logistic growth curve
     K = 1.0  # Carrying capacity
-    r = growth_rate * 0.5  # Growth rate parameter
-    t = np.linspace(0, time_points - 1, time_points)
+    r = np.asarray(growth_rate, dtype=float)[:, None] * 0.5  # Growth rate parameter
+    t = np.arange(start, time_points if stop is None else stop, dtype=float)
     N0 = 0.1  # Initial population
     
     N = K / (1 + ((K - N0) / N0) * np.exp(-r * t))
     
     # Add some noise
-    noise = np.random.normal(0, 0.02, time_points)
-    N = np.clip(N + noise, 0, 1)
-    
-    return N.tolist()
+    return np.clip(N + noise, 0, 1)
 
-def _generate_protein_curve(time_points, expression_level, has_expression_system):
-    """Generate a simulated protein expression curve."""
-    if not has_expression_system:
-        return [0] * time_points
-    
+def _generate_protein_curve(time_points, expression_level, has_expression_system, noise, start=0, stop=None):
+    """Generate simulated protein expression curves, one row per expression level (and row of noise)."""
     # Protein expression typically follows a sigmoidal curve
-    t = np.linspace(0, time_points - 1, time_points)
+    expression_level = np.asarray(expression_level, dtype=float)[:, None]
+    t = np.arange(start, time_points if stop is None else stop, dtype=float)
     k = expression_level * 0.5  # Rate parameter
     midpoint = time_points * 0.3  # When expression reaches half-maximum
     
     protein = expression_level / (1 + np.exp(-k * (t - midpoint)))
     
     # Add some noise
-    noise = np.random.normal(0, 0.02, time_points)
     protein = np.clip(protein + noise, 0, 1)
     
-    return protein.tolist()
+    # No expression without promoter, RBS and gene
+    return np.where(np.asarray(has_expression_system)[:, None], protein, 0.0)
 
-def _generate_metabolite_curve(time_points, metabolic_burden, has_gene):
-    """Generate a simulated metabolite production curve."""
-    if not has_gene:
-        return [0] * time_points
-    
+def _generate_metabolite_curve(time_points, metabolic_burden, has_gene, noise, start=0, stop=None):
+    """Generate simulated metabolite production curves, one row per metabolic burden (and row of noise)."""
     # Metabolite production typically increases over time
-    t = np.linspace(0, time_points - 1, time_points)
+    metabolic_burden = np.asarray(metabolic_burden, dtype=float)[:, None]
+    t = np.arange(start, time_points if stop is None else stop, dtype=float)
     k = metabolic_burden * 0.4  # Rate parameter
     
     metabolite = metabolic_burden * (1 - np.exp(-k * t / time_points))
     
     # Add some noise
-    noise = np.random.normal(0, 0.02, time_points)
     metabolite = np.clip(metabolite + noise, 0, 1)
     
-    return metabolite.tolist()
-
-def _generate_substrate_curve(time_points, pathway_efficiency):
-    """Generate a simulated substrate consumption curve."""
-    # Substrate typically decreases over time
-    t = np.linspace(0, time_points - 1, time_points)
-    k = pathway_efficiency * 0.5  # Rate parameter
-    
-    substrate = 1.0 * np.exp(-k * t / time_points)
-    
-    # Add some noise
-    noise = np.random.normal(0, 0.02, time_points)
-    substrate = np.clip(substrate + noise, 0, 1)
-    
-    return substrate.tolist()
-
-def _generate_intermediate_curve(time_points, pathway_efficiency, num_steps):
-    """Generate a simulated intermediate metabolite curve."""
-    if num_steps <= 1:
-        return [0] * time_points
-    
-    # Intermediate typically rises and then falls
-    t = np.linspace(0, time_points - 1, time_points)
-    k1 = pathway_efficiency * 0.6  # Production rate
-    k2 = pathway_efficiency * 0.4  # Consumption rate
-    
-    intermediate = 0.5 * (1 - np.exp(-k1 * t / time_points)) * np.exp(-k2 * t / time_points)
-    
-    # Add some noise
-    noise = np.random.normal(0, 0.02, time_points)
-    intermediate = np.clip(intermediate + noise, 0, 1)
-    
-    return intermediate.tolist()
-
-def _generate_product_curve(time_points, pathway_efficiency):
-    """Generate a simulated product formation curve."""
-    # Product typically increases over time
-    t = np.linspace(0, time_points - 1, time_points)
-    k = pathway_efficiency * 0.3  # Rate parameter
-    
-    product = pathway_efficiency * (1 - np.exp(-k * t / time_points))
-    
-    # Add some noise
-    noise = np.random.normal(0, 0.02, time_points)
-    product = np.clip(product + noise, 0, 1)
-    
-    return product.tolist()
+    # No metabolite without a gene
+    return np.where(np.asarray(has_gene)[:, None], metabolite, 0.0)
 
 # Main entry point
 if __name__ == "__main__":